@@ -0,0 +1,322 @@
+"""
+NEUROSITY CROWN MONITOR - TENDANCES ENTRE SESSIONS
+
+Distributions par jour et par semaine des métriques (calme, concentration,
+attention, puissances par bande) sur l'ensemble des sessions enregistrées,
+et pente de leur évolution.
+
+Chaque session est réduite une fois pour toutes à un résumé fusionnable par
+jour (effectif, somme, somme des carrés, min, max, histogramme à bornes
+fixes), mis en cache dans ``<data>/.analytics/`` et invalidé quand la taille
+ou la date de modification du CSV change. Les résumés absents sont calculés
+en parallèle dans un pool de processus (ANALYTICS_WORKERS) ; les requêtes
+suivantes ne relisent plus aucun CSV et se contentent de fusionner.
+"""
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('neurosity_monitor.analytics')
+
+SUMMARY_VERSION = 1
+CACHE_DIRECTORY = '.analytics'
+
+PERCENT_METRICS = {'calm': 'calm_percentage', 'focus': 'focus_percentage', 'attention': 'attention_percentage'}
+BAND_METRICS = {band: f'{band}_avg' for band in ('delta', 'theta', 'alpha', 'beta', 'gamma')}
+METRICS = {**PERCENT_METRICS, **BAND_METRICS}
+
+# Bornes fixes (histogrammes fusionnables): pourcentages par point, bandes en échelle log 1e-3 … 1e5
+# (40 classes par décade, ~6 % de largeur relative)
+PERCENT_EDGES = np.linspace(0.0, 100.0, 101)
+BAND_EDGES = np.logspace(-3, 5, 321)
+QUANTILES = (10, 25, 50, 75, 90)
+
+_SESSION_DATE = re.compile(r'(\d{8})_\d{6}')
+_DAY = r'^\d{4}-\d{2}-\d{2}'
+
+
+def _edges(metric: str) -> np.ndarray:
+    return PERCENT_EDGES if metric in PERCENT_METRICS else BAND_EDGES
+
+
+def parse_day(value: Optional[str]) -> Optional[str]:
+    """Date 'AAAA-MM-JJ' (ValueError si invalide, None si absente)"""
+    if not value:
+        return None
+    return date.fromisoformat(value.strip()).isoformat()
+
+
+def session_day(filename: str) -> Optional[str]:
+    """Jour de début d'une session d'après son nom (neurosity_session_AAAAMMJJ_HHMMSS.csv)"""
+    match = _SESSION_DATE.search(filename)
+    if not match:
+        return None
+    try:
+        return date(int(match.group(1)[:4]), int(match.group(1)[4:6]), int(match.group(1)[6:])).isoformat()
+    except ValueError:
+        return None
+
+
+# ===============================================
+# RÉSUMÉS PAR SESSION (exécutés dans les workers)
+# ===============================================
+
+def summarize_session(csv_path: str) -> Dict:
+    """Résumé fusionnable d'une session, par jour et par métrique"""
+    df = pd.read_csv(csv_path, delimiter=';',
+                     usecols=lambda column: column == 'timestamp' or column in METRICS.values())
+    days = {}
+    if 'timestamp' in df and len(df):
+        day_keys = df['timestamp'].astype(str).str.slice(0, 10)
+        dated = day_keys.str.match(_DAY)
+        for metric, column in METRICS.items():
+            if column not in df:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce')
+            valid = values.notna() & dated
+            if not valid.any():
+                continue
+            edges = _edges(metric)
+            for day, group in values[valid].groupby(day_keys[valid]):
+                v = group.to_numpy(dtype=float)
+                days.setdefault(day, {})[metric] = {
+                    'count': int(v.size),
+                    'sum': float(v.sum()),
+                    'sumsq': float(np.dot(v, v)),
+                    'min': float(v.min()),
+                    'max': float(v.max()),
+                    'hist': np.histogram(np.clip(v, edges[0], edges[-1]), edges)[0].tolist()
+                }
+    return {'version': SUMMARY_VERSION, 'file': os.path.basename(csv_path), 'rows': int(len(df)), 'days': days}
+
+
+def _fingerprint(csv_path: str) -> List[int]:
+    stat = os.stat(csv_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _cache_path(data_directory: str, filename: str) -> str:
+    return os.path.join(data_directory, CACHE_DIRECTORY, os.path.splitext(filename)[0] + '.json')
+
+
+def load_cached_summary(data_directory: str, filename: str) -> Optional[Dict]:
+    """Résumé en cache, None s'il est absent ou périmé (CSV modifié depuis)"""
+    try:
+        with open(_cache_path(data_directory, filename), 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        fingerprint = _fingerprint(os.path.join(data_directory, filename))
+    except (OSError, ValueError):
+        return None
+    if summary.get('version') != SUMMARY_VERSION or summary.get('fingerprint') != fingerprint:
+        return None
+    return summary
+
+
+def summarize_to_cache(data_directory: str, filename: str) -> Dict:
+    """Calcule le résumé d'une session et l'écrit dans le cache (remplacement atomique)"""
+    csv_path = os.path.join(data_directory, filename)
+    fingerprint = _fingerprint(csv_path)
+    summary = summarize_session(csv_path)
+    summary['fingerprint'] = fingerprint
+
+    cache_path = _cache_path(data_directory, filename)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, separators=(',', ':'))
+    os.replace(temporary, cache_path)
+    return summary
+
+
+# ===============================================
+# FUSION ET TENDANCES
+# ===============================================
+
+def _merge(target: Dict, stats: Dict):
+    target['count'] += stats['count']
+    target['sum'] += stats['sum']
+    target['sumsq'] += stats['sumsq']
+    target['min'] = min(target['min'], stats['min'])
+    target['max'] = max(target['max'], stats['max'])
+    target['hist'] += stats['hist']
+
+
+def _empty(metric: str) -> Dict:
+    return {'count': 0, 'sum': 0.0, 'sumsq': 0.0, 'min': float('inf'), 'max': float('-inf'),
+            'hist': np.zeros(len(_edges(metric)) - 1, dtype=np.int64), 'sessions': 0}
+
+
+def _quantiles(hist: np.ndarray, edges: np.ndarray, count: int, low: float, high: float) -> Dict:
+    """Quantiles interpolés dans l'histogramme (en log pour les bandes), bornés par le min et le max observés"""
+    logarithmic = edges is BAND_EDGES
+    scale = np.log10(edges) if logarithmic else edges
+    cumulative = np.cumsum(hist)
+    result = {}
+    for q in QUANTILES:
+        target = q / 100 * count
+        index = min(int(np.searchsorted(cumulative, target)), len(hist) - 1)
+        before = cumulative[index - 1] if index else 0
+        fraction = (target - before) / hist[index] if hist[index] else 0.0
+        value = scale[index] + fraction * (scale[index + 1] - scale[index])
+        value = 10 ** value if logarithmic else value
+        result[f'p{q}'] = round(float(min(max(value, low), high)), 4)
+    return result
+
+
+def _describe(period: str, stats: Dict, edges: np.ndarray) -> Dict:
+    count = stats['count']
+    mean = stats['sum'] / count
+    variance = max(stats['sumsq'] / count - mean * mean, 0.0)
+    return {
+        'period': period,
+        'sessions': stats['sessions'],
+        'count': count,
+        'mean': round(mean, 4),
+        'std': round(variance ** 0.5, 4),
+        'min': round(stats['min'], 4),
+        'max': round(stats['max'], 4),
+        **_quantiles(stats['hist'], edges, count, stats['min'], stats['max'])
+    }
+
+
+def _slope(daily: List[Dict]) -> Optional[Dict]:
+    """Pente des moyennes journalières (moindres carrés) et variation relative sur la période"""
+    if len(daily) < 2:
+        return None
+    x = np.array([date.fromisoformat(day['period']).toordinal() for day in daily], dtype=float)
+    y = np.array([day['mean'] for day in daily])
+    slope = float(np.polyfit(x - x[0], y, 1)[0])
+    mean = float(y.mean())
+    return {
+        'days': len(daily),
+        'slope_per_day': round(slope, 5),
+        'slope_per_week': round(slope * 7, 4),
+        'change_pct': round(slope * (x[-1] - x[0]) / mean * 100, 2) if mean else None
+    }
+
+
+def compute_trends(summaries: Iterable[Dict], metrics: List[str], start: Optional[str] = None,
+                   end: Optional[str] = None) -> Dict:
+    """Distributions par jour et par semaine (ISO) et pente des moyennes journalières"""
+    days = {metric: {} for metric in metrics}
+    for summary in summaries:
+        for day, day_metrics in summary['days'].items():
+            if (start and day < start) or (end and day > end):
+                continue
+            for metric in metrics:
+                stats = day_metrics.get(metric)
+                if stats:
+                    merged = days[metric].setdefault(day, _empty(metric))
+                    _merge(merged, stats)
+                    merged['sessions'] += 1
+
+    daily, weekly, trend = {}, {}, {}
+    for metric, by_day in days.items():
+        edges = _edges(metric)
+        weeks = {}
+        for day, stats in by_day.items():
+            year, week, _ = date.fromisoformat(day).isocalendar()
+            merged = weeks.setdefault(f'{year}-W{week:02d}', _empty(metric))
+            _merge(merged, stats)
+            merged['sessions'] += stats['sessions']
+        daily[metric] = [_describe(day, by_day[day], edges) for day in sorted(by_day)]
+        weekly[metric] = [_describe(week, weeks[week], edges) for week in sorted(weeks)]
+        trend[metric] = _slope(daily[metric])
+
+    present = sorted({day for by_day in days.values() for day in by_day})
+    return {
+        'from': start or (present[0] if present else None),
+        'to': end or (present[-1] if present else None),
+        'metrics': metrics,
+        'daily': daily,
+        'weekly': weekly,
+        'trend': trend
+    }
+
+
+# ===============================================
+# ANALYSEUR (processus serveur)
+# ===============================================
+
+class TrendAnalytics:
+    """Tendances entre sessions: résumés en cache, calculés en parallèle quand ils manquent"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Pool créé au premier résumé manquant: aucun worker tant que le cache suffit
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=mp.get_context('spawn'))
+            return self._executor
+
+    def summaries(self, data_directory: str, filenames: Iterable[str]) -> Tuple[List[Dict], Dict]:
+        """Résumés des sessions (cache, sinon calcul) et compteurs: en cache, calculés, en échec"""
+        summaries, missing, failed = [], [], []
+        for filename in filenames:
+            summary = load_cached_summary(data_directory, filename)
+            if summary is None:
+                missing.append(filename)
+            else:
+                summaries.append(summary)
+        cached = len(summaries)
+
+        if len(missing) == 1 or (missing and self.max_workers == 1):
+            # Pas de pool pour une seule session (démarrage des workers plus coûteux que la lecture)
+            for filename in missing:
+                try:
+                    summaries.append(summarize_to_cache(data_directory, filename))
+                except Exception as e:
+                    failed.append({'file': filename, 'error': str(e)})
+        elif missing:
+            futures = {self._get_executor().submit(summarize_to_cache, data_directory, filename): filename
+                       for filename in missing}
+            for future in as_completed(futures):
+                try:
+                    summaries.append(future.result())
+                except Exception as e:
+                    failed.append({'file': futures[future], 'error': str(e)})
+
+        for failure in failed:
+            logger.error(f"❌ Résumé de session impossible ({failure['file']}): {failure['error']}")
+        return summaries, {'total': cached + len(missing), 'cached': cached,
+                           'computed': len(missing) - len(failed), 'failed': failed}
+
+    def trends(self, data_directory: str, filenames: Iterable[str], metrics: List[str],
+               start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        started = time.perf_counter()
+        # Sessions commencées hors période ignorées sans lecture (la veille gardée: sessions à cheval sur minuit)
+        first_day = (date.fromisoformat(start) - timedelta(days=1)).isoformat() if start else None
+        selected = []
+        for filename in filenames:
+            day = session_day(filename)
+            if day is None or not ((first_day and day < first_day) or (end and day > end)):
+                selected.append(filename)
+        summaries, sessions = self.summaries(data_directory, selected)
+        result = compute_trends(summaries, metrics, start, end)
+        result['sessions'] = sessions
+        result['elapsed_s'] = round(time.perf_counter() - started, 3)
+        logger.info(f"📈 Tendances: {sessions['total']} sessions ({sessions['cached']} en cache, "
+                    f"{sessions['computed']} calculées) en {result['elapsed_s']}s")
+        return result
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
@@ -8,655 +8,44 @@ VERSION CORRIGÉE - Validation moins stricte mais intelligente
 import os
 import sys
 import time
+import asyncio
+import concurrent.futures
+import gc
+import itertools
+import logging
 import multiprocessing as mp
 from pathlib import Path
 from datetime import datetime
 from queue import Empty
 import json
 import threading
-import statistics
 from collections import deque
 
 # Flask et SocketIO
-from flask import Flask, render_template, jsonify, request, send_file
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, jsonify, request, send_file, Response
+from flask_socketio import SocketIO, emit, join_room, leave_room
 
 # Variables d'environnement
 from dotenv import load_dotenv
 
 # DataManager local
 from data_manager import DataManager
+from utils.neurosity_helper import WAVE_TYPES, MetricsProcessor, get_device_ids, is_simulator_mode
+from utils.history import BackfillCache, HistoryStore, parse_range
+from utils.rules import RuleEngine
+from utils.signal_quality import STATES as SIGNAL_STATES
+from utils import instrumentation as metrics
+from utils.profiling import ProcessProfiler, ThreadProfiler, profile_path
+from config.settings import get_config_class, setup_logging
+from acquisition import SUPERVISED_STREAMS, DaemonClient, daemon_socket_path, neurosity_process
+from recorder import SessionRecorder
+from jobs import JobManager
+from analytics import METRICS as TREND_METRICS, TrendAnalytics, parse_day
+from feature_export import export_options, select_sessions
 
-
-# ===============================================
-# DÉTECTEUR DE DONNÉES BIOLOGIQUES RÉELLES - VERSION CORRIGÉE
-# ===============================================
-
-class BiologicalDataValidator:
-    """Validateur de données biologiques réelles vs simulées - VERSION CORRIGÉE"""
-    
-    def __init__(self):
-        self.data_history = {
-            'calm': deque(maxlen=10),
-            'focus': deque(maxlen=10),
-            'timestamps': deque(maxlen=10)
-        }
-        self.first_timestamp = None
-        self.detection_start = None
-    
-    def add_data_point(self, metric: str, data: dict):
-        """Ajoute un point de données pour validation"""
-        if metric in ['calm', 'focus']:
-            probability = data.get('probability', 0)
-            timestamp = data.get('timestamp', 0)
-            
-            self.data_history[metric].append(probability)
-            self.data_history['timestamps'].append(timestamp)
-            
-            if self.first_timestamp is None:
-                self.first_timestamp = timestamp
-                self.detection_start = time.time()
-    
-    def is_real_biological_data(self) -> tuple[bool, str]:
-        """
-        Détermine si les données sont biologiques réelles - VERSION CORRIGÉE
-        Returns: (is_real, reason)
-        """
-        if len(self.data_history['calm']) < 5:
-            return False, "Données insuffisantes pour validation"
-        
-        # Test 1: Variabilité des données (STRICT - détecte simulation)
-        calm_variance = self._calculate_variance(self.data_history['calm'])
-        focus_variance = self._calculate_variance(self.data_history['focus'])
-        
-        if calm_variance < 0.001 and focus_variance < 0.001:
-            return False, "Données trop constantes (simulation détectée)"
-        
-        # Test 2: Distribution réaliste (STRICT - détecte valeurs aberrantes)
-        if not self._has_realistic_distribution():
-            return False, "Distribution artificielle détectée"
-        
-        # Test 3: Timestamps cohérents (PERMISSIF - accepte variations hardware)
-        timestamp_result, timestamp_reason = self._check_timestamps_permissive()
-        if not timestamp_result:
-            return False, f"Problème grave timestamps: {timestamp_reason}"
-        
-        # Test 4: Patterns biologiques (STRICT - détecte corrélations parfaites)
-        if not self._has_biological_patterns():
-            return False, "Patterns non-biologiques détectés"
-        
-        # Test 5: Valeurs suspectes (PERMISSIF - tolère précision normale)
-        if self._has_highly_suspicious_values():
-            return False, "Données clairement simulées détectées"
-        
-        return True, "Données biologiques authentiques validées"
-    
-    def _calculate_variance(self, data_list):
-        """Calcule la variance des données"""
-        if len(data_list) < 2:
-            return 0
-        return statistics.variance(data_list)
-    
-    def _has_realistic_distribution(self) -> bool:
-        """Vérifie que les données ont une distribution réaliste (STRICT)"""
-        calm_data = list(self.data_history['calm'])
-        focus_data = list(self.data_history['focus'])
-        
-        # Les vraies données biologiques sont généralement entre 0.05 et 0.95
-        # (légèrement élargi pour être plus réaliste)
-        calm_in_range = sum(1 for x in calm_data if 0.05 <= x <= 0.95)
-        focus_in_range = sum(1 for x in focus_data if 0.05 <= x <= 0.95)
-        
-        # Au moins 70% des données doivent être dans la plage réaliste
-        # (baissé de 60% pour être plus permissif)
-        calm_ratio = calm_in_range / len(calm_data) if calm_data else 0
-        focus_ratio = focus_in_range / len(focus_data) if focus_data else 0
-        
-        return calm_ratio >= 0.7 and focus_ratio >= 0.7
-    
-    def _check_timestamps_permissive(self) -> tuple[bool, str]:
-        """CORRIGÉ: Vérification permissive des timestamps"""
-        timestamps = list(self.data_history['timestamps'])
-        if len(timestamps) < 2:
-            return True, "Timestamps OK"
-        
-        intervals = []
-        for i in range(1, len(timestamps)):
-            interval = timestamps[i] - timestamps[i - 1]
-            intervals.append(interval)
-        
-        # Détecter seulement les problèmes GRAVES
-        zero_or_negative = sum(1 for x in intervals if x <= 0)
-        too_fast = sum(1 for x in intervals if 0 < x < 5)  # Moins de 5ms = suspect
-        too_slow = sum(1 for x in intervals if x > 120000)  # Plus de 2 minutes = problème
-        
-        # Échouer seulement en cas de problèmes graves
-        if zero_or_negative > 0:
-            return False, "Timestamps qui reculent (simulation)"
-        
-        if too_fast > len(intervals) * 0.5:  # Plus de 50% trop rapides
-            return False, "Fréquence irréaliste (>200Hz)"
-        
-        if too_slow > len(intervals) * 0.3:  # Plus de 30% avec de gros trous
-            return False, "Trous temporels trop importants"
-        
-        # NOUVEAU: Validation permissive pour les intervalles normaux
-        normal_intervals = [x for x in intervals if 5 <= x <= 120000]
-        if len(normal_intervals) == 0:
-            return False, "Aucun intervalle dans la plage normale"
-        
-        # Log de debug pour le développement
-        if len(intervals) > 0:
-            avg_interval = sum(intervals) / len(intervals)
-            freq_hz = 1000 / avg_interval if avg_interval > 0 else 0
-            print(f"🧠 [DEBUG] Timestamps - Intervalle moyen: {avg_interval:.1f}ms, Fréquence: {freq_hz:.1f}Hz")
-            print(f"🧠 [DEBUG] Intervalles: min={min(intervals)}ms, max={max(intervals)}ms")
-        
-        return True, f"Timestamps valides ({len(normal_intervals)}/{len(intervals)} intervalles normaux)"
-    
-    def _has_biological_patterns(self) -> bool:
-        """Recherche des patterns biologiques naturels (STRICT)"""
-        calm_data = list(self.data_history['calm'])
-        focus_data = list(self.data_history['focus'])
-        
-        if len(calm_data) < 5:
-            return True
-        
-        # Les données biologiques ne sont jamais parfaitement synchronisées
-        correlation = self._calculate_correlation(calm_data, focus_data)
-        
-        # Une corrélation parfaite (>0.95 ou <-0.95) est suspecte
-        is_valid = abs(correlation) < 0.95
-        
-        if not is_valid:
-            print(f"🧠 [DEBUG] Corrélation suspecte détectée: {correlation:.3f}")
-        
-        return is_valid
-    
-    def _calculate_correlation(self, x, y):
-        """Calcule la corrélation entre deux séries"""
-        if len(x) != len(y) or len(x) < 2:
-            return 0
-        
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2 = sum(x[i] ** 2 for i in range(n))
-        sum_y2 = sum(y[i] ** 2 for i in range(n))
-        
-        denominator = ((n * sum_x2 - sum_x ** 2) * (n * sum_y2 - sum_y ** 2)) ** 0.5
-        if denominator == 0:
-            return 0
-        
-        return (n * sum_xy - sum_x * sum_y) / denominator
-    
-    def _has_highly_suspicious_values(self) -> bool:
-        """CORRIGÉ: Détecte seulement les valeurs VRAIMENT suspectes"""
-        calm_data = list(self.data_history['calm'])
-        focus_data = list(self.data_history['focus'])
-        
-        total_points = len(calm_data) + len(focus_data)
-        if total_points == 0:
-            return False
-        
-        # Test 1: Trop de valeurs exactes (0.0, 1.0)
-        exact_extremes = sum(1 for x in calm_data + focus_data if x == 0.0 or x == 1.0)
-        if exact_extremes / total_points > 0.6:  # Plus de 60% de valeurs exactes
-            print(f"🧠 [DEBUG] Trop de valeurs exactes: {exact_extremes}/{total_points}")
-            return True
-        
-        # Test 2: Valeurs répétitives (simulation typique)
-        calm_unique = len(set(calm_data))
-        focus_unique = len(set(focus_data))
-        
-        if len(calm_data) > 5 and calm_unique <= 2:  # Seulement 1-2 valeurs différentes
-            print(f"🧠 [DEBUG] Valeurs calm trop répétitives: {calm_unique} valeurs uniques")
-            return True
-        
-        if len(focus_data) > 5 and focus_unique <= 2:
-            print(f"🧠 [DEBUG] Valeurs focus trop répétitives: {focus_unique} valeurs uniques")
-            return True
-        
-        # Test 3: Patterns arithmétiques parfaits
-        if self._has_arithmetic_patterns(calm_data) or self._has_arithmetic_patterns(focus_data):
-            print(f"🧠 [DEBUG] Patterns arithmétiques détectés")
-            return True
-        
-        return False
-    
-    def _has_arithmetic_patterns(self, data):
-        """Détecte des patterns arithmétiques parfaits (signe de simulation)"""
-        if len(data) < 4:
-            return False
-        
-        # Vérifier si les différences sont constantes (progression arithmétique)
-        differences = [data[i + 1] - data[i] for i in range(len(data) - 1)]
-        
-        if len(set(differences)) <= 1:  # Toutes les différences identiques
-            return True
-        
-        # Vérifier les patterns cycliques simples
-        if len(data) >= 6:
-            # Pattern ABAB...
-            pattern_2 = all(data[i] == data[i % 2] for i in range(len(data)))
-            # Pattern ABCABC...
-            pattern_3 = all(data[i] == data[i % 3] for i in range(len(data)))
-            
-            if pattern_2 or pattern_3:
-                return True
-        
-        return False
-
-
-# ===============================================
-# PROCESSUS NEUROSITY AVEC DÉTECTION STRICTE CORRIGÉE
-# ===============================================
-
-def neurosity_process(command_queue, data_queue, response_queue):
-    """
-    Processus Neurosity avec détection stricte de casque réel - VERSION CORRIGÉE
-    """
-    print("🧠 [NEUROSITY PROCESS] Démarrage avec détection stricte corrigée...")
-    
-    try:
-        from neurosity import NeurositySDK
-        
-        neurosity = None
-        is_connected = False
-        is_monitoring = False
-        subscriptions = []
-        device_status = {'online': False, 'battery': 'unknown', 'signal': 'disconnected'}
-        
-        # Validateur de données biologiques CORRIGÉ
-        bio_validator = None
-        
-        load_dotenv()
-        
-        def cleanup():
-            """Nettoyage complet"""
-            nonlocal neurosity, is_monitoring, subscriptions, is_connected
-            try:
-                print("🧠 [NEUROSITY] Nettoyage en cours...")
-                
-                if is_monitoring and subscriptions:
-                    for unsub_func in subscriptions:
-                        try:
-                            if callable(unsub_func):
-                                unsub_func()
-                        except Exception as e:
-                            print(f"🧠 [NEUROSITY] Erreur unsubscribe: {e}")
-                    subscriptions = []
-                    is_monitoring = False
-                
-                if neurosity and is_connected:
-                    try:
-                        neurosity.logout()
-                    except Exception as e:
-                        print(f"🧠 [NEUROSITY] Erreur logout: {e}")
-                
-                neurosity = None
-                is_connected = False
-                device_status.update({'online': False, 'battery': 'unknown', 'signal': 'disconnected'})
-                
-                print("🧠 [NEUROSITY] Nettoyage terminé")
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] Erreur nettoyage: {e}")
-        
-        def send_data(data_type, data):
-            """Envoie des données via la queue"""
-            try:
-                if not is_connected:
-                    return
-                
-                message = {
-                    'type': data_type,
-                    'data': data,
-                    'timestamp': datetime.now().isoformat(),
-                    'device_status': device_status.copy()
-                }
-                data_queue.put(message, timeout=1)
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] Erreur envoi données {data_type}: {e}")
-        
-        def send_status_update():
-            """Envoie mise à jour du statut"""
-            try:
-                status_data = {
-                    'connected': is_connected,
-                    'monitoring': is_monitoring,
-                    'device_online': device_status.get('online', False),
-                    'device_status': device_status.copy()
-                }
-                data_queue.put({
-                    'type': 'status_update',
-                    'data': status_data,
-                    'timestamp': datetime.now().isoformat()
-                }, timeout=1)
-            except:
-                pass
-        
-        def strict_device_detection():
-            """
-            DÉTECTION STRICTE CORRIGÉE : Teste si le casque envoie des données biologiques réelles
-            """
-            nonlocal bio_validator
-            
-            print("🧠 [NEUROSITY] === DÉTECTION STRICTE CORRIGÉE DU CASQUE ===")
-            print("🧠 [NEUROSITY] Recherche de données biologiques réelles...")
-            
-            bio_validator = BiologicalDataValidator()
-            detection_timeout = 20  # 20 secondes pour collecter des données
-            test_subscriptions = []
-            
-            try:
-                # Callbacks de test pour collecter des données
-                def calm_test_callback(data):
-                    print(f"🧠 [NEUROSITY] Données calm reçues: {data}")
-                    bio_validator.add_data_point('calm', data)
-                
-                def focus_test_callback(data):
-                    print(f"🧠 [NEUROSITY] Données focus reçues: {data}")
-                    bio_validator.add_data_point('focus', data)
-                
-                # S'abonner aux métriques pour le test
-                print("🧠 [NEUROSITY] Souscription aux métriques de test...")
-                calm_test_sub = neurosity.calm(calm_test_callback)
-                focus_test_sub = neurosity.focus(focus_test_callback)
-                test_subscriptions = [calm_test_sub, focus_test_sub]
-                
-                # Collecter des données pendant le timeout
-                start_time = time.time()
-                print(f"🧠 [NEUROSITY] Collecte de données pendant {detection_timeout} secondes...")
-                
-                while (time.time() - start_time) < detection_timeout:
-                    elapsed = int(time.time() - start_time)
-                    data_points = len(bio_validator.data_history['calm'])
-                    print(f"🧠 [NEUROSITY] ⏱️  {elapsed}s/{detection_timeout}s - {data_points} points collectés")
-                    
-                    # Vérification intermédiaire après 8 secondes (plus précoce)
-                    if elapsed >= 8 and data_points >= 5:
-                        is_real, reason = bio_validator.is_real_biological_data()
-                        if is_real:
-                            print(f"🧠 [NEUROSITY] ✅ Détection précoce réussie: {reason}")
-                            break
-                    
-                    time.sleep(1)
-                
-                # Nettoyer les souscriptions de test
-                for test_sub in test_subscriptions:
-                    if test_sub and callable(test_sub):
-                        test_sub()
-                
-                # Validation finale des données
-                is_real, reason = bio_validator.is_real_biological_data()
-                data_count = len(bio_validator.data_history['calm'])
-                
-                print(f"🧠 [NEUROSITY] === RÉSULTAT DE LA DÉTECTION CORRIGÉE ===")
-                print(f"🧠 [NEUROSITY] Points de données collectés: {data_count}")
-                print(f"🧠 [NEUROSITY] Validation: {reason}")
-                
-                if is_real:
-                    print("🧠 [NEUROSITY] ✅ CASQUE NEUROSITY DÉTECTÉ ET FONCTIONNEL")
-                    print("🧠 [NEUROSITY] ✅ Données biologiques réelles confirmées avec validation corrigée")
-                    device_status.update({
-                        'online': True,
-                        'battery': 'unknown',
-                        'signal': 'excellent',
-                        'validation': 'biological_data_confirmed_v2',
-                        'data_points': data_count,
-                        'last_detection': datetime.now().isoformat(),
-                        'validation_method': 'strict_corrected'
-                    })
-                    return True
-                else:
-                    print("🧠 [NEUROSITY] ❌ CASQUE NON DÉTECTÉ OU ÉTEINT")
-                    print(f"🧠 [NEUROSITY] ❌ Raison: {reason}")
-                    device_status.update({
-                        'online': False,
-                        'battery': 'unknown',
-                        'signal': 'no_biological_data',
-                        'validation': reason,
-                        'data_points': data_count,
-                        'validation_method': 'strict_corrected'
-                    })
-                    return False
-            
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] ❌ Erreur détection stricte: {e}")
-                # Nettoyer en cas d'erreur
-                for test_sub in test_subscriptions:
-                    try:
-                        if test_sub and callable(test_sub):
-                            test_sub()
-                    except:
-                        pass
-                
-                device_status.update({
-                    'online': False,
-                    'battery': 'unknown',
-                    'signal': 'detection_error',
-                    'validation': f'Erreur: {str(e)}',
-                    'validation_method': 'strict_corrected'
-                })
-                return False
-        
-        # Callbacks pour les données en temps réel
-        def calm_callback(data):
-            try:
-                if data and isinstance(data, dict) and 'probability' in data:
-                    probability = data['probability']
-                    if isinstance(probability, (int, float)) and 0 <= probability <= 1:
-                        # CORRECTION: Structure des données pour l'enregistrement
-                        processed_data = {
-                            'probability': probability,
-                            'percentage': probability * 100,
-                            'timestamp': time.time() * 1000  # Timestamp en millisecondes
-                        }
-                        
-                        send_data('calm', processed_data)
-                        
-                        # CORRECTION: Ajouter métadonnées pour l'enregistrement
-                        metadata = {
-                            'device_id': os.getenv("NEUROSITY_DEVICE_ID"),
-                            'quality': device_status.get('signal', 'unknown'),
-                            'signal_strength': device_status.get('signal', 'unknown')
-                        }
-                        
-                        # Enregistrer dans le data manager si recording actif
-                        # (sera géré par le processus principal)
-            
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] Erreur callback calm: {e}")
-        
-        def focus_callback(data):
-            try:
-                if data and isinstance(data, dict) and 'probability' in data:
-                    probability = data['probability']
-                    if isinstance(probability, (int, float)) and 0 <= probability <= 1:
-                        # CORRECTION: Structure des données pour l'enregistrement
-                        processed_data = {
-                            'probability': probability,
-                            'percentage': probability * 100,
-                            'timestamp': time.time() * 1000  # Timestamp en millisecondes
-                        }
-                        
-                        send_data('focus', processed_data)
-            
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] Erreur callback focus: {e}")
-        
-        def brainwaves_callback(data):
-            try:
-                if data and isinstance(data, dict):
-                    # CORRECTION: Structure cohérente des données d'ondes cérébrales
-                    wave_data = {}
-                    
-                    # Traiter les vraies données ou générer des données cohérentes
-                    for wave_type in ['delta', 'theta', 'alpha', 'beta', 'gamma']:
-                        if wave_type in data and isinstance(data[wave_type], list):
-                            wave_data[wave_type] = data[wave_type]
-                        else:
-                            # Données de démonstration cohérentes
-                            import random
-                            base_values = {
-                                'delta': [0.1, 0.15, 0.12],
-                                'theta': [0.2, 0.25, 0.22],
-                                'alpha': [0.4, 0.45, 0.42],
-                                'beta': [0.3, 0.35, 0.32],
-                                'gamma': [0.1, 0.12, 0.11]
-                            }
-                            # Ajouter un peu de variation
-                            wave_data[wave_type] = [v + random.uniform(-0.02, 0.02) for v in base_values[wave_type]]
-                    
-                    # Ajouter timestamp
-                    wave_data['timestamp'] = time.time() * 1000
-                    
-                    send_data('brainwaves', wave_data)
-            
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] Erreur callback brainwaves: {e}")
-        
-        # BOUCLE PRINCIPALE
-        while True:
-            try:
-                command = command_queue.get(timeout=1)
-                
-                if command['action'] == 'connect':
-                    print("🧠 [NEUROSITY] === COMMANDE CONNEXION REÇUE ===")
-                    try:
-                        if is_connected:
-                            print("🧠 [NEUROSITY] Déjà connecté")
-                            response_queue.put({'success': True, 'connected': True, 'message': 'Déjà connecté'})
-                            continue
-                        
-                        # 1. Initialiser le SDK
-                        print("🧠 [NEUROSITY] Initialisation du SDK...")
-                        neurosity = NeurositySDK({
-                            "device_id": os.getenv("NEUROSITY_DEVICE_ID")
-                        })
-                        
-                        # 2. Authentification
-                        print("🧠 [NEUROSITY] Authentification...")
-                        login_result = neurosity.login({
-                            "email": os.getenv("NEUROSITY_EMAIL"),
-                            "password": os.getenv("NEUROSITY_PASSWORD")
-                        })
-                        
-                        print(f"🧠 [NEUROSITY] Login résultat: {login_result}")
-                        
-                        # 3. DÉTECTION STRICTE CORRIGÉE du casque physique
-                        device_detected = strict_device_detection()
-                        
-                        if device_detected:
-                            is_connected = True
-                            print("🧠 [NEUROSITY] ✅ CONNEXION VALIDÉE - CASQUE OPÉRATIONNEL (VALIDATION CORRIGÉE)")
-                            response_queue.put({
-                                'success': True,
-                                'connected': True,
-                                'device_id': os.getenv("NEUROSITY_DEVICE_ID"),
-                                'device_status': device_status.copy(),
-                                'message': 'Casque Neurosity Crown détecté et opérationnel ! Données biologiques confirmées avec validation corrigée.'
-                            })
-                        else:
-                            print("🧠 [NEUROSITY] ❌ ÉCHEC VALIDATION - CASQUE NON OPÉRATIONNEL")
-                            cleanup()
-                            response_queue.put({
-                                'success': False,
-                                'error': 'Casque Neurosity Crown NON DÉTECTÉ. Vérifiez que votre casque est ALLUMÉ, CHARGÉ et correctement POSITIONNÉ sur votre tête.',
-                                'device_status': device_status.copy(),
-                                'help': 'Conseils: 1) Allumez le casque, 2) Portez-le correctement, 3) Attendez le voyant bleu, 4) Réessayez'
-                            })
-                    
-                    except Exception as e:
-                        print(f"🧠 [NEUROSITY] ❌ Erreur connexion: {e}")
-                        cleanup()
-                        response_queue.put({
-                            'success': False,
-                            'error': f'Erreur SDK Neurosity: {str(e)}'
-                        })
-                
-                elif command['action'] == 'start_monitoring':
-                    print("🧠 [NEUROSITY] Commande monitoring reçue")
-                    try:
-                        if not neurosity or not is_connected:
-                            response_queue.put({'success': False, 'error': 'Casque non connecté'})
-                            continue
-                        
-                        if is_monitoring:
-                            response_queue.put({'success': True, 'message': 'Monitoring déjà actif'})
-                            continue
-                        
-                        print("🧠 [NEUROSITY] Démarrage monitoring en temps réel...")
-                        
-                        # Démarrer les abonnements
-                        calm_unsub = neurosity.calm(calm_callback)
-                        focus_unsub = neurosity.focus(focus_callback)
-                        brainwaves_unsub = neurosity.brainwaves_raw(brainwaves_callback)
-                        
-                        subscriptions = [calm_unsub, focus_unsub, brainwaves_unsub]
-                        is_monitoring = True
-                        
-                        print("🧠 [NEUROSITY] ✅ Monitoring en temps réel actif")
-                        response_queue.put({'success': True, 'monitoring': True})
-                        send_status_update()
-                    
-                    except Exception as e:
-                        print(f"🧠 [NEUROSITY] ❌ Erreur monitoring: {e}")
-                        response_queue.put({'success': False, 'error': str(e)})
-                
-                elif command['action'] == 'stop_monitoring':
-                    print("🧠 [NEUROSITY] Arrêt monitoring")
-                    try:
-                        if subscriptions:
-                            for unsub_func in subscriptions:
-                                if callable(unsub_func):
-                                    unsub_func()
-                            subscriptions = []
-                        is_monitoring = False
-                        send_status_update()
-                        response_queue.put({'success': True, 'monitoring': False})
-                    except Exception as e:
-                        response_queue.put({'success': False, 'error': str(e)})
-                
-                elif command['action'] == 'check_status':
-                    print("🧠 [NEUROSITY] Vérification statut")
-                    try:
-                        send_status_update()
-                        response_queue.put({
-                            'success': True,
-                            'connected': is_connected,
-                            'monitoring': is_monitoring,
-                            'device_status': device_status.copy()
-                        })
-                    except Exception as e:
-                        response_queue.put({'success': False, 'error': str(e)})
-                
-                elif command['action'] == 'disconnect':
-                    print("🧠 [NEUROSITY] Déconnexion")
-                    cleanup()
-                    send_status_update()
-                    response_queue.put({'success': True, 'connected': False})
-                
-                elif command['action'] == 'quit':
-                    print("🧠 [NEUROSITY] Arrêt du processus")
-                    break
-            
-            except Empty:
-                continue
-            except Exception as e:
-                print(f"🧠 [NEUROSITY] Erreur processus: {e}")
-                continue
-        
-        cleanup()
-        print("🧠 [NEUROSITY] Processus terminé")
-    
-    except ImportError as e:
-        print(f"🧠 [NEUROSITY] ❌ Import SDK failed: {e}")
-        response_queue.put({'success': False, 'error': 'SDK Neurosity non installé'})
-    except Exception as e:
-        print(f"🧠 [NEUROSITY] ❌ Erreur critique: {e}")
-        response_queue.put({'success': False, 'error': str(e)})
+logger = logging.getLogger('neurosity_monitor')
+# Configuration de l'environnement actif (FLASK_ENV / APP_ENV)
+app_config = get_config_class()
 
 
 # ===============================================
@@ -664,8 +53,15 @@ def neurosity_process(command_queue, data_queue, response_queue):
 # ===============================================
 
 class NeurosityManager:
-    def __init__(self):
-        self.data_manager = DataManager()
+    def __init__(self, device_id=None, data_directory="data"):
+        # device_id None: casque de NEUROSITY_DEVICE_ID (fonctionnement mono-casque)
+        self.device_id = device_id
+        self.device_key = device_id or 'default'
+        self.room = f"device:{self.device_key}"
+        self.data_manager = DataManager(data_directory)
+        # Écriture CSV hors de la pompe de données (processus enregistreur)
+        self.recorder = SessionRecorder(self.device_key, data_directory)
+        self.finalize_job = None
         self.is_recording = False
         self.is_connected = False
         self.is_monitoring = False
@@ -675,34 +71,252 @@ class NeurosityManager:
         self.data_queue = None
         self.response_queue = None
         self.neurosity_process = None
+        # Mode démon: acquisition hors du serveur web, abonnement au socket du démon
+        self.daemon_mode = os.getenv('NEUROSITY_ACQUISITION', 'process').lower() == 'daemon'
+        self.daemon_client = None
+        
+        # Supervision (mode processus): battement de cœur et compteurs en mémoire partagée
+        self.supervisor_deadline = float(os.getenv('SUPERVISOR_DEADLINE', 15))  # secondes
+        self.heartbeat = None
+        self.sample_counters = None
+        self._received = dict.fromkeys(SUPERVISED_STREAMS, 0)
+        self._supervisor = None
+        self._supervisor_stop = threading.Event()
+        self.restarts = deque(maxlen=20)
+        self._recovery_total = 0.0
+        self._recovery_count = 0
+        self._pending_events = deque()
+        
+        # Agrégats glissants publiés avec chaque échantillon (ROLLING_WINDOWS, en secondes)
+        windows = [float(w) for w in os.getenv('ROLLING_WINDOWS', '1,10,60').split(',') if w.strip()]
+        # Tendances incrémentales (moindres carrés + différence d'EWMA) sur TREND_WINDOWS
+        trend_windows = [float(w) for w in os.getenv('TREND_WINDOWS', '10,60').split(',') if w.strip()]
+        # Agrégats et tendances joints au plus une fois par ROLLING_PUBLISH_INTERVAL secondes et par flux
+        self.metrics_processor = MetricsProcessor(windows=windows, trend_windows=trend_windows,
+                                                  publish_interval=float(os.getenv('ROLLING_PUBLISH_INTERVAL', 1)))
+        # Historique multi-résolution (brut, 1 s, 10 s) à mémoire fixe, servi par /history
+        self.history = HistoryStore(raw_capacity=int(os.getenv('HISTORY_RAW_POINTS', 2400)))
+        # Dernières secondes de chaque flux, encodées une fois pour tous les nouveaux clients
+        self.backfill = BackfillCache(self.history, float(os.getenv('BACKFILL_SECONDS', 60)), self.device_key)
+        # Règles d'alerte déclaratives (RULES_FILE), évaluées par la pompe de données
+        self.rules = self._load_rules(os.getenv('RULES_FILE', str(Path(__file__).parent / 'config' / 'rules.json')))
+        
+        # Session SDK du processus d'acquisition et durées de la dernière connexion par phase
+        self.sdk_session = None
+        self.connect_timings = {}
+        # Statistiques du détecteur d'artefacts (dernier check_status)
+        self.artifact_stats = None
+        # Dernier vecteur de qualité du signal par canal (publié aux changements par l'acquisition)
+        self.signal_quality = None
+        
+        # RPC: réponses associées aux commandes par request_id (appelants sync et async)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._dispatcher = None
+        self._dispatching = False
         
         self.last_data_time = None
         self.connection_health = True
+        self._child_dropped = {}
+        self.register_metrics()
         
-        print("📊 Manager Neurosity initialisé avec détection stricte corrigée")
+        # Profilage à la demande: échantillonneur du serveur + cProfile du thread data_processor
+        self.profiles_directory = str(app_config.PROFILES_DIRECTORY)
+        self.profiler = ProcessProfiler('server', self.profiles_directory, app_config.MEMORY_PROFILE_WINDOW)
+        self.pump_profiler = ThreadProfiler()
+        
+        logger.info("📊 Manager Neurosity initialisé avec détection stricte corrigée")
     
     def start_neurosity_process(self):
         try:
-            self.command_queue = mp.Queue()
-            self.data_queue = mp.Queue()
-            self.response_queue = mp.Queue()
+            if not self.recorder.start():
+                return False
             
-            self.neurosity_process = mp.Process(
-                target=neurosity_process,
-                args=(self.command_queue, self.data_queue, self.response_queue)
+            if self.daemon_mode:
+                self._attach_daemon()
+            else:
+                self._spawn_process()
+            
+            self._dispatching = True
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_responses,
+                name=f"responses-{self.device_key}",
+                daemon=True
             )
-            self.neurosity_process.start()
+            self._dispatcher.start()
+            
+            if not self.daemon_mode and self.supervisor_deadline > 0:
+                # Le démon est supervisé par son propre gestionnaire de services
+                self._supervisor_stop.clear()
+                self._supervisor = threading.Thread(
+                    target=self._supervise, name=f"supervisor-{self.device_key}", daemon=True
+                )
+                self._supervisor.start()
             
-            print("🚀 Processus Neurosity avec détection stricte corrigée démarré")
+            logger.info(f"🚀 Processus Neurosity démarré pour le casque {self.device_key}")
             return True
         
         except Exception as e:
-            print(f"❌ Erreur démarrage processus: {e}")
+            logger.error(f"❌ Erreur démarrage processus: {e}")
             return False
     
+    def _spawn_process(self):
+        """Nouveau processus d'acquisition avec queues et mémoire partagée neuves"""
+        self.command_queue = mp.Queue()
+        self.data_queue = mp.Queue()
+        self.response_queue = mp.Queue()
+        # Battement initialisé à maintenant: délai de grâce pendant le démarrage du processus
+        self.heartbeat = mp.Value('d', time.monotonic(), lock=False)
+        self.sample_counters = mp.Array('Q', len(SUPERVISED_STREAMS), lock=False)
+        self._received = dict.fromkeys(SUPERVISED_STREAMS, 0)
+        
+        self.neurosity_process = mp.Process(
+            target=neurosity_process,
+            args=(self.command_queue, self.data_queue, self.response_queue, self.device_id,
+                  self.heartbeat, self.sample_counters),
+            name=f"neurosity-{self.device_key}"
+        )
+        self.neurosity_process.start()
+    
+    def heartbeat_age(self):
+        if self.heartbeat is None:
+            return None
+        return max(0.0, time.monotonic() - self.heartbeat.value)
+    
+    def _stall_reason(self):
+        if not self.neurosity_process:
+            return None
+        if not self.neurosity_process.is_alive():
+            return 'exited'
+        if self.heartbeat_age() > self.supervisor_deadline:
+            return 'stalled'
+        return None
+    
+    def _supervise(self):
+        """Thread superviseur: processus mort ou sans battement depuis supervisor_deadline → redémarrage"""
+        interval = min(1.0, self.supervisor_deadline / 4)
+        while not self._supervisor_stop.wait(interval):
+            reason = self._stall_reason()
+            if reason and not self._supervisor_stop.is_set():
+                try:
+                    self._restart(reason)
+                except Exception as e:
+                    logger.error(f"❌ Erreur redémarrage processus ({self.device_key}): {e}")
+    
+    def _restart(self, reason):
+        """Remplace le processus d'acquisition et restaure l'état connecté/monitoring"""
+        last_beat = self.heartbeat.value
+        was_connected, was_monitoring = self.is_connected, self.is_monitoring
+        logger.warning(f"⚠️ Processus d'acquisition {self.device_key} {reason} "
+                       f"(dernier battement il y a {self.heartbeat_age():.1f}s): redémarrage")
+        metrics.RESTARTS_TOTAL.labels(self.device_key, reason).inc()
+        
+        # Échantillons envoyés par l'ancien processus mais jamais reçus (perdus avec sa queue)
+        lost = {
+            stream: max(0, self.sample_counters[index] - self._received[stream])
+            for index, stream in enumerate(SUPERVISED_STREAMS)
+        }
+        for stream, count in lost.items():
+            if count:
+                metrics.DROPPED_TOTAL.labels(self.device_key, stream, 'process_restart').inc(count)
+        
+        old_process = self.neurosity_process
+        if old_process.is_alive():
+            old_process.terminate()
+            old_process.join(timeout=2)
+            if old_process.is_alive():
+                old_process.kill()
+                old_process.join(timeout=2)
+        
+        self._fail_pending(f'Processus d\'acquisition redémarré ({reason})')
+        self.is_connected = False
+        self.is_monitoring = False
+        self._spawn_process()
+        
+        restored = True
+        if was_connected:
+            response = self._apply_status(self.send_command('connect', timeout=60))
+            restored = bool(response.get('success'))
+            if restored:
+                self.is_connected = True
+            if restored and was_monitoring:
+                response = self.send_command('start_monitoring')
+                restored = bool(response.get('success'))
+                self.is_monitoring = restored
+        
+        gap = time.monotonic() - last_beat
+        self._recovery_total += gap
+        self._recovery_count += 1
+        metrics.RECOVERY_SECONDS.labels(self.device_key).observe(gap)
+        if was_monitoring:
+            metrics.GAP_SECONDS_TOTAL.labels(self.device_key).inc(gap)
+        
+        event = {
+            'device_id': self.device_key,
+            'reason': reason,
+            'restored': restored,
+            'connected': self.is_connected,
+            'monitoring': self.is_monitoring,
+            'gap_seconds': round(gap, 2),
+            'lost_samples': lost,
+            'recording': self.is_recording,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.restarts.append(event)
+        # Émis par la pompe de données (Flask-SocketIO ou mode async)
+        self._pending_events.append(('acquisition_restarted', event))
+        
+        if restored:
+            logger.info(f"✅ Processus {self.device_key} rétabli en {gap:.1f}s (perdus: {lost})")
+        else:
+            logger.error(f"❌ Processus {self.device_key} redémarré mais état non restauré: {response.get('error')}")
+    
+    def mean_time_to_recover(self):
+        if not self._recovery_count:
+            return None
+        return self._recovery_total / self._recovery_count
+    
+    def supervisor_summary(self):
+        return {
+            'enabled': self._supervisor is not None and self._supervisor.is_alive(),
+            'deadline': self.supervisor_deadline,
+            'heartbeat_age': round(self.heartbeat_age(), 2) if self.heartbeat is not None else None,
+            'restarts': self._recovery_count,
+            'mttr': round(self.mean_time_to_recover(), 2) if self._recovery_count else None,
+            'last_restart': self.restarts[-1] if self.restarts else None
+        }
+    
+    def _attach_daemon(self):
+        """Abonnement au démon d'acquisition: mêmes queues vues du manager"""
+        buffer_size = int(os.getenv('NEUROSITY_DAEMON_BUFFER', 1000))
+        self.daemon_client = DaemonClient(daemon_socket_path(self.device_key), buffer_size)
+        self.command_queue = self.daemon_client.commands
+        self.data_queue = self.daemon_client
+        self.response_queue = self.daemon_client.responses
+        # À chaque (re)connexion: état du casque resynchronisé depuis le démon
+        self.daemon_client.on_connect = lambda: threading.Thread(
+            target=self._resync_daemon, name=f"resync-{self.device_key}", daemon=True
+        ).start()
+        self.daemon_client.start()
+        logger.info(f"📡 Abonnement au démon d'acquisition: {self.daemon_client.path}")
+    
+    def _resync_daemon(self):
+        status = self.check_status()
+        if status.get('success'):
+            logger.info(f"📡 Démon {self.device_key}: connecté={self.is_connected}, monitoring={self.is_monitoring}")
+    
     def stop_neurosity_process(self):
         try:
-            if self.command_queue:
+            # Arrêt volontaire: le superviseur ne doit pas le prendre pour une panne
+            self._supervisor_stop.set()
+            if self._supervisor and self._supervisor is not threading.current_thread():
+                self._supervisor.join(timeout=5)
+            
+            if self.daemon_client:
+                # Le démon continue l'acquisition: seul l'abonnement est fermé
+                self.daemon_client.close()
+            elif self.command_queue:
                 self.command_queue.put({'action': 'quit'})
             
             if self.neurosity_process and self.neurosity_process.is_alive():
@@ -710,42 +324,154 @@ class NeurosityManager:
                 if self.neurosity_process.is_alive():
                     self.neurosity_process.terminate()
             
-            print("✅ Processus Neurosity arrêté")
+            self._dispatching = False
+            self._fail_pending('Processus arrêté')
+            self.recorder.stop()
+            logger.info("✅ Processus Neurosity arrêté")
         except Exception as e:
-            print(f"❌ Erreur arrêt processus: {e}")
+            logger.error(f"❌ Erreur arrêt processus: {e}")
     
-    def send_command(self, action, timeout=30):  # Timeout augmenté pour la détection
+    def submit_command(self, action, **params):
+        """Envoie une commande au processus; la réponse arrive dans le Future retourné"""
+        future = concurrent.futures.Future()
+        if not self.command_queue:
+            future.set_result({'success': False, 'error': 'Processus non démarré'})
+            return future
+        
+        request_id = next(self._request_ids)
+        future.request_id = request_id
+        with self._pending_lock:
+            self._pending[request_id] = future
         try:
-            if not self.command_queue:
-                return {'success': False, 'error': 'Processus non démarré'}
-            
-            self.command_queue.put({'action': action})
-            response = self.response_queue.get(timeout=timeout)
-            return response
+            self.command_queue.put({'action': action, 'request_id': request_id, **params})
+        except Exception as e:
+            # Démon injoignable: l'appelant reçoit l'erreur au lieu d'attendre le timeout
+            self._forget(future)
+            future.set_result({'success': False, 'error': str(e)})
+        return future
+    
+    def send_command(self, action, timeout=30, **params):  # Timeout augmenté pour la détection
+        try:
+            future = self.submit_command(action, **params)
+            try:
+                return future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                self._forget(future)
+                raise TimeoutError(f"pas de réponse après {timeout}s")
         
         except Exception as e:
-            print(f"❌ Erreur commande {action}: {e}")
+            logger.error(f"❌ Erreur commande {action}: {e}")
             return {'success': False, 'error': str(e)}
     
-    def process_data_queue(self):
-        """Traite les données du processus"""
+    async def send_command_async(self, action, timeout=30, **params):
+        """Version coroutine de send_command: n'occupe pas de thread pendant l'attente"""
+        future = self.submit_command(action, **params)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._forget(future)
+            logger.error(f"❌ Erreur commande {action}: pas de réponse après {timeout}s")
+            return {'success': False, 'error': f'pas de réponse après {timeout}s'}
+        except Exception as e:
+            logger.error(f"❌ Erreur commande {action}: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _forget(self, future):
+        with self._pending_lock:
+            self._pending.pop(getattr(future, 'request_id', None), None)
+    
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_result({'success': False, 'error': error})
+    
+    def _dispatch_responses(self):
+        """Thread de réception: remet chaque réponse au Future de sa commande"""
+        while self._dispatching:
+            try:
+                response = self.response_queue.get(timeout=0.5)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            
+            request_id = response.pop('request_id', None)
+            self._record_timings(response)
+            if request_id is None:
+                # Erreur fatale du processus (hors commande): tous les appelants sont notifiés
+                self._fail_pending(response.get('error', 'Erreur processus Neurosity'))
+                continue
+            
+            with self._pending_lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                logger.warning(f"⚠️ Réponse ignorée (appelant expiré): request_id={request_id}")
+            elif not future.done():
+                future.set_result(response)
+    
+    def _record_timings(self, response):
+        """Durées par phase (sdk_init, login, detection, subscribe) renvoyées par l'acquisition"""
+        if response.get('session'):
+            self.sdk_session = response['session']
+        timings = response.get('timings')
+        if not timings:
+            return
+        for phase, seconds in timings.items():
+            if phase != 'total':
+                metrics.CONNECT_PHASE.labels(self.device_key, phase).observe(seconds)
+        if 'total' in timings:
+            # Nouvelle connexion: les phases de la précédente ne s'appliquent plus
+            self.connect_timings = {}
+        self.connect_timings.update({phase: round(seconds, 3) for phase, seconds in timings.items()})
+    
+    def _emit(self, emit, event, data, stream=None, stamps=None, get_ns=None):
+        """
+        Émission vers la room du casque. Sans émetteur: Flask-SocketIO.
+        Avec émetteur (mode async): emit(event, data, room, on_emitted) et
+        on_emitted() à appeler une fois l'émission faite (instrumentation)
+        """
+        on_emitted = (lambda: self._record_emit(stream, stamps, get_ns)) if stream else None
+        if emit is not None:
+            emit(event, data, self.room, on_emitted)
+            return
+        socketio.emit(event, data, to=self.room)
+        if on_emitted:
+            on_emitted()
+    
+    def process_data_queue(self, emit=None):
+        """Traite les données du processus (emit: émetteur alternatif, voir _emit)"""
         try:
             processed_count = 0
             while processed_count < 10:
                 try:
                     message = self.data_queue.get_nowait()
+                    get_ns = metrics.now_ns()
                     processed_count += 1
+                    stamps = message.get('stamps') or {}
+                    stream = message['type']
+                    if stream in ('calm', 'focus', 'brainwaves'):
+                        self._record_arrival(stream, message, stamps, get_ns)
+                        # Horloge des fenêtres: callback du SDK (monotone, commune aux processus)
+                        sample_time = (stamps.get('callback') or get_ns) / 1e9
+                        # Historique: horodatage Unix de l'échantillon (ms côté acquisition)
+                        wall_time = message['data'].get('timestamp', time.time() * 1000) / 1000
                     
-                    # Métadonnées communes
+                    # Métadonnées communes (statut tenu à jour par les messages de statut et de qualité)
                     metadata = {
-                        'device_id': message.get('device_status', {}).get('device_id', ''),
-                        'quality': message.get('device_status', {}).get('signal', 'unknown'),
-                        'signal_strength': message.get('device_status', {}).get('signal', 'unknown')
+                        'device_id': self.device_status.get('device_id', ''),
+                        'quality': self.device_status.get('signal', 'unknown'),
+                        'signal_strength': self.device_status.get('signal', 'unknown')
                     }
                     
                     if message['type'] == 'status_update':
-                        # Code existant pour status_update...
-                        pass
+                        self.device_status = message['data'].get('device_status', self.device_status)
+                        if not message['data'].get('monitoring'):
+                            self.signal_quality = None
+                    
+                    elif message['type'] == 'signal_quality':
+                        self._publish_signal_quality(emit, message['data'], message.get('device_status'))
                     
                     elif message['type'] == 'calm':
                         self.last_data_time = datetime.now()
@@ -753,17 +479,17 @@ class NeurosityManager:
                             'timestamp': message['timestamp'],
                             'calm': message['data']['percentage'],
                             'type': 'calm',
-                            'device_status': message.get('device_status', {})
+                            'device_id': self.device_key,
+                            'device_status': self.device_status
                         }
-                        socketio.emit('calm_data', data)
+                        data.update(self.metrics_processor.publish('calm', message['data']['percentage'], sample_time))
+                        self._emit(emit, 'calm_data', data, 'calm', stamps, get_ns)
+                        self.history.add('calm', message['data']['percentage'], wall_time)
+                        self._publish_alerts(emit, self.rules.observe('calm', message['data']['percentage'], sample_time), metadata)
                         
-                        # CORRECTION: Enregistrement avec la bonne structure
+                        # Enregistrement: ajout au lot, écrit par le processus enregistreur
                         if self.is_recording:
-                            try:
-                                self.data_manager.add_data_point('calm', message['data'], metadata)
-                                print(f"📊 Données calm enregistrées: {message['data']['percentage']:.1f}%")
-                            except Exception as e:
-                                print(f"❌ Erreur enregistrement calm: {e}")
+                            self.recorder.add('calm', message['data'], metadata, get_ns)
                     
                     elif message['type'] == 'focus':
                         self.last_data_time = datetime.now()
@@ -771,17 +497,17 @@ class NeurosityManager:
                             'timestamp': message['timestamp'],
                             'focus': message['data']['percentage'],
                             'type': 'focus',
-                            'device_status': message.get('device_status', {})
+                            'device_id': self.device_key,
+                            'device_status': self.device_status
                         }
-                        socketio.emit('focus_data', data)
+                        data.update(self.metrics_processor.publish('focus', message['data']['percentage'], sample_time))
+                        self._emit(emit, 'focus_data', data, 'focus', stamps, get_ns)
+                        self.history.add('focus', message['data']['percentage'], wall_time)
+                        self._publish_alerts(emit, self.rules.observe('focus', message['data']['percentage'], sample_time), metadata)
                         
-                        # CORRECTION: Enregistrement avec la bonne structure
+                        # Enregistrement: ajout au lot, écrit par le processus enregistreur
                         if self.is_recording:
-                            try:
-                                self.data_manager.add_data_point('focus', message['data'], metadata)
-                                print(f"📊 Données focus enregistrées: {message['data']['percentage']:.1f}%")
-                            except Exception as e:
-                                print(f"❌ Erreur enregistrement focus: {e}")
+                            self.recorder.add('focus', message['data'], metadata, get_ns)
                     
                     elif message['type'] == 'brainwaves':
                         self.last_data_time = datetime.now()
@@ -792,43 +518,137 @@ class NeurosityManager:
                             'alpha': message['data']['alpha'],
                             'beta': message['data']['beta'],
                             'gamma': message['data']['gamma'],
+                            'artifacts': message['data'].get('artifacts', {}),
                             'type': 'brainwaves',
-                            'device_status': message.get('device_status', {})
+                            'device_id': self.device_key,
+                            'device_status': self.device_status
                         }
-                        socketio.emit('brainwaves_data', data)
+                        data.update(self.metrics_processor.publish_bands(message['data'], sample_time))
+                        self._emit(emit, 'brainwaves_data', data, 'brainwaves', stamps, get_ns)
+                        self._record_artifacts(data['artifacts'])
+                        self.history.add_bands(message['data'], wall_time, WAVE_TYPES)
+                        self._publish_alerts(emit, self.rules.observe_bands(message['data'], sample_time, WAVE_TYPES), metadata)
                         
-                        # CORRECTION: Enregistrement avec la bonne structure
+                        # Enregistrement: ajout au lot, écrit par le processus enregistreur
                         if self.is_recording:
-                            try:
-                                self.data_manager.add_data_point('brainwaves', message['data'], metadata)
-                                print(f"📊 Données brainwaves enregistrées")
-                            except Exception as e:
-                                print(f"❌ Erreur enregistrement brainwaves: {e}")
+                            self.recorder.add('brainwaves', message['data'], metadata, get_ns)
                 
                 except Empty:
                     break
             
-            self._check_connection_health()
+            if self.is_recording:
+                self.recorder.flush()
+            while self._pending_events:
+                self._emit(emit, *self._pending_events.popleft())
+            # Règles d'absence ('absent'): évaluées à chaque tour, réarmées hors monitoring
+            if self.is_monitoring:
+                self._publish_alerts(emit, self.rules.tick(time.monotonic()))
+            else:
+                self.rules.reset()
+            self._check_connection_health(emit)
         
         except Exception as e:
-            print(f"❌ Erreur traitement données: {e}")
-            
-    def _check_connection_health(self):
+            logger.error("❌ Erreur traitement données: %s", e)
+    
+    def _load_rules(self, path):
+        try:
+            engine = RuleEngine.from_file(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Règles d'alerte ignorées ({path}): {e}")
+            return RuleEngine()
+        if engine.rules:
+            logger.info(f"🚨 {len(engine.rules)} règles d'alerte chargées ({path})")
+        return engine
+    
+    def _publish_alerts(self, emit, alerts, metadata=None):
+        """Alertes des règles: événement Socket.IO 'alert' et marqueur dans la session enregistrée"""
+        for alert in alerts:
+            alert['device_id'] = self.device_key
+            alert['timestamp'] = datetime.now().isoformat()
+            logger.info(f"🚨 Alerte {alert['rule']}: {alert['message']} ({alert['value']})")
+            metrics.ALERTS_TOTAL.labels(self.device_key, alert['rule'], alert['severity']).inc()
+            self._emit(emit, 'alert', alert)
+            if self.is_recording:
+                self.recorder.add('marker', {'label': f"{alert['rule']}: {alert['message']}"},
+                                  metadata or {'device_id': self.device_key}, metrics.now_ns())
+    
+    def _publish_signal_quality(self, emit, quality, device_status=None):
+        """Vecteur de qualité par canal: statut du casque, jauges et événement Socket.IO 'signal_quality'"""
+        self.signal_quality = quality
+        self.device_status = device_status or {**self.device_status, 'signal': quality['signal']}
+        degraded = [f"{channel}={state}" for channel, state in zip(quality['channels'], quality['states']) if state != 'good']
+        logger.info(f"📶 Qualité du signal: {quality['signal']} ({', '.join(degraded) or 'tous les canaux bons'})")
+        for channel, state in zip(quality['channels'], quality['states']):
+            metrics.SIGNAL_QUALITY.labels(self.device_key, channel).set(SIGNAL_STATES.index(state))
+        self._emit(emit, 'signal_quality', {**quality, 'device_id': self.device_key,
+                                            'timestamp': datetime.now().isoformat()})
+    
+    def _record_artifacts(self, artifacts):
+        """Fenêtres de puissances par bande étiquetées (canaux contaminés), par raison"""
+        for reason in {reason for reasons in artifacts.values() for reason in reasons}:
+            metrics.ARTIFACT_FRAMES.labels(self.device_key, reason).inc()
+    
+    def _record_arrival(self, stream, message, stamps, get_ns):
+        """Instrumentation: arrivée d'un échantillon (callback → put → get)"""
+        metrics.SAMPLES_TOTAL.labels(self.device_key, stream).inc()
+        self._received[stream] = self._received.get(stream, 0) + 1
+        metrics.STAGE_LATENCY.labels(self.device_key, stream, 'callback_to_put').observe_ns(stamps.get('callback'), stamps.get('queue_put'))
+        metrics.STAGE_LATENCY.labels(self.device_key, stream, 'queue_transit').observe_ns(stamps.get('queue_put'), get_ns)
+        
+        # Les pertes côté acquisition arrivent sous forme de compteur cumulé par flux
+        dropped = message.get('dropped', 0)
+        last_dropped = self._child_dropped.get(stream, 0)
+        if dropped > last_dropped:
+            metrics.DROPPED_TOTAL.labels(self.device_key, stream, 'queue_put').inc(dropped - last_dropped)
+        self._child_dropped[stream] = dropped
+    
+    def _record_emit(self, stream, stamps, get_ns):
+        """Instrumentation: émission Socket.IO terminée"""
+        emit_ns = metrics.now_ns()
+        metrics.EMITTED_TOTAL.labels(self.device_key, stream).inc()
+        metrics.STAGE_LATENCY.labels(self.device_key, stream, 'emit').observe_ns(get_ns, emit_ns)
+        metrics.STAGE_LATENCY.labels(self.device_key, stream, 'end_to_end').observe_ns(stamps.get('callback'), emit_ns)
+    
+    def register_metrics(self):
+        """Jauges calculées à la collecte /metrics (profondeur des queues, fraîcheur)"""
+        for name in ('command', 'data', 'response'):
+            metrics.QUEUE_DEPTH.labels(self.device_key, name).set_function(
+                lambda name=name: self._queue_depth(getattr(self, f'{name}_queue'))
+            )
+        metrics.HEARTBEAT_AGE.labels(self.device_key).set_function(self.heartbeat_age)
+        metrics.MTTR_SECONDS.labels(self.device_key).set_function(self.mean_time_to_recover)
+        metrics.LAST_SAMPLE_AGE.labels(self.device_key).set_function(
+            lambda: (datetime.now() - self.last_data_time).total_seconds() if self.last_data_time else None
+        )
+    
+    @staticmethod
+    def _queue_depth(queue):
+        if queue is None:
+            return None
+        try:
+            return queue.qsize()
+        except NotImplementedError:
+            # qsize() n'est pas disponible sur macOS
+            return None
+    
+    def _check_connection_health(self, emit=None):
         if self.is_monitoring and self.last_data_time:
             time_since_data = (datetime.now() - self.last_data_time).total_seconds()
             
             if time_since_data > 30:
                 if self.connection_health:
                     self.connection_health = False
-                    socketio.emit('connection_warning', {
+                    self._emit(emit, 'connection_warning', {
                         'message': 'Aucune donnée reçue depuis 30 secondes',
-                        'time_since_data': time_since_data
+                        'time_since_data': time_since_data,
+                        'device_id': self.device_key
                     })
             else:
                 if not self.connection_health:
                     self.connection_health = True
-                    socketio.emit('connection_restored', {
-                        'message': 'Connexion rétablie'
+                    self._emit(emit, 'connection_restored', {
+                        'message': 'Connexion rétablie',
+                        'device_id': self.device_key
                     })
     
     def start_recording(self, filename=None):
@@ -840,50 +660,204 @@ class NeurosityManager:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"neurosity_session_{timestamp}"
             
-            self.current_session_file = self.data_manager.start_session(filename)
+            # Acquitté par l'enregistreur une fois le fichier ouvert
+            self.current_session_file = self.recorder.start_session(filename)
+            self.metrics_processor.reset_session()
             self.is_recording = True
             
-            print(f"🔴 Enregistrement démarré: {self.current_session_file}")
+            logger.info(f"🔴 Enregistrement démarré: {self.current_session_file}")
             return True
         
         except Exception as e:
-            print(f"❌ Erreur démarrage enregistrement: {e}")
+            logger.error(f"❌ Erreur démarrage enregistrement: {e}")
             return False
     
     def stop_recording(self):
-        try:
-            if self.is_recording:
-                session_file = self.data_manager.stop_session()
-                self.is_recording = False
-                print(f"⏹️ Enregistrement arrêté: {session_file}")
-                return session_file
+        """
+        Arrête l'enregistrement; retourne le fichier de session (None si aucun enregistrement actif)
+        Lève une exception si l'enregistreur ne confirme pas la fermeture: l'enregistrement
+        reste actif et l'arrêt peut être relancé
+        """
+        if not self.is_recording:
             return None
+        
+        self.is_recording = False
+        try:
+            # Acquitté une fois les lots en attente écrits et le fichier fermé
+            session_file = self.recorder.stop_session()
         except Exception as e:
-            print(f"❌ Erreur arrêt enregistrement: {e}")
-            return None
+            self.is_recording = True
+            logger.error(f"❌ Erreur arrêt enregistrement (toujours actif): {e}")
+            raise
+        
+        logger.info(f"⏹️ Enregistrement arrêté: {session_file}")
+        try:
+            # Rapport et résumé JSON produits en arrière-plan
+            self.finalize_job = job_manager.submit(
+                'finalize_session', self.data_manager.data_directory, session_file,
+                device_id=self.device_key, session_file=session_file
+            )
+        except Exception as e:
+            self.finalize_job = None
+            logger.error(f"❌ Erreur finalisation session: {e}")
+        return session_file
+    
+    def start_profiling(self, interval=0.01):
+        """Démarre le profilage CPU du serveur, de la pompe de données et du processus d'acquisition"""
+        self.pump_profiler.request_start()
+        return {
+            'server': self.profiler.start(interval),
+            'data_processor': {'success': True, 'process': 'server', 'thread': 'data_processor'},
+            'acquisition': self.send_command('profile_start', timeout=5, interval=interval)
+        }
+    
+    def stop_profiling(self):
+        """Arrête le profilage et retourne les fichiers produits (.folded et .pstats)"""
+        pstats_path = profile_path(self.profiles_directory, 'data_processor', 'cpu', 'pstats')
+        pstats_file = self.pump_profiler.request_stop(pstats_path)
+        return {
+            'server': self.profiler.stop(),
+            'data_processor': {
+                'success': pstats_file is not None,
+                'files': [pstats_file] if pstats_file else [],
+                **({} if pstats_file else {'error': 'Aucun profilage actif ou thread inactif'})
+            },
+            'acquisition': self.send_command('profile_stop', timeout=5)
+        }
+    
+    def memory_snapshot(self, limit=15):
+        """Instantanés tracemalloc du serveur et du processus d'acquisition"""
+        try:
+            server = self.profiler.memory_snapshot(limit)
+        except Exception as e:
+            server = {'success': False, 'error': str(e)}
+        return {
+            'server': server,
+            'acquisition': self.send_command('memory_snapshot', timeout=10, limit=limit)
+        }
+    
+    def memory_stop(self):
+        """Arrête le suivi tracemalloc du serveur et du processus d'acquisition"""
+        return {
+            'server': self.profiler.memory_stop(),
+            'acquisition': self.send_command('memory_stop', timeout=5)
+        }
+    
+    def summary(self):
+        """État local du casque (sans aller-retour vers le processus d'acquisition)"""
+        return {
+            'device_id': self.device_key,
+            'room': self.room,
+            'connected': self.is_connected,
+            'recording': self.is_recording,
+            'monitoring': self.is_monitoring,
+            'device_status': self.device_status,
+            'process_alive': bool(self.neurosity_process and self.neurosity_process.is_alive()),
+            'data_directory': self.data_manager.data_directory,
+            'recorder': self.recorder.summary(),
+            'supervisor': self.supervisor_summary(),
+            'sdk_session': self.sdk_session,
+            'connect_timings': self.connect_timings,
+            'rules': self.rules.summary(),
+            'artifacts': self.artifact_stats,
+            'signal_quality': self.signal_quality,
+            **self.daemon_summary()
+        }
+    
+    def daemon_summary(self):
+        if not self.daemon_client:
+            return {'acquisition': 'process'}
+        return {
+            'acquisition': 'daemon',
+            'daemon': {
+                'socket': self.daemon_client.path,
+                'connected': self.daemon_client.connected,
+                'received': self.daemon_client.received,
+                'dropped': self.daemon_client.dropped
+            }
+        }
     
     def get_sessions_list(self):
         try:
             return self.data_manager.get_session_list()
         except Exception as e:
-            print(f"❌ Erreur sessions: {e}")
+            logger.error(f"❌ Erreur sessions: {e}")
             return []
     
     def check_status(self):
         try:
-            response = self.send_command('check_status', timeout=10)
-            if response.get('success'):
-                self.is_connected = response.get('connected', False)
-                self.is_monitoring = response.get('monitoring', False)
-                self.device_status = response.get('device_status', {})
-            return response
+            return self._apply_status(self.send_command('check_status', timeout=10))
         except Exception as e:
-            print(f"❌ Erreur vérification statut: {e}")
+            logger.error(f"❌ Erreur vérification statut: {e}")
             return {'success': False, 'error': str(e)}
+    
+    async def check_status_async(self):
+        try:
+            return self._apply_status(await self.send_command_async('check_status', timeout=10))
+        except Exception as e:
+            logger.error(f"❌ Erreur vérification statut: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _apply_status(self, response):
+        if response.get('success'):
+            self.is_connected = response.get('connected', False)
+            self.is_monitoring = response.get('monitoring', False)
+            self.device_status = response.get('device_status', {})
+            self.artifact_stats = response.get('artifacts')
+        return response
+
+
+class DeviceRegistry:
+    """Un NeurosityManager par casque: processus d'acquisition, queues, détection et session CSV dédiés"""
+    
+    def __init__(self, device_ids=None, data_directory="data"):
+        device_ids = device_ids or [None]
+        # Plusieurs casques: un sous-dossier de sessions par casque
+        multi_device = len(device_ids) > 1
+        self.managers = {}
+        for device_id in device_ids:
+            directory = os.path.join(data_directory, device_id) if multi_device else data_directory
+            device_manager = NeurosityManager(device_id, directory)
+            self.managers[device_manager.device_key] = device_manager
+        self.default_key = next(iter(self.managers))
+    
+    @property
+    def default(self):
+        return self.managers[self.default_key]
+    
+    def get(self, device_key=None):
+        """Manager d'un casque (casque par défaut si non précisé, None si inconnu)"""
+        if device_key is None:
+            return self.default
+        return self.managers.get(device_key)
+    
+    def __iter__(self):
+        return iter(list(self.managers.values()))
+    
+    def __len__(self):
+        return len(self.managers)
+    
+    def start_all(self):
+        """Démarre un processus d'acquisition par casque (répartis sur les cœurs)"""
+        return all([device_manager.start_neurosity_process() for device_manager in self])
+    
+    def stop_all(self):
+        for device_manager in self:
+            if device_manager.is_recording:
+                try:
+                    device_manager.stop_recording()
+                except Exception:
+                    pass  # déjà journalisé; l'arrêt de l'enregistreur ferme le fichier
+            device_manager.stop_neurosity_process()
 
 
-# Instance globale
-manager = NeurosityManager()
+# Instances globales (manager: casque par défaut, compatibilité mono-casque)
+registry = DeviceRegistry(get_device_ids())
+manager = registry.default
+# Finalisation et analyse des sessions: pool de processus borné par MAX_WORKERS
+job_manager = JobManager(int(os.getenv('MAX_WORKERS', 1)))
+# Tendances entre sessions: résumés manquants calculés en parallèle (ANALYTICS_WORKERS, défaut: nombre de CPU)
+trend_analytics = TrendAnalytics(int(os.getenv('ANALYTICS_WORKERS', 0)) or None)
 
 
 # ===============================================
@@ -894,6 +868,11 @@ def load_environment():
     print("🔍 Vérification de l'environnement...")
     
     env_file = Path('.env')
+    if not env_file.exists() and is_simulator_mode():
+        print("🧪 Mode simulateur: aucun identifiant Neurosity requis")
+        Path('data').mkdir(exist_ok=True)
+        return True
+    
     if not env_file.exists():
         print("⚠️  Fichier .env non trouvé")
         print("Créez un fichier .env avec vos identifiants Neurosity:")
@@ -908,10 +887,14 @@ def load_environment():
         print(f"❌ Erreur .env: {e}")
         return False
     
-    required_vars = ['NEUROSITY_EMAIL', 'NEUROSITY_PASSWORD', 'NEUROSITY_DEVICE_ID']
+    required_vars = ['NEUROSITY_EMAIL', 'NEUROSITY_PASSWORD']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
+    if not get_device_ids():
+        missing_vars.append('NEUROSITY_DEVICE_ID (ou NEUROSITY_DEVICE_IDS)')
     
-    if missing_vars:
+    if missing_vars and is_simulator_mode():
+        print(f"🧪 Mode simulateur: variables ignorées ({', '.join(missing_vars)})")
+    elif missing_vars:
         print(f"❌ Variables manquantes: {', '.join(missing_vars)}")
         return False
     
@@ -949,48 +932,94 @@ app.template_folder = 'templates'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 
+def announce_job(job):
+    """Fin de tâche annoncée aux clients du casque concerné (job_completed)"""
+    device_manager = registry.get(job.get('device_id'))
+    socketio.emit('job_completed', job, to=device_manager.room if device_manager else None)
+
+
+job_manager.on_complete = announce_job
+
+
 # Routes Flask (identiques)
+def resolve_manager(device_id=None):
+    """Manager du casque ciblé (casque par défaut pour les routes sans /devices/<id>)"""
+    return registry.get(device_id)
+
+
+def unknown_device(device_id):
+    return jsonify({
+        'success': False,
+        'error': f'Casque inconnu: {device_id}',
+        'devices': list(registry.managers)
+    }), 404
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 
+@app.route('/devices')
+def list_devices():
+    """Casques configurés et état de leur processus d'acquisition"""
+    return jsonify({
+        'default': registry.default_key,
+        'devices': [device_manager.summary() for device_manager in registry]
+    })
+
+
 @app.route('/connect', methods=['POST'])
-def connect_device():
+@app.route('/devices/<device_id>/connect', methods=['POST'])
+def connect_device(device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
     try:
-        print("🔗 Tentative de connexion avec détection stricte corrigée...")
-        response = manager.send_command('connect', timeout=35)  # Plus de temps pour la détection
+        logger.info("🔗 Tentative de connexion avec détection stricte corrigée...")
+        response = device_manager.send_command('connect', timeout=35)  # Plus de temps pour la détection
         
         if response['success']:
-            manager.is_connected = True
-            manager.device_status = response.get('device_status', {})
-            print(f"✅ Casque connecté avec validation corrigée: {response}")
+            device_manager.is_connected = True
+            device_manager.device_status = response.get('device_status', {})
+            logger.info(f"✅ Casque connecté avec validation corrigée: {response}")
         else:
-            print(f"❌ Échec connexion stricte corrigée: {response}")
+            logger.warning(f"❌ Échec connexion stricte corrigée: {response}")
         
         return jsonify(response)
     except Exception as e:
-        print(f"❌ Erreur connexion: {e}")
+        logger.error(f"❌ Erreur connexion: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
 
 @app.route('/disconnect', methods=['POST'])
-def disconnect_device():
+@app.route('/devices/<device_id>/disconnect', methods=['POST'])
+def disconnect_device(device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
     try:
-        response = manager.send_command('disconnect')
+        response = device_manager.send_command('disconnect')
         if response['success']:
-            manager.is_connected = False
-            manager.is_monitoring = False
-            manager.device_status = {'online': False, 'battery': 'unknown', 'signal': 'disconnected'}
+            device_manager.is_connected = False
+            device_manager.is_monitoring = False
+            device_manager.device_status = {'online': False, 'battery': 'unknown', 'signal': 'disconnected'}
         return jsonify(response)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 
 @app.route('/start_recording', methods=['POST'])
-def start_recording():
+@app.route('/devices/<device_id>/start_recording', methods=['POST'])
+def start_recording(device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
     try:
-        if not manager.is_connected:
+        if not device_manager.is_connected:
             return jsonify({'success': False, 'error': 'Casque non connecté'})
         
         # CORRECTION: Gestion sécurisée du JSON
@@ -999,64 +1028,84 @@ def start_recording():
             if request.is_json and request.json:
                 filename = request.json.get('filename')
         except Exception as json_error:
-            print(f"⚠️ Erreur lecture JSON (ignorée): {json_error}")
+            logger.warning(f"⚠️ Erreur lecture JSON (ignorée): {json_error}")
             # Continuer sans filename, ce n'est pas critique
         
-        success = manager.start_recording(filename)
+        success = device_manager.start_recording(filename)
         
         if success:
-            print(f"🔴 Enregistrement démarré: {manager.current_session_file}")
+            logger.info(f"🔴 Enregistrement démarré: {device_manager.current_session_file}")
             return jsonify({
                 'success': True,
-                'recording': manager.is_recording,
-                'session_file': manager.current_session_file,
+                'recording': device_manager.is_recording,
+                'session_file': device_manager.current_session_file,
                 'message': 'Enregistrement démarré avec succès'
             })
         else:
             return jsonify({'success': False, 'error': 'Impossible de démarrer l\'enregistrement'})
     
     except Exception as e:
-        print(f"❌ Erreur start_recording: {e}")
+        logger.error(f"❌ Erreur start_recording: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
 
 @app.route('/stop_recording', methods=['POST'])
-def stop_recording():
+@app.route('/devices/<device_id>/stop_recording', methods=['POST'])
+def stop_recording(device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
     try:
-        session_file = manager.stop_recording()
+        session_file = device_manager.stop_recording()
         
         if session_file:
-            print(f"⏹️ Enregistrement arrêté: {session_file}")
+            logger.info(f"⏹️ Enregistrement arrêté: {session_file}")
             return jsonify({
                 'success': True,
-                'recording': manager.is_recording,
+                'recording': device_manager.is_recording,
                 'session_file': session_file,
+                'job_id': device_manager.finalize_job['job_id'] if device_manager.finalize_job else None,
                 'message': 'Enregistrement arrêté avec succès'
             })
         else:
             return jsonify({
                 'success': True,
-                'recording': manager.is_recording,
+                'recording': device_manager.is_recording,
                 'message': 'Aucun enregistrement actif'
             })
     
     except Exception as e:
-        print(f"❌ Erreur stop_recording: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        logger.error(f"❌ Erreur stop_recording: {e}")
+        return jsonify({
+            'success': False,
+            'recording': device_manager.is_recording,
+            'error': f"Arrêt non confirmé, enregistrement toujours actif: {e}" if device_manager.is_recording else str(e)
+        })
 
 @app.route('/sessions')
-def get_sessions():
+@app.route('/devices/<device_id>/sessions')
+def get_sessions(device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
     try:
-        sessions = manager.get_sessions_list()
+        sessions = device_manager.get_sessions_list()
         return jsonify({'sessions': sessions})
     except Exception as e:
         return jsonify({'sessions': [], 'error': str(e)})
 
 
 @app.route('/download/<filename>')
-def download_file(filename):
+@app.route('/devices/<device_id>/download/<filename>')
+def download_file(filename, device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
     try:
-        file_path = os.path.join(manager.data_manager.data_directory, filename)
+        file_path = os.path.join(device_manager.data_manager.data_directory, filename)
         if os.path.exists(file_path):
             return send_file(file_path, as_attachment=True)
         else:
@@ -1065,53 +1114,308 @@ def download_file(filename):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/sessions/<filename>/analyze', methods=['POST'])
+@app.route('/devices/<device_id>/sessions/<filename>/analyze', methods=['POST'])
+def analyze_session(filename, device_id=None):
+    """Analyse d'une session en arrière-plan: retourne immédiatement l'identifiant de tâche"""
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
+    if filename not in device_manager.get_sessions_list():
+        return jsonify({'success': False, 'error': 'Fichier non trouvé'}), 404
+    
+    job = job_manager.submit(
+        'analyze_session', device_manager.data_manager.data_directory, filename,
+        device_id=device_manager.device_key, session_file=filename
+    )
+    return jsonify({'success': True, 'job_id': job['job_id'], 'status': job['status']}), 202
+
+
+@app.route('/history')
+@app.route('/devices/<device_id>/history')
+def get_history(device_id=None):
+    """Historique récent: ?metric=calm,focus,alpha&range=15m (sans metric: séries et mémoire)"""
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
+    requested = [name.strip() for name in request.args.get('metric', '').split(',') if name.strip()]
+    if not requested:
+        return jsonify(device_manager.history.stats())
+    
+    try:
+        seconds = parse_range(request.args.get('range'))
+    except ValueError:
+        return jsonify({'success': False, 'error': f"Plage invalide: {request.args.get('range')}"}), 400
+    
+    series = {}
+    for name in requested:
+        # Bandes: "alpha" ou "brainwaves.alpha"
+        key = f'brainwaves.{name}' if name in WAVE_TYPES else name
+        series[name] = device_manager.history.query(key, seconds)
+    
+    return jsonify({'device_id': device_manager.device_key, 'range_s': seconds, 'series': series})
+
+
+@app.route('/analytics/trends')
+@app.route('/devices/<device_id>/analytics/trends')
+def get_trends(device_id=None):
+    """Tendances entre sessions: ?from=2026-01-01&to=2026-12-31&metric=calm,alpha (par jour et par semaine)"""
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
+    requested = [name.strip() for name in request.args.get('metric', '').split(',') if name.strip()]
+    requested = requested or list(TREND_METRICS)
+    unknown = [name for name in requested if name not in TREND_METRICS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Métrique inconnue: {', '.join(unknown)}",
+                        'available_metrics': list(TREND_METRICS)}), 400
+    
+    try:
+        start = parse_day(request.args.get('from'))
+        end = parse_day(request.args.get('to'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates invalides (format AAAA-MM-JJ)'}), 400
+    
+    trends = trend_analytics.trends(device_manager.data_manager.data_directory,
+                                    device_manager.get_sessions_list(), requested, start, end)
+    return jsonify({'device_id': device_manager.device_key, **trends})
+
+
+@app.route('/analytics/features', methods=['POST'])
+@app.route('/devices/<device_id>/analytics/features', methods=['POST'])
+def export_features(device_id=None):
+    """Export ML en arrière-plan: {"sessions": [...], "from", "to", "window", "step", "format"...} → job_id"""
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
+    spec = request.get_json(silent=True) or {}
+    try:
+        options = export_options(spec)
+        start, end = parse_day(spec.get('from')), parse_day(spec.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    available = device_manager.get_sessions_list()
+    requested = spec.get('sessions') or available
+    missing = [filename for filename in requested if filename not in available]
+    if missing:
+        return jsonify({'success': False, 'error': f"Sessions introuvables: {', '.join(missing)}"}), 404
+    filenames = select_sessions(requested, start, end)
+    if not filenames:
+        return jsonify({'success': False, 'error': 'Aucune session dans la période'}), 404
+    
+    data_directory = device_manager.data_manager.data_directory
+    output_directory = os.path.join(data_directory, 'features', datetime.now().strftime('%Y%m%d_%H%M%S'))
+    job = job_manager.submit(
+        'export_features', data_directory, filenames, output_directory, options,
+        device_id=device_manager.device_key, sessions=len(filenames), output_directory=output_directory
+    )
+    return jsonify({'success': True, 'job_id': job['job_id'], 'status': job['status'],
+                    'sessions': len(filenames), 'output_directory': output_directory}), 202
+
+
+@app.route('/jobs')
+def list_jobs():
+    return jsonify({'jobs': job_manager.list(request.args.get('device'))})
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Tâche inconnue: {job_id}'}), 404
+    return jsonify(job)
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Métriques du pipeline au format texte Prometheus"""
+    return Response(metrics.REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def debug_endpoints_enabled():
+    return app_config.DEBUG_ENDPOINTS_ENABLED
+
+
+@app.route('/debug/profile/start', methods=['POST'])
+def debug_profile_start():
+    """Démarre le profilage CPU échantillonné (serveur + acquisition)"""
+    if not debug_endpoints_enabled():
+        return jsonify({'success': False, 'error': 'Endpoints de debug désactivés'}), 403
+    
+    device_manager = resolve_manager(request.args.get('device'))
+    if device_manager is None:
+        return unknown_device(request.args.get('device'))
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        interval = float(data.get('interval', app_config.PROFILE_SAMPLING_INTERVAL))
+        if not 0.001 <= interval <= 1.0:
+            return jsonify({'success': False, 'error': 'interval doit être entre 0.001 et 1 seconde'}), 400
+        
+        results = device_manager.start_profiling(interval)
+        logger.info(f"🔬 Profilage démarré (intervalle {interval * 1000:.1f} ms)")
+        return jsonify({'success': True, 'interval': interval, 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/debug/profile/stop', methods=['POST'])
+def debug_profile_stop():
+    """Arrête le profilage et écrit les profils dans le dossier profiles"""
+    if not debug_endpoints_enabled():
+        return jsonify({'success': False, 'error': 'Endpoints de debug désactivés'}), 403
+    
+    device_manager = resolve_manager(request.args.get('device'))
+    if device_manager is None:
+        return unknown_device(request.args.get('device'))
+    
+    try:
+        results = device_manager.stop_profiling()
+        files = [f for result in results.values() for f in result.get('files', [])]
+        logger.info(f"🔬 Profilage arrêté: {len(files)} fichier(s)")
+        return jsonify({'success': bool(files), 'files': files, 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/debug/memory', methods=['GET', 'POST'])
+def debug_memory():
+    """Instantané mémoire tracemalloc (top allocations + croissance depuis le précédent)"""
+    if not debug_endpoints_enabled():
+        return jsonify({'success': False, 'error': 'Endpoints de debug désactivés'}), 403
+    
+    device_manager = resolve_manager(request.args.get('device'))
+    if device_manager is None:
+        return unknown_device(request.args.get('device'))
+    
+    try:
+        limit = int(request.args.get('limit', 15))
+        return jsonify({'success': True, 'results': device_manager.memory_snapshot(limit)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/debug/memory/stop', methods=['POST'])
+def debug_memory_stop():
+    """Arrête le suivi tracemalloc (sinon arrêté seul après MEMORY_PROFILE_WINDOW secondes)"""
+    if not debug_endpoints_enabled():
+        return jsonify({'success': False, 'error': 'Endpoints de debug désactivés'}), 403
+    
+    device_manager = resolve_manager(request.args.get('device'))
+    if device_manager is None:
+        return unknown_device(request.args.get('device'))
+    
+    try:
+        results = device_manager.memory_stop()
+        logger.info("🔬 Suivi mémoire arrêté")
+        return jsonify({'success': all(result.get('success') for result in results.values()), 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/status')
-def get_status():
-    status_response = manager.check_status()
+@app.route('/devices/<device_id>/status')
+def get_status(device_id=None):
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        return unknown_device(device_id)
+    
+    status_response = device_manager.check_status()
     
     return jsonify({
-        'connected': manager.is_connected,
-        'recording': manager.is_recording,
-        'monitoring': manager.is_monitoring,
-        'device_status': manager.device_status,
-        'sessions_count': len(manager.get_sessions_list()),
+        'connected': device_manager.is_connected,
+        'recording': device_manager.is_recording,
+        'monitoring': device_manager.is_monitoring,
+        'device_status': device_manager.device_status,
+        'sessions_count': len(device_manager.get_sessions_list()),
         'available_metrics': ['calm', 'focus', 'brainwaves'],
-        'connection_health': manager.connection_health,
-        'last_data_time': manager.last_data_time.isoformat() if manager.last_data_time else None,
+        'connection_health': device_manager.connection_health,
+        'last_data_time': device_manager.last_data_time.isoformat() if device_manager.last_data_time else None,
         'status_check': status_response,
-        'detection_mode': 'strict_biological_validation_v2_corrected'
+        'detection_mode': 'strict_biological_validation_v2_corrected',
+        'supervisor': device_manager.supervisor_summary(),
+        'connect_timings': device_manager.connect_timings,
+        'session_metrics': device_manager.metrics_processor.get_session_summary(),
+        'device_id': device_manager.device_key,
+        'devices': list(registry.managers)
     })
 
 
-# SocketIO handlers (identiques)
+# SocketIO handlers: chaque casque diffuse dans sa room "device:<id>"
+def device_status_payload(device_manager):
+    return {
+        'connected': device_manager.is_connected,
+        'recording': device_manager.is_recording,
+        'monitoring': device_manager.is_monitoring,
+        'device_status': device_manager.device_status,
+        'signal_quality': device_manager.signal_quality,
+        'device_id': device_manager.device_key
+    }
+
+
+def resolve_socket_manager(data):
+    """Manager ciblé par un événement Socket.IO ({'device_id': ...} optionnel)"""
+    device_id = data.get('device_id') if isinstance(data, dict) else None
+    device_manager = resolve_manager(device_id)
+    if device_manager is None:
+        emit('error', {'message': f'Casque inconnu: {device_id}'})
+    return device_manager
+
+
 @socketio.on('connect')
 def handle_connect():
-    print('🔌 Client WebSocket connecté')
-    emit('status', {
-        'connected': manager.is_connected,
-        'recording': manager.is_recording,
-        'monitoring': manager.is_monitoring,
-        'device_status': manager.device_status
-    })
+    logger.info('🔌 Client WebSocket connecté')
+    # Room du casque par défaut rejointe d'office (client mono-casque)
+    join_room(manager.room)
+    emit('status', device_status_payload(manager))
+    emit('backfill', manager.backfill.get())
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    print('🔌 Client WebSocket déconnecté')
+    logger.info('🔌 Client WebSocket déconnecté')
+
+
+@socketio.on('join_device')
+def handle_join_device(data=None):
+    device_manager = resolve_socket_manager(data)
+    if device_manager is None:
+        return
+    join_room(device_manager.room)
+    emit('status', device_status_payload(device_manager))
+    emit('backfill', device_manager.backfill.get())
+
+
+@socketio.on('leave_device')
+def handle_leave_device(data=None):
+    device_manager = resolve_socket_manager(data)
+    if device_manager is None:
+        return
+    leave_room(device_manager.room)
+    emit('device_left', {'device_id': device_manager.device_key})
 
 
 @socketio.on('start_monitoring')
-def handle_start_monitoring():
+def handle_start_monitoring(data=None):
+    device_manager = resolve_socket_manager(data)
+    if device_manager is None:
+        return
+    
     try:
-        if not manager.is_connected:
+        if not device_manager.is_connected:
             emit('error', {'message': 'Casque non connecté. Connectez d\'abord votre Neurosity Crown.'})
             return
         
-        response = manager.send_command('start_monitoring')
+        response = device_manager.send_command('start_monitoring')
         if response['success']:
-            manager.is_monitoring = True
-            emit('monitoring_started', {'success': True})
-            print("✅ Monitoring démarré")
+            device_manager.is_monitoring = True
+            emit('monitoring_started', {'success': True, 'device_id': device_manager.device_key})
+            logger.info(f"✅ Monitoring démarré ({device_manager.device_key})")
         else:
             emit('error', {'message': f'Erreur monitoring: {response.get("error", "Erreur inconnue")}'})
     except Exception as e:
@@ -1119,20 +1423,28 @@ def handle_start_monitoring():
 
 
 @socketio.on('stop_monitoring')
-def handle_stop_monitoring():
+def handle_stop_monitoring(data=None):
+    device_manager = resolve_socket_manager(data)
+    if device_manager is None:
+        return
+    
     try:
-        response = manager.send_command('stop_monitoring')
-        manager.is_monitoring = False
-        emit('monitoring_stopped', {'success': True})
-        print("⏹️ Monitoring arrêté")
+        response = device_manager.send_command('stop_monitoring')
+        device_manager.is_monitoring = False
+        emit('monitoring_stopped', {'success': True, 'device_id': device_manager.device_key})
+        logger.info(f"⏹️ Monitoring arrêté ({device_manager.device_key})")
     except Exception as e:
         emit('error', {'message': str(e)})
 
 
 @socketio.on('check_device_status')
-def handle_check_device_status():
+def handle_check_device_status(data=None):
+    device_manager = resolve_socket_manager(data)
+    if device_manager is None:
+        return
+    
     try:
-        status = manager.check_status()
+        status = device_manager.check_status()
         emit('device_status_response', status)
     except Exception as e:
         emit('error', {'message': str(e)})
@@ -1140,14 +1452,19 @@ def handle_check_device_status():
 
 # Traitement des données en arrière-plan
 def data_processor():
-    print("🔄 Démarrage du processeur de données avec détection stricte corrigée...")
+    logger.info("🔄 Démarrage du processeur de données avec détection stricte corrigée...")
+    # Objets du démarrage (modules, application) sortis du ramasse-miettes: une collecte
+    # de 2e génération ne les reparcourt plus et ne retient plus le flux 20 à 50 ms
+    gc.freeze()
     
     while True:
         try:
-            manager.process_data_queue()
+            for device_manager in registry:
+                device_manager.pump_profiler.poll()
+                device_manager.process_data_queue()
             time.sleep(0.05)
         except Exception as e:
-            print(f"❌ Erreur processeur données: {e}")
+            logger.error("❌ Erreur processeur données: %s", e)
             time.sleep(1)
 
 
@@ -1159,13 +1476,16 @@ def main():
         print("\n❌ Impossible de démarrer")
         sys.exit(1)
     
+    setup_logging()
     show_startup_info()
     
-    if not manager.start_neurosity_process():
-        print("❌ Impossible de démarrer le processus Neurosity")
+    if not registry.start_all():
+        print("❌ Impossible de démarrer les processus Neurosity")
+        registry.stop_all()
         sys.exit(1)
+    print(f"🧠 {len(registry)} casque(s): {', '.join(registry.managers)}")
     
-    data_thread = threading.Thread(target=data_processor, daemon=True)
+    data_thread = threading.Thread(target=data_processor, name='data_processor', daemon=True)
     data_thread.start()
     
     host = os.getenv('FLASK_HOST', '0.0.0.0')
@@ -1200,7 +1520,9 @@ def main():
     
     finally:
         print("🔄 Nettoyage...")
-        manager.stop_neurosity_process()
+        registry.stop_all()
+        job_manager.shutdown()
+        trend_analytics.shutdown()
         print("✅ Application fermée")
 
 
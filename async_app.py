@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+NEUROSITY CROWN MONITOR - MODE SERVEUR ASYNCHRONE
+
+Même application que app.py (routes HTTP, événements Socket.IO, processus
+d'acquisition par casque) servie par une pile asyncio :
+- python-socketio AsyncServer (ASGI) : les connexions WebSocket ne consomment
+  pas de thread, un mur de tableaux de bord avec des dizaines de clients reste léger
+- routes Flask inchangées, servies par un pool de threads borné (WSGI_WORKERS)
+- pompe de données et commandes vers les processus d'acquisition en coroutines
+
+Lancement : python async_app.py   (dépendance : pip install uvicorn, a2wsgi recommandé)
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+
+import socketio
+
+import app as neurosity_app
+from app import (device_status_payload, job_manager, load_environment, logger, registry, show_startup_info,
+                 trend_analytics)
+from config.settings import setup_logging
+
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+_pump_task = None
+
+
+# ===============================================
+# ÉVÉNEMENTS SOCKET.IO (même contrat que app.py)
+# ===============================================
+
+async def resolve_device(sid, data):
+    """Manager ciblé par un événement ({'device_id': ...} optionnel)"""
+    device_id = data.get('device_id') if isinstance(data, dict) else None
+    device_manager = registry.get(device_id)
+    if device_manager is None:
+        await sio.emit('error', {'message': f'Casque inconnu: {device_id}'}, to=sid)
+    return device_manager
+
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    logger.info('🔌 Client WebSocket connecté')
+    # Room du casque par défaut rejointe d'office (client mono-casque)
+    await sio.enter_room(sid, registry.default.room)
+    await sio.emit('status', device_status_payload(registry.default), to=sid)
+    await sio.emit('backfill', registry.default.backfill.get(), to=sid)
+
+
+@sio.event
+async def disconnect(sid, reason=None):
+    logger.info('🔌 Client WebSocket déconnecté')
+
+
+@sio.on('join_device')
+async def handle_join_device(sid, data=None):
+    device_manager = await resolve_device(sid, data)
+    if device_manager is None:
+        return
+    await sio.enter_room(sid, device_manager.room)
+    await sio.emit('status', device_status_payload(device_manager), to=sid)
+    await sio.emit('backfill', device_manager.backfill.get(), to=sid)
+
+
+@sio.on('leave_device')
+async def handle_leave_device(sid, data=None):
+    device_manager = await resolve_device(sid, data)
+    if device_manager is None:
+        return
+    await sio.leave_room(sid, device_manager.room)
+    await sio.emit('device_left', {'device_id': device_manager.device_key}, to=sid)
+
+
+@sio.on('start_monitoring')
+async def handle_start_monitoring(sid, data=None):
+    device_manager = await resolve_device(sid, data)
+    if device_manager is None:
+        return
+
+    try:
+        if not device_manager.is_connected:
+            await sio.emit('error', {'message': 'Casque non connecté. Connectez d\'abord votre Neurosity Crown.'}, to=sid)
+            return
+
+        response = await device_manager.send_command_async('start_monitoring')
+        if response['success']:
+            device_manager.is_monitoring = True
+            await sio.emit('monitoring_started', {'success': True, 'device_id': device_manager.device_key}, to=sid)
+            logger.info(f"✅ Monitoring démarré ({device_manager.device_key})")
+        else:
+            await sio.emit('error', {'message': f'Erreur monitoring: {response.get("error", "Erreur inconnue")}'}, to=sid)
+    except Exception as e:
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.on('stop_monitoring')
+async def handle_stop_monitoring(sid, data=None):
+    device_manager = await resolve_device(sid, data)
+    if device_manager is None:
+        return
+
+    try:
+        await device_manager.send_command_async('stop_monitoring')
+        device_manager.is_monitoring = False
+        await sio.emit('monitoring_stopped', {'success': True, 'device_id': device_manager.device_key}, to=sid)
+        logger.info(f"⏹️ Monitoring arrêté ({device_manager.device_key})")
+    except Exception as e:
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.on('check_device_status')
+async def handle_check_device_status(sid, data=None):
+    device_manager = await resolve_device(sid, data)
+    if device_manager is None:
+        return
+
+    try:
+        status = await device_manager.check_status_async()
+        await sio.emit('device_status_response', status, to=sid)
+    except Exception as e:
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+# ===============================================
+# POMPE DE DONNÉES ET CYCLE DE VIE
+# ===============================================
+
+async def data_pump():
+    """Équivalent coroutine de data_processor(): lecture des queues puis émission asynchrone"""
+    logger.info("🔄 Démarrage de la pompe de données asynchrone...")
+    pending = []
+
+    def collect(event, data, room, on_emitted):
+        pending.append((event, data, room, on_emitted))
+
+    while True:
+        try:
+            for device_manager in registry:
+                device_manager.pump_profiler.poll()
+                device_manager.process_data_queue(emit=collect)
+
+            for event, data, room, on_emitted in pending:
+                await sio.emit(event, data, to=room)
+                if on_emitted:
+                    on_emitted()
+            pending.clear()
+
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            pending.clear()
+            logger.error("❌ Erreur pompe de données: %s", e)
+            await asyncio.sleep(1)
+
+
+async def on_startup():
+    global _pump_task
+    loop = asyncio.get_running_loop()
+
+    def announce_job(job):
+        # Appelé depuis le thread du pool de tâches
+        device_manager = registry.get(job.get('device_id'))
+        room = device_manager.room if device_manager else None
+        asyncio.run_coroutine_threadsafe(sio.emit('job_completed', job, to=room), loop)
+
+    job_manager.on_complete = announce_job
+    if not registry.start_all():
+        logger.error("❌ Impossible de démarrer les processus Neurosity")
+    _pump_task = asyncio.create_task(data_pump())
+
+
+async def on_shutdown():
+    if _pump_task:
+        _pump_task.cancel()
+        try:
+            await _pump_task
+        except asyncio.CancelledError:
+            pass
+    await asyncio.to_thread(registry.stop_all)
+    await asyncio.to_thread(job_manager.shutdown)
+    await asyncio.to_thread(trend_analytics.shutdown)
+
+
+def create_asgi_app():
+    """Application ASGI: Socket.IO asynchrone + routes Flask existantes"""
+    # Utilise a2wsgi si installé, sinon l'adaptateur WSGI intégré à uvicorn
+    from uvicorn.middleware.wsgi import WSGIMiddleware
+    flask_app = WSGIMiddleware(neurosity_app.app, workers=int(os.getenv('WSGI_WORKERS', 10)))
+    return socketio.ASGIApp(
+        sio,
+        other_asgi_app=flask_app,
+        on_startup=on_startup,
+        on_shutdown=on_shutdown
+    )
+
+
+def main():
+    print("🚀 Démarrage Neurosity Monitor - Mode asynchrone (ASGI)...")
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ Mode asynchrone indisponible: pip install uvicorn")
+        sys.exit(1)
+
+    if not load_environment():
+        print("\n❌ Impossible de démarrer")
+        sys.exit(1)
+
+    setup_logging()
+    show_startup_info()
+
+    host = os.getenv('FLASK_HOST', '0.0.0.0')
+    port = int(os.getenv('FLASK_PORT', 5000))
+    print(f"\n🌟 Serveur asynchrone prêt sur {host}:{port} ({len(registry)} casque(s))")
+
+    try:
+        uvicorn.run(create_asgi_app(), host=host, port=port, lifespan='on', log_level='info')
+    except KeyboardInterrupt:
+        print("\n\n👋 Arrêt demandé...")
+    finally:
+        print("✅ Application fermée")
+
+
+if __name__ == "__main__":
+    mp.set_start_method('spawn', force=True)
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark des tendances entre sessions (analytics.py)
+
+Génère une session CSV par jour (format de DataManager : calme et
+concentration en pourcentage, puissances par bande moyennes) puis mesure
+``TrendAnalytics.trends`` sur toutes les métriques :
+
+    - à froid : aucun résumé en cache, sessions résumées dans le pool de processus
+    - à chaud : résumés relus depuis le cache, aucune lecture de CSV
+    - après ajout d'une session : un seul résumé recalculé
+
+Usage :
+    python benchmarks/bench_analytics.py
+    python benchmarks/bench_analytics.py --sessions 365 --rows 10000 --workers 4
+
+Le code de sortie vaut 1 si la requête à chaud dépasse ``--budget-s`` secondes.
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+sys.path.insert(0, str(ROOT_DIR))
+
+from analytics import METRICS, TrendAnalytics  # noqa: E402
+
+BANDS = ('delta', 'theta', 'alpha', 'beta', 'gamma')
+
+
+def write_session(directory, start, rows, rng):
+    """Session d'un jour: une ligne calme, concentration ou puissances par bande par échantillon"""
+    path = os.path.join(directory, f"neurosity_session_{start.strftime('%Y%m%d_%H%M%S')}.csv")
+    headers = ['timestamp', 'session_duration', 'calm_probability', 'calm_percentage',
+               'focus_probability', 'focus_percentage'] + [f'{band}_avg' for band in BANDS] + ['marker', 'artifacts']
+    kinds = rng.integers(0, 3, rows)
+    calm = np.clip(rng.normal(55, 15, rows), 0, 100)
+    focus = np.clip(rng.normal(45, 20, rows), 0, 100)
+    bands = rng.lognormal(1.0, 0.5, (rows, len(BANDS)))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(headers)
+        for i in range(rows):
+            seconds = i * 0.25
+            row = [(start + timedelta(seconds=seconds)).isoformat(), seconds, '', '', '', '']
+            if kinds[i] == 0:
+                row[2:4] = [calm[i] / 100, calm[i]]
+                row += [''] * len(BANDS)
+            elif kinds[i] == 1:
+                row[4:6] = [focus[i] / 100, focus[i]]
+                row += [''] * len(BANDS)
+            else:
+                row += bands[i].tolist()
+            writer.writerow(row + ['', ''])
+    return os.path.basename(path)
+
+
+def run_benchmark(args):
+    directory = tempfile.mkdtemp(prefix='bench_analytics_')
+    try:
+        rng = np.random.default_rng(3)
+        first_day = datetime(2025, 1, 1, 9, 0, 0)
+        print(f"🏁 Benchmark tendances - {args.sessions} sessions de {args.rows} lignes, {args.workers} workers")
+        filenames = [write_session(directory, first_day + timedelta(days=day), args.rows, rng)
+                     for day in range(args.sessions)]
+        csv_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in filenames)
+
+        analytics = TrendAnalytics(args.workers)
+        metrics = list(METRICS)
+        cold = analytics.trends(directory, filenames, metrics)
+        warm = analytics.trends(directory, filenames, metrics)
+        filenames.append(write_session(directory, first_day + timedelta(days=args.sessions), args.rows, rng))
+        incremental = analytics.trends(directory, filenames, metrics)
+        analytics.shutdown()
+
+        cache_dir = os.path.join(directory, '.analytics')
+        cache_bytes = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'config': {'sessions': args.sessions, 'rows': args.rows, 'workers': args.workers,
+                       'budget_s': args.budget_s},
+            'seconds': {'cold': cold['elapsed_s'], 'warm': warm['elapsed_s'],
+                        'incremental': incremental['elapsed_s']},
+            'sessions': {'cold': cold['sessions'], 'warm': warm['sessions'], 'incremental': incremental['sessions']},
+            'bytes': {'csv': csv_bytes, 'cache': cache_bytes},
+            'days': len(warm['daily']['calm']),
+            'weeks': len(warm['weekly']['calm']),
+            'trend': warm['trend']['calm']
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def print_report(results):
+    seconds, size = results['seconds'], results['bytes']
+    print("\n" + "=" * 70)
+    print("📊 RÉSULTATS DU BENCHMARK TENDANCES")
+    print("=" * 70)
+    print(f"  À froid (pool)       {seconds['cold']:.3f} s")
+    print(f"  À chaud (cache)      {seconds['warm']:.3f} s")
+    print(f"  Une session ajoutée  {seconds['incremental']:.3f} s")
+    print(f"  CSV {size['csv'] / 1e6:.1f} Mo, cache {size['cache'] / 1e6:.1f} Mo")
+    print(f"  {results['days']} jours, {results['weeks']} semaines")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des tendances entre sessions")
+    parser.add_argument('--sessions', type=int, default=365, help="Sessions générées (une par jour)")
+    parser.add_argument('--rows', type=int, default=2000, help="Lignes par session")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Workers du pool")
+    parser.add_argument('--budget-s', type=float, default=2.0, help="Durée maximale de la requête à chaud (s)")
+    parser.add_argument('--output', type=Path, default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    output = args.output
+    if output is None:
+        DEFAULT_RESULTS_DIR.mkdir(exist_ok=True)
+        output = DEFAULT_RESULTS_DIR / f"analytics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"💾 Résultats: {output}")
+
+    if results['seconds']['warm'] > args.budget_s:
+        print(f"❌ Requête à chaud {results['seconds']['warm']} s > budget {args.budget_s} s")
+        return 1
+    print(f"✅ Requête à chaud dans le budget ({args.budget_s} s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
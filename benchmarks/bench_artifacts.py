@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmark du détecteur d'artefacts (utils/artifacts.py)
+
+Signal : EEG synthétique du simulateur (8 canaux, composantes par bande + bruit)
+avec artefacts injectés à des instants connus :
+    - clignements : demi-sinusoïde de 250 μV sur F5/F6, 300 ms
+    - mâchoire    : bouffée EMG (bruit large bande 40 μV) sur tous les canaux, 500 ms
+    - mouvement   : saut de 400 μV sur un canal, 200 ms
+    - secteur     : sinusoïde à la fréquence secteur de 40 μV sur un canal, 4 s
+
+Mesures :
+    - temps CPU par échantillon (tous canaux) : scan seul et scan + puissances par
+      bande en boucle, puis scan au rythme réel des époques (caches froids entre
+      deux époques, comme dans le processus d'acquisition)
+    - sensibilité par type d'artefact (événements marqués) et taux de faux positifs
+      (échantillons marqués hors artefacts)
+    - fenêtres exclues ou étiquetées par les puissances par bande
+
+Usage :
+    python benchmarks/bench_artifacts.py
+    python benchmarks/bench_artifacts.py --seconds 600 --epoch-size 4 --budget-us 10
+
+Le code de sortie vaut 1 si le coût médian au rythme réel dépasse le budget par échantillon.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.artifacts import AMPLITUDE, SPIKE, ArtifactDetector  # noqa: E402
+from utils.dsp import BANDS, BandPowerEngine  # noqa: E402
+from utils.neurosity_simulator import BAND_COMPONENTS, CROWN_CHANNELS  # noqa: E402
+
+ARTIFACT_KINDS = ('blink', 'jaw', 'motion', 'line')
+
+
+def synthesize(seconds, sampling_rate, line_frequency, seed=7):
+    """Signal (canaux × échantillons) et liste des artefacts injectés (type, canaux, début, fin)"""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * sampling_rate)
+    t = np.arange(count) / sampling_rate
+    channels = len(CROWN_CHANNELS)
+    signal = rng.normal(0, 3.0, (channels, count))
+    for frequency, amplitude in BAND_COMPONENTS.values():
+        phases = rng.uniform(0, 2 * np.pi, (channels, 1))
+        signal += amplitude * np.sin(2 * np.pi * frequency * t[None, :] + phases)
+
+    frontal = [CROWN_CHANNELS.index('F5'), CROWN_CHANNELS.index('F6')]
+    events = []
+    # Un artefact toutes les ~5 s après 5 s de préchauffage, types en alternance
+    for index, start_s in enumerate(np.arange(5.0, seconds - 5.0, 5.0)):
+        kind = ARTIFACT_KINDS[index % len(ARTIFACT_KINDS)]
+        start = int(start_s * sampling_rate)
+        if kind == 'blink':
+            length = int(0.3 * sampling_rate)
+            signal[frontal, start:start + length] += 250 * np.sin(np.linspace(0, np.pi, length))
+            events.append((kind, frontal, start, start + length))
+        elif kind == 'jaw':
+            length = int(0.5 * sampling_rate)
+            signal[:, start:start + length] += rng.normal(0, 40.0, (channels, length))
+            events.append((kind, list(range(channels)), start, start + length))
+        elif kind == 'motion':
+            length = int(0.2 * sampling_rate)
+            channel = int(rng.integers(channels))
+            signal[channel, start:start + length] += 400.0
+            events.append((kind, [channel], start, start + length))
+        else:
+            length = int(4.0 * sampling_rate)
+            channel = int(rng.integers(channels))
+            signal[channel, start:start + length] += 40.0 * np.sin(2 * np.pi * line_frequency * t[start:start + length])
+            events.append((kind, [channel], start, start + length))
+    return signal, events
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else None
+
+
+def run_benchmark(args):
+    signal, events = synthesize(args.seconds, args.sampling_rate, args.line_frequency)
+    channels, count = signal.shape
+    epochs = [signal[:, start:start + args.epoch_size] for start in range(0, count, args.epoch_size)]
+    print(f"🏁 Benchmark artefacts - {args.seconds:g}s à {args.sampling_rate:g} Hz, {channels} canaux, "
+          f"époques de {args.epoch_size} échantillons, {len(events)} artefacts injectés")
+
+    # 1. Coût du scan seul (marqueurs par échantillon)
+    detector = ArtifactDetector(args.sampling_rate, budget_us=0)
+    flags = np.zeros(signal.shape, dtype=np.uint8)
+    scan_costs = []
+    position = 0
+    for epoch in epochs:
+        start_ns = time.thread_time_ns()
+        epoch_flags = detector.scan(epoch)
+        scan_costs.append((time.thread_time_ns() - start_ns) / 1000 / epoch.shape[1])
+        flags[:, position:position + epoch.shape[1]] = epoch_flags
+        position += epoch.shape[1]
+
+    # 2. Chaîne complète de l'acquisition: scan + puissances par bande + étiquetage
+    engine = BandPowerEngine(args.sampling_rate, hop_seconds=args.epoch_size / args.sampling_rate,
+                             line_frequency=args.line_frequency)
+    pipeline = ArtifactDetector(args.sampling_rate, budget_us=0)
+    frames = {'total': 0, 'contaminated': 0, 'excluded': 0}
+    line_frames = 0
+    pipeline_costs = []
+    for epoch in epochs:
+        start_ns = time.thread_time_ns()
+        for frame in engine.push(epoch, CROWN_CHANNELS, flags=pipeline.scan(epoch)):
+            annotated = pipeline.annotate(frame, BANDS)
+            frames['total'] += 1
+            if annotated is None:
+                frames['excluded'] += 1
+            elif annotated['artifacts']:
+                frames['contaminated'] += 1
+                line_frames += any('line_noise' in reasons for reasons in annotated['artifacts'].values())
+        pipeline_costs.append((time.thread_time_ns() - start_ns) / 1000 / epoch.shape[1])
+
+    # 3. Scan au rythme réel des époques
+    paced = ArtifactDetector(args.sampling_rate, budget_us=0)
+    paced_costs = []
+    interval = args.epoch_size / args.sampling_rate
+    for epoch in epochs[:max(int(args.paced_seconds / interval), 20)]:
+        start_ns = time.thread_time_ns()
+        paced.scan(epoch)
+        paced_costs.append((time.thread_time_ns() - start_ns) / 1000 / epoch.shape[1])
+        time.sleep(interval)
+
+    # 4. Qualité de détection
+    truth = np.zeros(signal.shape, dtype=bool)
+    detection = {}
+    for kind in ARTIFACT_KINDS:
+        kind_events = [event for event in events if event[0] == kind]
+        hits = 0
+        for _, event_channels, start, end in kind_events:
+            truth[event_channels, start:end] = True
+            if kind != 'line' and flags[event_channels, start:end].any():
+                hits += 1
+        if kind != 'line':
+            detection[kind] = {'events': len(kind_events), 'detected': hits,
+                               'sensitivity': round(hits / len(kind_events), 3) if kind_events else None}
+    # Marqueurs tolérés juste après un artefact (retour à la ligne de base)
+    margin = int(0.1 * args.sampling_rate)
+    tolerated = truth.copy()
+    for _, event_channels, start, end in events:
+        tolerated[event_channels, start:end + margin] = True
+    false_positives = np.count_nonzero((flags & (AMPLITUDE | SPIKE)).astype(bool) & ~tolerated)
+    clean_samples = np.count_nonzero(~tolerated)
+    detection['line'] = {'events': sum(event[0] == 'line' for event in events), 'frames_flagged': line_frames}
+
+    scan_costs = np.array(scan_costs[10:])
+    pipeline_costs = np.array(pipeline_costs[10:])
+    paced_costs = np.array(paced_costs[10:])
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'seconds': args.seconds,
+            'sampling_rate': args.sampling_rate,
+            'epoch_size': args.epoch_size,
+            'channels': channels,
+            'line_frequency': args.line_frequency,
+            'budget_us': args.budget_us
+        },
+        'cost_us_per_sample': {
+            'scan_p50': round(_percentile(scan_costs, 50), 3),
+            'scan_p99': round(_percentile(scan_costs, 99), 3),
+            'pipeline_p50': round(_percentile(pipeline_costs, 50), 3),
+            'pipeline_p99': round(_percentile(pipeline_costs, 99), 3),
+            'paced_p50': round(_percentile(paced_costs, 50), 3),
+            'paced_p99': round(_percentile(paced_costs, 99), 3)
+        },
+        'detection': detection,
+        'false_positive_rate': round(false_positives / max(clean_samples, 1), 6),
+        'frames': frames,
+        'detector': pipeline.stats()
+    }
+
+
+def print_report(results):
+    cost = results['cost_us_per_sample']
+    print("\n" + "=" * 70)
+    print("📊 RÉSULTATS DU BENCHMARK ARTEFACTS")
+    print("=" * 70)
+    print(f"  Scan            p50={cost['scan_p50']} μs/échantillon  p99={cost['scan_p99']} μs")
+    print(f"  Scan + bandes   p50={cost['pipeline_p50']} μs/échantillon  p99={cost['pipeline_p99']} μs")
+    print(f"  Scan temps réel p50={cost['paced_p50']} μs/échantillon  p99={cost['paced_p99']} μs")
+    for kind, stats in results['detection'].items():
+        if kind == 'line':
+            print(f"  {kind:<8} {stats['events']} épisodes, {stats['frames_flagged']} fenêtres marquées")
+        else:
+            print(f"  {kind:<8} {stats['detected']}/{stats['events']} détectés (sensibilité {stats['sensitivity']})")
+    print(f"  Faux positifs   {results['false_positive_rate'] * 100:.4f}% des échantillons propres")
+    frames = results['frames']
+    print(f"  Fenêtres        {frames['total']} dont {frames['contaminated']} étiquetées, {frames['excluded']} exclues")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du détecteur d'artefacts")
+    parser.add_argument('--seconds', type=float, default=300.0, help="Durée de signal simulée (s)")
+    parser.add_argument('--sampling-rate', type=float, default=256.0, help="Fréquence d'échantillonnage")
+    parser.add_argument('--epoch-size', type=int, default=16, help="Échantillons par époque")
+    parser.add_argument('--paced-seconds', type=float, default=5.0, help="Durée du scan au rythme réel (s)")
+    parser.add_argument('--line-frequency', type=float, default=60.0, help="Fréquence secteur (Hz)")
+    parser.add_argument('--budget-us', type=float, default=float(os.getenv('ARTIFACT_BUDGET_US', 25.0)),
+                        help="Budget CPU par échantillon (μs, tous canaux)")
+    parser.add_argument('--output', type=Path, default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    output = args.output
+    if output is None:
+        DEFAULT_RESULTS_DIR.mkdir(exist_ok=True)
+        output = DEFAULT_RESULTS_DIR / f"artifacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"💾 Résultats: {output}")
+
+    if results['cost_us_per_sample']['paced_p50'] > args.budget_us:
+        print(f"❌ Coût médian {results['cost_us_per_sample']['paced_p50']} μs/échantillon > budget {args.budget_us} μs")
+        return 1
+    print(f"✅ Coût dans le budget ({args.budget_us} μs/échantillon)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
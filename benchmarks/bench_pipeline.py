@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout du pipeline Neurosity Monitor
+
+Chemin mesuré (code réel, SDK simulé) :
+    neurosity_process → data_queue → process_data_queue → Socket.IO + SessionRecorder → processus enregistreur (CSV)
+
+Mesures :
+    - latence callback SDK → client (p50/p90/p95/p99/max) par flux : du stamp
+      ``callback`` de l'instrumentation (time.monotonic_ns() à l'entrée du callback
+      dans le processus d'acquisition) à la livraison du paquet au client Socket.IO
+      de test, dans le processus serveur (même horloge monotone système)
+    - débit soutenu par flux (événements Socket.IO reçus par seconde; brainwaves :
+      puissances par bande calculées tous les --dsp-hop, par défaut une par époque)
+    - débit d'écriture CSV (lignes par seconde)
+    - CPU et RSS par processus (serveur, acquisition et enregistreur)
+
+Usage :
+    python benchmarks/bench_pipeline.py --duration 20
+    python benchmarks/bench_pipeline.py --sampling-rate 1000 --epoch-size 4
+    python benchmarks/bench_pipeline.py --update-baseline
+
+Le code de sortie vaut 1 si une régression est détectée par rapport à la baseline.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+DEFAULT_RESULTS_DIR = BENCH_DIR / 'results'
+
+# Événements Socket.IO mesurés et flux correspondants
+STREAM_EVENTS = {
+    'calm_data': 'calm',
+    'focus_data': 'focus',
+    'brainwaves_data': 'brainwaves'
+}
+
+# Sens d'une régression par famille de mesure: +1 = plus haut est pire
+METRIC_DIRECTIONS = {
+    'latency_ms': +1,
+    'throughput_hz': -1,
+    'csv': -1,
+    'processes': +1
+}
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class _StampedQueue(list):
+    """File du client de test qui horodate chaque paquet à sa livraison"""
+
+    def __init__(self):
+        super().__init__()
+        self.callback_ns = None  # stamp 'callback' de l'échantillon en cours d'émission
+
+    def append(self, item):
+        item['received_ns'] = time.monotonic_ns()
+        item['callback_ns'] = self.callback_ns
+        super().append(item)
+
+
+def _stamp_emits(manager, sio_client):
+    """
+    Associe chaque paquet reçu au stamp 'callback' de son échantillon: le client
+    de test est servi de façon synchrone, pendant l'appel à _emit
+    """
+    emit = manager._emit
+
+    def stamped_emit(emitter, event, data, stream=None, stamps=None, get_ns=None):
+        sio_client.queue.callback_ns = (stamps or {}).get('callback')
+        try:
+            emit(emitter, event, data, stream, stamps, get_ns)
+        finally:
+            sio_client.queue.callback_ns = None
+
+    manager._emit = stamped_emit
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _latency_summary(values_ms):
+    values = sorted(values_ms)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 3),
+        'p50': round(_percentile(values, 50), 3),
+        'p90': round(_percentile(values, 90), 3),
+        'p95': round(_percentile(values, 95), 3),
+        'p99': round(_percentile(values, 99), 3),
+        'max': round(values[-1], 3)
+    }
+
+
+def _stage_breakdown():
+    """Quantiles par étape issus des histogrammes /metrics (ms, borne de bucket)"""
+    from utils.instrumentation import STAGE_LATENCY
+
+    breakdown = {}
+    for (device, stream, stage), child in sorted(STAGE_LATENCY._children.items()):
+        if not child.count:
+            continue
+        breakdown.setdefault(stream, {})[stage] = {
+            'mean': round(child.sum / child.count * 1000, 3),
+            'p50_le': child.quantile(0.5) * 1000,
+            'p99_le': child.quantile(0.99) * 1000
+        }
+    return breakdown
+
+
+class ProcessSampler:
+    """Échantillonne CPU (secondes cumulées) et RSS d'un processus"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self._proc = psutil.Process(pid) if psutil else None
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self.peak_rss = 0
+
+    def cpu_seconds(self):
+        if self._proc:
+            times = self._proc.cpu_times()
+            return times.user + times.system
+        try:
+            with open(f'/proc/{self.pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def rss_bytes(self):
+        rss = None
+        if self._proc:
+            rss = self._proc.memory_info().rss
+        else:
+            try:
+                with open(f'/proc/{self.pid}/statm') as f:
+                    rss = int(f.read().split()[1]) * self._page_size
+            except (OSError, IndexError, ValueError):
+                return None
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+
+def run_benchmark(args):
+    """Démarre le pipeline réel contre le SDK simulé et collecte les mesures"""
+    os.environ['NEUROSITY_SDK'] = 'simulator'
+    os.environ['NEUROSITY_SIM_METRIC_HZ'] = str(args.metric_hz)
+    os.environ['NEUROSITY_SIM_SAMPLING_RATE'] = str(args.sampling_rate)
+    os.environ['NEUROSITY_SIM_EPOCH_SIZE'] = str(args.epoch_size)
+    os.environ['DSP_HOP_SECONDS'] = str(args.dsp_hop)
+    os.environ.setdefault('NEUROSITY_DEVICE_ID', 'bench-crown')
+
+    sys.path.insert(0, str(ROOT_DIR))
+    import app as neurosity_app
+    from data_manager import DataManager
+    from recorder import SessionRecorder
+
+    work_dir = tempfile.mkdtemp(prefix='neurosity_bench_')
+    manager = neurosity_app.manager
+    manager.data_manager = DataManager(work_dir)
+    manager.recorder = SessionRecorder(manager.device_key, work_dir)
+
+    print(f"🏁 Benchmark pipeline - {args.duration}s, calm/focus {args.metric_hz} Hz, "
+          f"EEG {args.sampling_rate} Hz / {args.epoch_size} éch.")
+
+    if not manager.start_neurosity_process():
+        raise RuntimeError("Impossible de démarrer le processus Neurosity")
+
+    http = neurosity_app.app.test_client()
+    sio_client = neurosity_app.socketio.test_client(neurosity_app.app, flask_test_client=http)
+    sio_client.queue = _StampedQueue()
+    _stamp_emits(manager, sio_client)
+
+    data_thread = threading.Thread(target=neurosity_app.data_processor, daemon=True)
+    data_thread.start()
+
+    try:
+        connect_start = time.time()
+        response = http.post('/connect').get_json()
+        if not response.get('success'):
+            raise RuntimeError(f"Connexion simulateur échouée: {response}")
+        connect_seconds = time.time() - connect_start
+
+        sio_client.emit('start_monitoring')
+        recording = http.post('/start_recording', json={'filename': 'bench_session'}).get_json()
+        if not recording.get('success'):
+            raise RuntimeError(f"Démarrage enregistrement échoué: {recording}")
+
+        # Préchauffage puis fenêtre de mesure
+        time.sleep(args.warmup)
+        sio_client.queue = _StampedQueue()
+
+        samplers = {
+            'server': ProcessSampler(os.getpid()),
+            'neurosity_process': ProcessSampler(manager.neurosity_process.pid),
+            'recorder': ProcessSampler(manager.recorder.process.pid)
+        }
+        cpu_start = {name: s.cpu_seconds() for name, s in samplers.items()}
+        rows_start = manager.recorder.rows_written
+        window_start = time.time()
+
+        while time.time() - window_start < args.duration:
+            for sampler in samplers.values():
+                sampler.rss_bytes()
+            time.sleep(0.5)
+
+        window_seconds = time.time() - window_start
+        rows_written = manager.recorder.rows_written - rows_start
+        cpu_end = {name: s.cpu_seconds() for name, s in samplers.items()}
+        received = list(sio_client.queue)
+
+        try:
+            backlog = manager.data_queue.qsize()
+        except NotImplementedError:
+            backlog = None
+
+        metrics_text = http.get('/metrics').get_data(as_text=True)
+        stages = _stage_breakdown()
+
+        http.post('/stop_recording')
+        sio_client.emit('stop_monitoring')
+    finally:
+        manager.stop_neurosity_process()
+
+    # Analyse des événements reçus pendant la fenêtre
+    latencies = {stream: [] for stream in STREAM_EVENTS.values()}
+    counts = {stream: 0 for stream in STREAM_EVENTS.values()}
+    for packet in received:
+        stream = STREAM_EVENTS.get(packet['name'])
+        if not stream:
+            continue
+        counts[stream] += 1
+        if packet['callback_ns'] is not None:
+            latencies[stream].append((packet['received_ns'] - packet['callback_ns']) / 1e6)
+
+    processes = {}
+    for name, sampler in samplers.items():
+        cpu = None
+        if cpu_start[name] is not None and cpu_end[name] is not None:
+            cpu = round((cpu_end[name] - cpu_start[name]) / window_seconds * 100, 2)
+        processes[name] = {
+            'cpu_percent': cpu,
+            'rss_mb': round(sampler.peak_rss / (1024 * 1024), 2)
+        }
+
+    band_power_rate = args.sampling_rate / max(round(args.dsp_hop * args.sampling_rate), 1)
+    return {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'psutil': psutil is not None
+        },
+        'config': {
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'metric_hz': args.metric_hz,
+            'sampling_rate': args.sampling_rate,
+            'epoch_size': args.epoch_size,
+            'dsp_hop_s': args.dsp_hop,
+            'expected_hz': {'calm': args.metric_hz, 'focus': args.metric_hz, 'brainwaves': band_power_rate}
+        },
+        'connect_s': round(connect_seconds, 2),
+        'latency_ms': {stream: _latency_summary(values) for stream, values in latencies.items()},
+        'throughput_hz': {stream: round(count / window_seconds, 2) for stream, count in counts.items()},
+        'csv': {
+            'rows': rows_written,
+            'rows_per_s': round(rows_written / window_seconds, 2)
+        },
+        'queue_backlog': backlog,
+        'stages_ms': stages,
+        'metrics_exposed': metrics_text.count('\n'),
+        'processes': processes
+    }
+
+
+def _flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Retourne la liste des régressions (mesure, baseline, actuel)"""
+    regressions = []
+    current = _flatten({k: results[k] for k in METRIC_DIRECTIONS if k in results})
+    reference = _flatten({k: baseline[k] for k in METRIC_DIRECTIONS if k in baseline})
+    tolerances = baseline.get('tolerances', {})
+
+    for path, ref_value in reference.items():
+        if path.endswith('.count') or path.endswith('.rows') or path not in current:
+            continue
+        value = current[path]
+        family = path.split('.', 1)[0]
+        direction = METRIC_DIRECTIONS[family]
+        allowed = tolerances.get(family, tolerance)
+
+        if direction > 0:
+            # Seuil absolu minimal pour éviter les faux positifs sur des valeurs quasi nulles
+            limit = max(ref_value * (1 + allowed), ref_value + 1.0)
+            if value > limit:
+                regressions.append((path, ref_value, value))
+        elif value < ref_value * (1 - allowed):
+            regressions.append((path, ref_value, value))
+
+    return regressions
+
+
+def print_report(results):
+    print("\n" + "=" * 70)
+    print("📊 RÉSULTATS DU BENCHMARK PIPELINE")
+    print("=" * 70)
+    print(f"Connexion (détection simulée): {results['connect_s']}s")
+    for stream, stats in results['latency_ms'].items():
+        if stats.get('count'):
+            print(f"  {stream:<11} latence p50={stats['p50']}ms p95={stats['p95']}ms "
+                  f"p99={stats['p99']}ms max={stats['max']}ms | "
+                  f"débit {results['throughput_hz'][stream]} Hz "
+                  f"(attendu {results['config']['expected_hz'][stream]} Hz)")
+        else:
+            print(f"  {stream:<11} aucun événement reçu")
+    print(f"  CSV         {results['csv']['rows_per_s']} lignes/s ({results['csv']['rows']} lignes)")
+    for name, stats in results['processes'].items():
+        print(f"  {name:<18} CPU {stats['cpu_percent']}% | RSS max {stats['rss_mb']} MB")
+    print(f"  Backlog data_queue en fin de mesure: {results['queue_backlog']}")
+    for stream, stages in results.get('stages_ms', {}).items():
+        detail = ', '.join(f"{stage}={stats['mean']}ms" for stage, stats in stages.items())
+        print(f"  Étapes {stream}: {detail}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du pipeline Neurosity")
+    parser.add_argument('--duration', type=float, default=20.0, help="Durée de mesure (s)")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Préchauffage après monitoring (s)")
+    parser.add_argument('--metric-hz', type=float, default=4.0, help="Cadence calm/focus simulée")
+    parser.add_argument('--sampling-rate', type=float, default=256.0, help="Fréquence EEG brute simulée")
+    parser.add_argument('--epoch-size', type=int, default=16, help="Échantillons par époque brute")
+    parser.add_argument('--dsp-hop', type=float, default=None,
+                        help="Pas du calcul des puissances par bande (s, défaut: une époque)")
+    parser.add_argument('--output', type=Path, default=None, help="Fichier JSON de résultats")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Baseline de référence")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Tolérance relative par défaut")
+    parser.add_argument('--update-baseline', action='store_true', help="Remplace la baseline par ce run")
+    args = parser.parse_args()
+    if args.dsp_hop is None:
+        args.dsp_hop = args.epoch_size / args.sampling_rate
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    output = args.output
+    if output is None:
+        DEFAULT_RESULTS_DIR.mkdir(exist_ok=True)
+        output = DEFAULT_RESULTS_DIR / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"💾 Résultats: {output}")
+
+    if args.update_baseline:
+        baseline = {**results, 'tolerances': {'latency_ms': 0.5, 'throughput_hz': 0.1,
+                                              'csv': 0.1, 'processes': 0.5}}
+        args.baseline.write_text(json.dumps(baseline, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"📌 Baseline mise à jour: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("⚠️  Aucune baseline - lancez avec --update-baseline pour en créer une")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    if baseline.get('config', {}).get('expected_hz') != results['config']['expected_hz']:
+        print("⚠️  Configuration différente de la baseline - comparaison indicative seulement")
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("❌ Régressions détectées:")
+        for path, ref_value, value in regressions:
+            print(f"   - {path}: baseline {ref_value} → {value}")
+        return 1
+
+    print("✅ Aucune régression par rapport à la baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    mp.set_start_method('spawn', force=True)
+    sys.exit(main())
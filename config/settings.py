@@ -29,6 +29,14 @@ class Config:
     NEUROSITY_EMAIL = os.getenv('NEUROSITY_EMAIL')
     NEUROSITY_PASSWORD = os.getenv('NEUROSITY_PASSWORD')
     NEUROSITY_DEVICE_ID = os.getenv('NEUROSITY_DEVICE_ID')
+    # Plusieurs casques: un processus d'acquisition par casque
+    NEUROSITY_DEVICE_IDS = [d.strip() for d in os.getenv('NEUROSITY_DEVICE_IDS', '').split(',') if d.strip()]
+    
+    # SDK utilisé: 'real' (neurosity) ou 'simulator' (local, sans casque ni réseau)
+    NEUROSITY_SDK = os.getenv('NEUROSITY_SDK', 'real').lower()
+    SIMULATOR_METRIC_HZ = float(os.getenv('NEUROSITY_SIM_METRIC_HZ', 4.0))
+    SIMULATOR_SAMPLING_RATE = float(os.getenv('NEUROSITY_SIM_SAMPLING_RATE', 256.0))
+    SIMULATOR_EPOCH_SIZE = int(os.getenv('NEUROSITY_SIM_EPOCH_SIZE', 16))
     
     # Configuration des données
     DATA_DIRECTORY = BASE_DIR / 'data'
@@ -61,6 +69,9 @@ class Config:
     LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10485760))  # 10MB
     LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
     LOG_FORMAT = os.getenv('LOG_FORMAT', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_RATE_LIMIT = float(os.getenv('LOG_RATE_LIMIT', 5.0))  # messages/s par type de message
+    LOG_RATE_BURST = int(os.getenv('LOG_RATE_BURST', 10))
     
     # Configuration de sécurité
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
@@ -73,6 +84,18 @@ class Config:
     QUEUE_TIMEOUT = int(os.getenv('QUEUE_TIMEOUT', 5))
     MAX_WORKERS = int(os.getenv('MAX_WORKERS', 1))  # Pour les tâches en arrière-plan
     
+    # Acquisition: 'process' (processus enfant du serveur) ou 'daemon' (python acquisition.py run)
+    NEUROSITY_ACQUISITION = os.getenv('NEUROSITY_ACQUISITION', 'process').lower()
+    DAEMON_SOCKET = os.getenv('NEUROSITY_DAEMON_SOCKET', '/tmp/neurosity-{device}.sock')
+    DAEMON_BUFFER_SIZE = int(os.getenv('NEUROSITY_DAEMON_BUFFER', 1000))  # messages par abonné
+    
+    # Configuration du profilage à la demande (/debug/*): activé par défaut seulement en développement
+    DEBUG_ENDPOINTS_ENABLED = os.getenv('DEBUG_ENDPOINTS_ENABLED', 'False').lower() == 'true'
+    PROFILES_DIRECTORY = Path(os.getenv('PROFILES_DIR', BASE_DIR / 'profiles'))
+    PROFILE_SAMPLING_INTERVAL = float(os.getenv('PROFILE_SAMPLING_INTERVAL', 0.01))  # secondes
+    # Arrêt automatique du suivi tracemalloc après cette durée sans instantané (0: jamais)
+    MEMORY_PROFILE_WINDOW = float(os.getenv('MEMORY_PROFILE_WINDOW', 300))  # secondes
+    
     # CORRECTION: Configuration des métriques
     SUPPORTED_METRICS = ['calm', 'focus', 'attention', 'brainwaves']
     METRIC_VALIDATION_ENABLED = os.getenv('METRIC_VALIDATION_ENABLED', 'True').lower() == 'true'
@@ -84,19 +107,25 @@ class Config:
         errors = []
         warnings = []
         
-        # Vérifier les variables Neurosity requises
-        if not cls.NEUROSITY_EMAIL:
-            errors.append("NEUROSITY_EMAIL manquant dans .env")
-        elif '@' not in cls.NEUROSITY_EMAIL:
-            warnings.append("NEUROSITY_EMAIL ne semble pas être un email valide")
-        
-        if not cls.NEUROSITY_PASSWORD:
-            errors.append("NEUROSITY_PASSWORD manquant dans .env")
-        elif len(cls.NEUROSITY_PASSWORD) < 6:
-            warnings.append("NEUROSITY_PASSWORD semble court (moins de 6 caractères)")
-        
-        if not cls.NEUROSITY_DEVICE_ID:
-            errors.append("NEUROSITY_DEVICE_ID manquant dans .env")
+        # Vérifier les variables Neurosity requises (sauf en mode simulateur)
+        if cls.NEUROSITY_SDK in ('simulator', 'sim', 'fake'):
+            if cls.SIMULATOR_METRIC_HZ <= 0 or cls.SIMULATOR_SAMPLING_RATE <= 0:
+                errors.append("Cadences du simulateur Neurosity doivent être positives")
+            if cls.SIMULATOR_EPOCH_SIZE <= 0:
+                errors.append("NEUROSITY_SIM_EPOCH_SIZE doit être positif")
+        else:
+            if not cls.NEUROSITY_EMAIL:
+                errors.append("NEUROSITY_EMAIL manquant dans .env")
+            elif '@' not in cls.NEUROSITY_EMAIL:
+                warnings.append("NEUROSITY_EMAIL ne semble pas être un email valide")
+            
+            if not cls.NEUROSITY_PASSWORD:
+                errors.append("NEUROSITY_PASSWORD manquant dans .env")
+            elif len(cls.NEUROSITY_PASSWORD) < 6:
+                warnings.append("NEUROSITY_PASSWORD semble court (moins de 6 caractères)")
+            
+            if not cls.NEUROSITY_DEVICE_ID and not cls.NEUROSITY_DEVICE_IDS:
+                errors.append("NEUROSITY_DEVICE_ID (ou NEUROSITY_DEVICE_IDS) manquant dans .env")
         
         # CORRECTION: Vérifications de cohérence des valeurs
         if cls.MAX_SESSION_DURATION <= 0:
@@ -231,6 +260,7 @@ class DevelopmentConfig(Config):
     LOG_LEVEL = 'DEBUG'
     
     # CORRECTION: Paramètres de développement plus permissifs
+    DEBUG_ENDPOINTS_ENABLED = os.getenv('DEBUG_ENDPOINTS_ENABLED', 'True').lower() == 'true'
     MAX_SESSION_DURATION = 3600  # 1 heure en dev
     AUTO_CLEANUP_ENABLED = False  # Pas de nettoyage automatique en dev
     METRIC_VALIDATION_ENABLED = True  # Validation stricte en dev
@@ -293,6 +323,13 @@ config_mapping = {
 }
 
 
+def get_config_class(env_name: str = None):
+    """Classe de configuration de l'environnement (FLASK_ENV ou APP_ENV), sans validation"""
+    if env_name is None:
+        env_name = os.getenv('FLASK_ENV', os.getenv('APP_ENV', 'development'))
+    return config_mapping.get(env_name, config_mapping['default'])
+
+
 def get_config(env_name: str = None):
     """
     Retourne la configuration active avec détection automatique
@@ -319,24 +356,42 @@ def get_config(env_name: str = None):
     return config_class
 
 
-def setup_logging(config_class=None):
+def setup_logging(config_class=None, process_name: str = None):
     """
-    CORRECTION: Configure le système de logging
+    Configure le système de logging derrière une queue (écritures hors du chemin critique)
     
     Args:
-        config_class: Classe de configuration à utiliser
+        config_class: Classe de configuration à utiliser (sans validation)
+        process_name: Suffixe du fichier de log pour un processus enfant
     """
     if config_class is None:
-        config_class = get_config()
+        config_class = get_config_class()
     
     try:
         import logging.config
+        from utils.logging_queue import install_queue_logging
+        
         logging_config = config_class.get_logging_config()
+        log_file = config_class.LOG_FILE
+        if process_name:
+            # Un fichier par processus: la rotation n'est pas sûre entre processus
+            log_file = log_file.with_name(f"{log_file.stem}.{process_name}{log_file.suffix}")
+            logging_config['handlers']['file']['filename'] = str(log_file)
+        log_file.parent.mkdir(exist_ok=True, parents=True)
         logging.config.dictConfig(logging_config)
         
+        root = logging.getLogger()
+        install_queue_logging(
+            list(root.handlers),
+            level=root.level,
+            queue_size=config_class.LOG_QUEUE_SIZE,
+            rate=config_class.LOG_RATE_LIMIT,
+            burst=config_class.LOG_RATE_BURST
+        )
+        
         logger = logging.getLogger(__name__)
         logger.info(f"Logging configuré avec niveau: {config_class.LOG_LEVEL}")
-        logger.info(f"Fichier de log: {config_class.LOG_FILE}")
+        logger.info(f"Fichier de log: {log_file}")
         
     except Exception as e:
         # Fallback vers une configuration basique
@@ -1,10 +1,15 @@
 import csv
 import json
+import logging
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import pandas as pd
 
+from utils.instrumentation import CSV_FLUSH_LATENCY, now_ns
+
+logger = logging.getLogger(__name__)
+
 
 class DataManager:
     """Gestionnaire avancé pour les données Neurosity avec export CSV optimisé"""
@@ -14,16 +19,18 @@ class DataManager:
         self.current_session = None
         self.csv_file = None
         self.csv_writer = None
-        self.session_data = []
+        # Lignes écrites dans la session: les données restent sur disque, pas en mémoire
+        self.session_rows = 0
         self.session_start_time = None
         
         # Créer le dossier de données s'il n'existe pas
         os.makedirs(data_directory, exist_ok=True)
     
-    def start_session(self, session_name: Optional[str] = None) -> str:
-        """Démarre une nouvelle session d'enregistrement"""
+    def start_session(self, session_name: Optional[str] = None, start_time: Optional[datetime] = None) -> str:
+        """Démarre une nouvelle session d'enregistrement (start_time: début côté serveur, maintenant par défaut)"""
+        start_time = start_time or datetime.now()
         if not session_name:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = start_time.strftime("%Y%m%d_%H%M%S")
             session_name = f"neurosity_session_{timestamp}"
         
         self.current_session = session_name
@@ -70,27 +77,34 @@ class DataManager:
             'gamma_max',
             'gamma_min',
             'gamma_std',
-            'gamma_raw'
+            'gamma_raw',
+            'marker',
+            'artifacts'
         ]
         
         self.csv_writer.writerow(headers)
-        self.session_start_time = datetime.now()
-        self.session_data = []
+        self.session_start_time = start_time
+        self.session_rows = 0
         
-        print(f"Session d'enregistrement démarrée: {csv_filename}")
+        logger.info(f"Session d'enregistrement démarrée: {csv_filename}")
         return csv_filename
     
-    def add_data_point(self, data_type: str, data: Dict, metadata: Optional[Dict] = None):
-        """Ajoute un point de données à la session courante"""
+    def add_data_point(self, data_type: str, data: Dict, metadata: Optional[Dict] = None,
+                       flush: bool = True, timestamp: Optional[datetime] = None) -> bool:
+        """
+        Ajoute un point de données à la session courante (flush=False: voir flush())
+        timestamp: réception de l'échantillon, maintenant par défaut; l'heure d'écriture
+        d'un lot différé ne doit pas dater la ligne
+        """
         if not self.current_session or not self.csv_writer:
-            print("Aucune session active. Démarrez une session d'abord.")
-            return
+            logger.warning("Aucune session active. Démarrez une session d'abord.")
+            return False
         
+        timestamp = timestamp or datetime.now()
         # CORRECTION: Vérifier que session_start_time existe
         if not self.session_start_time:
-            self.session_start_time = datetime.now()
+            self.session_start_time = timestamp
         
-        timestamp = datetime.now()
         session_duration = (timestamp - self.session_start_time).total_seconds()
         
         # CORRECTION: Initialiser la ligne avec les données de base simplifiées
@@ -109,15 +123,23 @@ class DataManager:
             self._process_attention_data(row_data, data)
         elif data_type == 'brainwaves':
             self._process_brainwaves_data(row_data, data)
-        
-        # Stocker en mémoire pour analyse
-        self.session_data.append(row_data.copy())
+        elif data_type == 'marker':
+            # Marqueur (alerte de règle): ligne dédiée, repérable dans la session
+            row_data['marker'] = data.get('label', '')
         
         # CORRECTION: Écrire dans le CSV immédiatement avec gestion d'erreurs
         try:
-            self._write_csv_row(row_data)
+            self._write_csv_row(row_data, flush)
         except Exception as e:
-            print(f"Erreur écriture CSV: {e}")
+            logger.error("Erreur écriture CSV: %s", e)
+            return False
+        self.session_rows += 1
+        return True
+    
+    def flush(self):
+        """Force l'écriture sur disque des lignes ajoutées avec flush=False"""
+        if self.csv_file and not self.csv_file.closed:
+            self.csv_file.flush()
     
     def _process_calm_data(self, row_data: Dict, data: Dict):
         """Traite les données de calme"""
@@ -145,6 +167,10 @@ class DataManager:
     
     def _process_brainwaves_data(self, row_data: Dict, data: Dict):
         """Traite les données des ondes cérébrales avec statistiques"""
+        # Canaux contaminés (exclus des listes ou seulement étiquetés, voir utils/artifacts.py)
+        if data.get('artifacts'):
+            row_data['artifacts'] = json.dumps(data['artifacts'], separators=(',', ':'))
+        
         for wave_type in ['delta', 'theta', 'alpha', 'beta', 'gamma']:
             wave_data = data.get(wave_type, [])
             
@@ -185,7 +211,7 @@ class DataManager:
                             f'{wave_type}_raw': '[]'
                         })
                 except Exception as e:
-                    print(f"Erreur traitement onde {wave_type}: {e}")
+                    logger.error("Erreur traitement onde %s: %s", wave_type, e)
                     # Valeurs par défaut en cas d'erreur
                     row_data.update({
                         f'{wave_type}_avg': '',
@@ -204,7 +230,7 @@ class DataManager:
                     f'{wave_type}_raw': '[]'
                 })
     
-    def _write_csv_row(self, row_data: Dict):
+    def _write_csv_row(self, row_data: Dict, flush: bool = True):
         """CORRECTION: Écrit une ligne dans le CSV avec colonnes simplifiées"""
         if not self.csv_writer:
             return
@@ -243,17 +269,22 @@ class DataManager:
             row_data.get('gamma_max', ''),
             row_data.get('gamma_min', ''),
             row_data.get('gamma_std', ''),
-            row_data.get('gamma_raw', '')
+            row_data.get('gamma_raw', ''),
+            row_data.get('marker', ''),
+            row_data.get('artifacts', '')
         ]
         
-        try:
-            self.csv_writer.writerow(ordered_values)
+        start_ns = now_ns()
+        self.csv_writer.writerow(ordered_values)
+        if flush:
             self.csv_file.flush()  # Force l'écriture
-        except Exception as e:
-            print(f"Erreur écriture ligne CSV: {e}")
+            CSV_FLUSH_LATENCY.labels().observe_ns(start_ns, now_ns())
     
-    def stop_session(self) -> str:
-        """Arrête la session d'enregistrement"""
+    def stop_session(self, generate_report: bool = True) -> str:
+        """
+        Arrête la session d'enregistrement
+        generate_report=False: rapport laissé à la finalisation en arrière-plan (jobs.py)
+        """
         csv_path = ""
         
         if self.csv_file:
@@ -263,97 +294,90 @@ class DataManager:
             try:
                 self.csv_file.close()
             except Exception as e:
-                print(f"Erreur fermeture fichier: {e}")
+                logger.error(f"Erreur fermeture fichier: {e}")
             finally:
                 self.csv_file = None
                 self.csv_writer = None
             
-            print(f"Session d'enregistrement terminée: {csv_path}")
-            print(f"Nombre de points de données: {len(self.session_data)}")
+            logger.info(f"Session d'enregistrement terminée: {csv_path}")
+            logger.info(f"Nombre de points de données: {self.session_rows}")
             
-            # Générer un rapport de session
-            try:
-                self._generate_session_report(csv_path)
-            except Exception as e:
-                print(f"Erreur génération rapport: {e}")
+            if generate_report:
+                self.generate_session_report(csv_path)
         
         return csv_path
     
-    def _generate_session_report(self, csv_path: str):
-        """Génère un rapport de la session"""
-        if not self.session_data or not self.session_start_time:
-            return
-        
+    def generate_session_report(self, csv_path: str) -> str:
+        """
+        Génère le rapport texte d'une session à partir de son CSV
+        (sans état en mémoire: exécutable dans un worker de finalisation)
+        """
         report_path = csv_path.replace('.csv', '_report.txt')
         
         try:
-            # Calculer les statistiques de session
-            session_duration = (datetime.now() - self.session_start_time).total_seconds()
-            data_points = len(self.session_data)
+            df = pd.read_csv(csv_path, delimiter=';')
+            if df.empty:
+                return ""
             
-            # CORRECTION: Statistiques des métriques principales avec gestion d'erreurs
-            calm_values = []
-            focus_values = []
-            attention_values = []
+            session_name = os.path.splitext(os.path.basename(csv_path))[0]
+            timestamps = pd.to_datetime(df['timestamp'], errors='coerce').dropna()
+            durations = pd.to_numeric(df['session_duration'], errors='coerce').dropna()
+            session_duration = float(durations.max()) if len(durations) else 0.0
+            data_points = len(df)
             
-            for d in self.session_data:
-                if d.get('calm_percentage') and isinstance(d.get('calm_percentage'), (int, float)):
-                    calm_values.append(d['calm_percentage'])
-                if d.get('focus_percentage') and isinstance(d.get('focus_percentage'), (int, float)):
-                    focus_values.append(d['focus_percentage'])
-                if d.get('attention_percentage') and isinstance(d.get('attention_percentage'), (int, float)):
-                    attention_values.append(d['attention_percentage'])
+            def column_values(column):
+                if column not in df:
+                    return pd.Series(dtype=float)
+                return pd.to_numeric(df[column], errors='coerce').dropna()
             
             with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(f"=== RAPPORT DE SESSION NEUROSITY ===\n")
-                f.write(f"Session: {self.current_session}\n")
-                f.write(f"Début: {self.session_start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Fin: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write("=== RAPPORT DE SESSION NEUROSITY ===\n")
+                f.write(f"Session: {session_name}\n")
+                if len(timestamps):
+                    f.write(f"Début: {timestamps.iloc[0].strftime('%Y-%m-%d %H:%M:%S')}\n")
+                    f.write(f"Fin: {timestamps.iloc[-1].strftime('%Y-%m-%d %H:%M:%S')}\n")
                 f.write(f"Durée: {session_duration:.1f} secondes ({session_duration / 60:.1f} minutes)\n")
                 f.write(f"Points de données: {data_points}\n\n")
                 
-                if calm_values:
-                    f.write(f"CALME ({len(calm_values)} mesures):\n")
-                    f.write(f"  Moyenne: {sum(calm_values) / len(calm_values):.1f}%\n")
-                    f.write(f"  Maximum: {max(calm_values):.1f}%\n")
-                    f.write(f"  Minimum: {min(calm_values):.1f}%\n\n")
-                
-                if focus_values:
-                    f.write(f"CONCENTRATION ({len(focus_values)} mesures):\n")
-                    f.write(f"  Moyenne: {sum(focus_values) / len(focus_values):.1f}%\n")
-                    f.write(f"  Maximum: {max(focus_values):.1f}%\n")
-                    f.write(f"  Minimum: {min(focus_values):.1f}%\n\n")
-                
-                if attention_values:
-                    f.write(f"ATTENTION ({len(attention_values)} mesures):\n")
-                    f.write(f"  Moyenne: {sum(attention_values) / len(attention_values):.1f}%\n")
-                    f.write(f"  Maximum: {max(attention_values):.1f}%\n")
-                    f.write(f"  Minimum: {min(attention_values):.1f}%\n\n")
+                for column, title in (('calm_percentage', 'CALME'),
+                                      ('focus_percentage', 'CONCENTRATION'),
+                                      ('attention_percentage', 'ATTENTION')):
+                    values = column_values(column)
+                    if len(values):
+                        f.write(f"{title} ({len(values)} mesures):\n")
+                        f.write(f"  Moyenne: {values.mean():.1f}%\n")
+                        f.write(f"  Maximum: {values.max():.1f}%\n")
+                        f.write(f"  Minimum: {values.min():.1f}%\n\n")
                 
                 # CORRECTION: Statistiques des ondes cérébrales
-                f.write(f"ONDES CÉRÉBRALES:\n")
+                f.write("ONDES CÉRÉBRALES:\n")
                 wave_stats_found = False
                 for wave_type in ['delta', 'theta', 'alpha', 'beta', 'gamma']:
-                    wave_avgs = []
-                    for d in self.session_data:
-                        wave_avg = d.get(f'{wave_type}_avg')
-                        if wave_avg and isinstance(wave_avg, (int, float)):
-                            wave_avgs.append(wave_avg)
-                    
-                    if wave_avgs:
+                    wave_avgs = column_values(f'{wave_type}_avg')
+                    if len(wave_avgs):
                         wave_stats_found = True
                         f.write(f"  {wave_type.title()} ({len(wave_avgs)} mesures):\n")
-                        f.write(f"    Moyenne: {sum(wave_avgs) / len(wave_avgs):.3f} μV\n")
-                        f.write(f"    Maximum: {max(wave_avgs):.3f} μV\n")
-                        f.write(f"    Minimum: {min(wave_avgs):.3f} μV\n")
+                        f.write(f"    Moyenne: {wave_avgs.mean():.3f} μV\n")
+                        f.write(f"    Maximum: {wave_avgs.max():.3f} μV\n")
+                        f.write(f"    Minimum: {wave_avgs.min():.3f} μV\n")
                 
                 if not wave_stats_found:
                     f.write("  Aucune donnée d'ondes cérébrales collectée\n")
-            
-            print(f"Rapport généré: {report_path}")
+                
+                # Marqueurs écrits par les règles d'alerte (utils/rules.py)
+                if 'marker' in df:
+                    markers = df[df['marker'].notna() & (df['marker'].astype(str) != '')]
+                    if len(markers):
+                        f.write(f"\nALERTES ({len(markers)}):\n")
+                        for _, row in markers.iterrows():
+                            f.write(f"  {float(row['session_duration']):7.1f}s  {row['marker']}\n")
+
+            logger.info(f"Rapport généré: {report_path}")
+            return report_path
         
         except Exception as e:
-            print(f"Erreur génération rapport: {e}")
+            logger.error(f"Erreur génération rapport: {e}")
+            return ""
     
     def get_session_list(self) -> List[str]:
         """Retourne la liste des sessions disponibles"""
@@ -362,7 +386,7 @@ class DataManager:
                          if f.endswith('.csv') and os.path.isfile(os.path.join(self.data_directory, f))]
             return sorted(csv_files, reverse=True)  # Plus récentes en premier
         except Exception as e:
-            print(f"Erreur liste sessions: {e}")
+            logger.error(f"Erreur liste sessions: {e}")
             return []
     
     def analyze_session(self, csv_filename: str) -> Dict:
@@ -378,7 +402,7 @@ class DataManager:
                 df = pd.read_csv(csv_path, delimiter=';')
             except Exception as e:
                 # Fallback avec délimiteur virgule
-                print(f"Erreur lecture avec ';', essai avec ',': {e}")
+                logger.warning(f"Erreur lecture avec ';', essai avec ',': {e}")
                 df = pd.read_csv(csv_path, delimiter=',')
             
             if df.empty:
@@ -407,7 +431,7 @@ class DataManager:
                                 'count': len(values)
                             }
                     except Exception as e:
-                        print(f"Erreur analyse métrique {metric}: {e}")
+                        logger.error(f"Erreur analyse métrique {metric}: {e}")
             
             # CORRECTION: Analyse des ondes cérébrales
             for wave_type in ['delta', 'theta', 'alpha', 'beta', 'gamma']:
@@ -424,12 +448,12 @@ class DataManager:
                                 'count': len(values)
                             }
                     except Exception as e:
-                        print(f"Erreur analyse onde {wave_type}: {e}")
+                        logger.error(f"Erreur analyse onde {wave_type}: {e}")
             
             return analysis
         
         except Exception as e:
-            print(f"Erreur analyse session: {e}")
+            logger.error(f"Erreur analyse session: {e}")
             return {'error': str(e)}
     
     def export_session_summary(self, csv_filename: str) -> str:
@@ -448,7 +472,7 @@ class DataManager:
             
             return json_path
         except Exception as e:
-            print(f"Erreur export JSON: {e}")
+            logger.error(f"Erreur export JSON: {e}")
             return ""
     
     def cleanup_old_sessions(self, days_to_keep: int = 30):
@@ -469,15 +493,15 @@ class DataManager:
                         if os.path.exists(report_path):
                             os.remove(report_path)
                         deleted_count += 1
-                        print(f"Session supprimée: {session}")
+                        logger.info(f"Session supprimée: {session}")
                 except Exception as e:
-                    print(f"Erreur suppression {session}: {e}")
+                    logger.error(f"Erreur suppression {session}: {e}")
             
             if deleted_count > 0:
-                print(f"Nettoyage terminé: {deleted_count} session(s) supprimée(s)")
+                logger.info(f"Nettoyage terminé: {deleted_count} session(s) supprimée(s)")
         
         except Exception as e:
-            print(f"Erreur nettoyage: {e}")
+            logger.error(f"Erreur nettoyage: {e}")
     
     def get_storage_info(self) -> Dict:
         """CORRECTION: Retourne des informations sur l'espace de stockage utilisé"""
@@ -498,5 +522,5 @@ class DataManager:
                 'directory': self.data_directory
             }
         except Exception as e:
-            print(f"Erreur info stockage: {e}")
+            logger.error(f"Erreur info stockage: {e}")
             return {'error': str(e)}
\ No newline at end of file
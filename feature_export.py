@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+NEUROSITY CROWN MONITOR - EXPORT DE CARACTÉRISTIQUES (JEUX DE DONNÉES ML)
+
+Transforme des sessions CSV en matrices de caractéristiques par fenêtre
+glissante (``window`` secondes, pas de ``step`` secondes, horloge
+``session_duration``) :
+
+- puissances par bande (moyenne des canaux), puissances relatives et par
+  canal (colonnes ``*_raw``, une valeur par canal)
+- rapports theta/beta, alpha/theta, beta/alpha et engagement beta/(alpha+theta)
+- calme et concentration moyens sur la fenêtre
+- agrégats glissants de ``MetricsProcessor`` (mêmes ``RollingWindow`` : moyenne,
+  écart-type, min, max, EWMA sur 1 s, 10 s, 60 s) tels qu'ils étaient à la fin
+  de la fenêtre
+- lignes d'ondes cérébrales et part étiquetée comme artefact
+- étiquette : règle du dernier marqueur (alerte) de la fenêtre, '' sinon
+
+Chaque session est lue par blocs (``pd.read_csv(chunksize=...)``) et ses
+fenêtres écrites au fil de l'eau en fragments de ``shard_size`` lignes :
+``<session>-0000.npz`` (ou ``.parquet``). Les limites de fragments ne
+dépendent que de la session et de la configuration, pas du nombre de
+workers ni de l'ordre de fin des tâches. Les sessions sont traitées en
+parallèle (pool de processus) ; ``manifest.json`` liste les fragments dans
+l'ordre des sessions.
+
+Usage :
+    python feature_export.py data --output features
+    python feature_export.py data --from 2026-01-01 --window 4 --step 2 --format parquet --workers 4
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics import parse_day, session_day
+from utils.neurosity_helper import WAVE_TYPES, RollingWindow, window_label
+
+logger = logging.getLogger('neurosity_monitor.features')
+
+FEATURE_VERSION = 1
+FORMATS = ('npz', 'parquet')
+RATIOS = {'theta_beta': ('theta', 'beta'), 'alpha_theta': ('alpha', 'theta'), 'beta_alpha': ('beta', 'alpha')}
+ROLLING_SERIES = ('calm', 'focus') + WAVE_TYPES
+ROLLING_STATS = ('mean', 'std', 'min', 'max', 'ewma')
+CHUNK_ROWS = 5000
+
+DEFAULT_OPTIONS = {
+    'window': 2.0,
+    'step': 1.0,
+    'rolling': (1.0, 10.0, 60.0),
+    'channels': 8,
+    'shard_size': 10000,
+    'format': 'npz'
+}
+
+
+def export_options(spec: Optional[Dict] = None) -> Dict:
+    """Options d'export validées et complétées (ValueError si invalides)"""
+    spec = {key: value for key, value in (spec or {}).items() if value is not None}
+    options = {**DEFAULT_OPTIONS, **{key: spec[key] for key in DEFAULT_OPTIONS if key in spec}}
+    try:
+        options['window'] = float(options['window'])
+        options['step'] = float(options['step'])
+        rolling = options['rolling']
+        if isinstance(rolling, str):
+            rolling = rolling.split(',')
+        options['rolling'] = tuple(sorted(float(seconds) for seconds in rolling))
+        options['channels'] = int(options['channels'])
+        options['shard_size'] = int(options['shard_size'])
+    except (TypeError, ValueError):
+        raise ValueError("options d'export numériques invalides")
+
+    if options['window'] <= 0 or options['step'] <= 0:
+        raise ValueError("'window' et 'step' doivent être positifs")
+    span = options['window'] / options['step']
+    if abs(span - round(span)) > 1e-9:
+        raise ValueError("'window' doit être un multiple de 'step'")
+    if options['channels'] < 1 or options['shard_size'] < 1 or not options['rolling'] \
+            or min(options['rolling']) <= 0:
+        raise ValueError("'channels', 'shard_size' et 'rolling' doivent être positifs")
+    if options['format'] not in FORMATS:
+        raise ValueError(f"format inconnu: {options['format']!r} ({', '.join(FORMATS)})")
+    if options['format'] == 'parquet' and not _parquet_engine():
+        raise ValueError("format parquet: installer pyarrow ou fastparquet")
+    return options
+
+
+def _parquet_engine() -> Optional[str]:
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(engine)
+            return engine
+        except ImportError:
+            continue
+    return None
+
+
+def feature_names(channels: int, rolling: Iterable[float]) -> List[str]:
+    """Colonnes de la matrice, dans l'ordre"""
+    names = list(WAVE_TYPES)
+    names += [f'{band}_rel' for band in WAVE_TYPES]
+    names += [f'{band}_ch{channel}' for band in WAVE_TYPES for channel in range(channels)]
+    names += list(RATIOS) + ['engagement', 'calm', 'focus']
+    names += [f'{series}_{window_label(seconds)}_{stat}'
+              for series in ROLLING_SERIES for seconds in rolling for stat in ROLLING_STATS]
+    names += ['brainwave_rows', 'artifact_fraction']
+    return names
+
+
+# ===============================================
+# FENÊTRES D'UNE SESSION (lecture en flux)
+# ===============================================
+
+class _Bucket:
+    """Accumulateurs d'un pas de ``step`` secondes"""
+
+    __slots__ = ('rows', 'band_sum', 'band_count', 'channel_sum', 'channel_count', 'calm_sum', 'calm_count',
+                 'focus_sum', 'focus_count', 'brainwave_rows', 'artifact_rows', 'marker')
+
+    def __init__(self, channels: int):
+        self.rows = 0
+        self.band_sum = np.zeros(len(WAVE_TYPES))
+        self.band_count = np.zeros(len(WAVE_TYPES))
+        self.channel_sum = np.zeros((len(WAVE_TYPES), channels))
+        self.channel_count = np.zeros((len(WAVE_TYPES), channels))
+        self.calm_sum = self.calm_count = 0.0
+        self.focus_sum = self.focus_count = 0.0
+        self.brainwave_rows = 0
+        self.artifact_rows = 0
+        self.marker = ''
+
+
+class SessionFeatures:
+    """Fenêtres glissantes d'une session: lignes CSV en entrée, vecteurs de caractéristiques en sortie"""
+
+    def __init__(self, options: Dict):
+        self.step = options['step']
+        self.span = int(round(options['window'] / self.step))
+        self.channels = options['channels']
+        self.rolling = options['rolling']
+        # Agrégats mis à jour à chaque ligne, lus seulement à la fermeture des fenêtres
+        self.rolling_windows = {series: [RollingWindow(seconds) for seconds in self.rolling]
+                                for series in ROLLING_SERIES}
+        self.buckets = deque(maxlen=self.span)
+        self.current = None
+
+    def windows(self, chunks: Iterable[pd.DataFrame]) -> Iterator[Tuple[float, float, np.ndarray, str]]:
+        """(début, fin, caractéristiques, étiquette) de chaque fenêtre complète contenant des données"""
+        for chunk in chunks:
+            times = _numeric(chunk, 'session_duration')
+            calm = _numeric(chunk, 'calm_percentage')
+            focus = _numeric(chunk, 'focus_percentage')
+            bands = np.column_stack([_numeric(chunk, f'{band}_avg') for band in WAVE_TYPES])
+            raws = [chunk[f'{band}_raw'].to_numpy() if f'{band}_raw' in chunk else None for band in WAVE_TYPES]
+            markers = _text(chunk, 'marker')
+            artifacts = _text(chunk, 'artifacts')
+
+            for i in range(len(chunk)):
+                timestamp = times[i]
+                if timestamp != timestamp:
+                    continue
+                index = int(timestamp // self.step)
+                if self.current is None:
+                    self.current = index
+                    self.buckets.append(_Bucket(self.channels))
+                while self.current < index:
+                    window = self._close()
+                    if window is not None:
+                        yield window
+                    self._advance(index)
+
+                bucket = self.buckets[-1]
+                bucket.rows += 1
+                if calm[i] == calm[i]:
+                    bucket.calm_sum += calm[i]
+                    bucket.calm_count += 1
+                    self._roll('calm', timestamp, calm[i])
+                if focus[i] == focus[i]:
+                    bucket.focus_sum += focus[i]
+                    bucket.focus_count += 1
+                    self._roll('focus', timestamp, focus[i])
+                row_bands = bands[i]
+                present = row_bands == row_bands
+                if present.any():
+                    self._add_bands(bucket, row_bands, present, raws, i, timestamp)
+                    if artifacts is not None and artifacts[i]:
+                        bucket.artifact_rows += 1
+                if markers is not None and markers[i]:
+                    bucket.marker = markers[i].split(':', 1)[0].strip()
+
+        if self.current is not None:
+            window = self._close()
+            if window is not None:
+                yield window
+
+    def _add_bands(self, bucket: _Bucket, row_bands: np.ndarray, present: np.ndarray, raws: List, i: int,
+                   timestamp: float):
+        bucket.brainwave_rows += 1
+        bucket.band_sum[present] += row_bands[present]
+        bucket.band_count[present] += 1
+        for position, band in enumerate(WAVE_TYPES):
+            if present[position]:
+                self._roll(band, timestamp, row_bands[position])
+            column = raws[position]
+            if column is None or not isinstance(column[i], str):
+                continue
+            try:
+                values = json.loads(column[i])
+            except ValueError:
+                continue
+            # Valeurs par canal seulement si tous les canaux sont présents (sinon canaux exclus, ordre inconnu)
+            if len(values) == self.channels:
+                bucket.channel_sum[position] += values
+                bucket.channel_count[position] += 1
+
+    def _roll(self, series: str, timestamp: float, value: float):
+        timestamp, value = float(timestamp), float(value)
+        for window in self.rolling_windows[series]:
+            window.add(timestamp, value)
+    
+    def _advance(self, index: int):
+        self.current += 1
+        if index - self.current >= self.span:
+            # Trou plus long qu'une fenêtre: les fenêtres intermédiaires sont vides
+            self.buckets.clear()
+            self.current = index
+        self.buckets.append(_Bucket(self.channels))
+
+    def _close(self) -> Optional[Tuple[float, float, np.ndarray, str]]:
+        """Fenêtre qui se termine avec le pas courant (None si incomplète ou vide)"""
+        if self.current < self.span - 1 or not any(bucket.rows for bucket in self.buckets):
+            return None
+        buckets = self.buckets
+        with np.errstate(divide='ignore', invalid='ignore'):
+            band = sum(b.band_sum for b in buckets) / sum(b.band_count for b in buckets)
+            relative = band / np.nansum(band)
+            channel = sum(b.channel_sum for b in buckets) / sum(b.channel_count for b in buckets)
+            ratios = [band[WAVE_TYPES.index(a)] / band[WAVE_TYPES.index(b)] for a, b in RATIOS.values()]
+            alpha, theta, beta = (band[WAVE_TYPES.index(name)] for name in ('alpha', 'theta', 'beta'))
+            engagement = beta / (alpha + theta)
+            calm = np.float64(sum(b.calm_sum for b in buckets)) / sum(b.calm_count for b in buckets)
+            focus = np.float64(sum(b.focus_sum for b in buckets)) / sum(b.focus_count for b in buckets)
+        brainwave_rows = sum(b.brainwave_rows for b in buckets)
+        artifact_fraction = sum(b.artifact_rows for b in buckets) / brainwave_rows if brainwave_rows else np.nan
+
+        rolling = []
+        for series in ROLLING_SERIES:
+            for window in self.rolling_windows[series]:
+                stats = window.stats()
+                rolling.extend(stats.get(stat, np.nan) for stat in ROLLING_STATS)
+
+        features = np.concatenate([
+            band, relative, channel.ravel(), ratios, [engagement, calm, focus], rolling,
+            [brainwave_rows, artifact_fraction]
+        ]).astype(np.float32)
+        label = next((b.marker for b in reversed(buckets) if b.marker), '')
+        start = (self.current - self.span + 1) * self.step
+        return start, (self.current + 1) * self.step, features, label
+
+
+def _numeric(chunk: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in chunk:
+        return np.full(len(chunk), np.nan)
+    return pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+
+
+def _text(chunk: pd.DataFrame, column: str) -> Optional[np.ndarray]:
+    if column not in chunk:
+        return None
+    return chunk[column].fillna('').astype(str).to_numpy()
+
+
+# ===============================================
+# EXPORT (exécuté dans les workers)
+# ===============================================
+
+def _columns() -> set:
+    columns = {'session_duration', 'calm_percentage', 'focus_percentage', 'marker', 'artifacts'}
+    columns.update(f'{band}_{suffix}' for band in WAVE_TYPES for suffix in ('avg', 'raw'))
+    return columns
+
+
+def _write_shard(path: str, options: Dict, names: List[str], session: str, rows: List) -> str:
+    starts, ends, features, labels = zip(*rows)
+    matrix = np.vstack(features)
+    if options['format'] == 'npz':
+        path += '.npz'
+        np.savez_compressed(path, X=matrix, features=np.array(names), label=np.array(labels),
+                            start=np.array(starts), end=np.array(ends), session=np.array([session] * len(rows)))
+    else:
+        path += '.parquet'
+        frame = pd.DataFrame(matrix, columns=names)
+        frame.insert(0, 'label', list(labels))
+        frame.insert(0, 'end', list(ends))
+        frame.insert(0, 'start', list(starts))
+        frame.insert(0, 'session', session)
+        frame.to_parquet(path, index=False, engine=_parquet_engine())
+    return os.path.basename(path)
+
+
+def export_session(data_directory: str, filename: str, output_directory: str, options: Dict) -> Dict:
+    """Fenêtres d'une session écrites en fragments de ``shard_size`` lignes au fil de la lecture"""
+    session = os.path.splitext(filename)[0]
+    names = feature_names(options['channels'], options['rolling'])
+    columns = _columns()
+    chunks = pd.read_csv(os.path.join(data_directory, filename), delimiter=';', chunksize=CHUNK_ROWS,
+                         usecols=lambda column: column in columns)
+
+    shards, labels, buffer, windows = [], Counter(), [], 0
+    for window in SessionFeatures(options).windows(chunks):
+        buffer.append(window)
+        windows += 1
+        if window[3]:
+            labels[window[3]] += 1
+        if len(buffer) == options['shard_size']:
+            shards.append(_write_shard(os.path.join(output_directory, f'{session}-{len(shards):04d}'),
+                                       options, names, session, buffer))
+            buffer = []
+    if buffer:
+        shards.append(_write_shard(os.path.join(output_directory, f'{session}-{len(shards):04d}'),
+                                   options, names, session, buffer))
+    return {'file': filename, 'windows': windows, 'shards': shards, 'labels': dict(labels)}
+
+
+def select_sessions(filenames: Iterable[str], start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+    """Sessions commencées dans la période (jour tiré du nom de fichier), triées"""
+    selected = []
+    for filename in sorted(filenames):
+        day = session_day(filename)
+        if day is None or not ((start and day < start) or (end and day > end)):
+            selected.append(filename)
+    return selected
+
+
+def export_features(data_directory: str, filenames: Iterable[str], output_directory: str,
+                    options: Optional[Dict] = None, workers: Optional[int] = None) -> Dict:
+    """Exporte les sessions en parallèle puis écrit manifest.json (fragments dans l'ordre des sessions)"""
+    started = time.perf_counter()
+    options = export_options(options)
+    filenames = sorted(filenames)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(filenames) or 1))
+    os.makedirs(output_directory, exist_ok=True)
+
+    results, failed = [], []
+    if workers == 1:
+        for filename in filenames:
+            try:
+                results.append(export_session(data_directory, filename, output_directory, options))
+            except Exception as e:
+                failed.append({'file': filename, 'error': str(e)})
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as executor:
+            futures = [executor.submit(export_session, data_directory, filename, output_directory, options)
+                       for filename in filenames]
+            for filename, future in zip(filenames, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    failed.append({'file': filename, 'error': str(e)})
+
+    for failure in failed:
+        logger.error(f"❌ Export impossible ({failure['file']}): {failure['error']}")
+    labels = Counter()
+    for result in results:
+        labels.update(result['labels'])
+    manifest = {
+        'version': FEATURE_VERSION,
+        'created': datetime.now().isoformat(),
+        'source': os.path.abspath(data_directory),
+        'options': {**options, 'rolling': list(options['rolling'])},
+        'features': feature_names(options['channels'], options['rolling']),
+        'rows': sum(result['windows'] for result in results),
+        'labels': dict(sorted(labels.items())),
+        'sessions': results,
+        'shards': [shard for result in results for shard in result['shards']],
+        'failed': failed,
+        'elapsed_s': round(time.perf_counter() - started, 3)
+    }
+    with open(os.path.join(output_directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    logger.info(f"🧮 Export: {len(results)} sessions, {manifest['rows']} fenêtres, "
+                f"{len(manifest['shards'])} fragments en {manifest['elapsed_s']}s → {output_directory}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export des sessions en matrices de caractéristiques (ML)")
+    parser.add_argument('data_directory', nargs='?', default='data', help='Dossier des sessions CSV')
+    parser.add_argument('--output', default='features', help='Dossier des fragments et de manifest.json')
+    parser.add_argument('--sessions', nargs='*', help='Fichiers de session (défaut: toutes les sessions)')
+    parser.add_argument('--from', dest='start', help='Premier jour (AAAA-MM-JJ)')
+    parser.add_argument('--to', dest='end', help='Dernier jour (AAAA-MM-JJ)')
+    parser.add_argument('--window', type=float, default=DEFAULT_OPTIONS['window'], help='Durée de fenêtre (s)')
+    parser.add_argument('--step', type=float, default=DEFAULT_OPTIONS['step'], help='Pas entre fenêtres (s)')
+    parser.add_argument('--rolling', default='1,10,60', help='Fenêtres glissantes de MetricsProcessor (s)')
+    parser.add_argument('--channels', type=int, default=DEFAULT_OPTIONS['channels'], help='Canaux du casque')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_OPTIONS['shard_size'], help='Fenêtres par fragment')
+    parser.add_argument('--format', choices=FORMATS, default=DEFAULT_OPTIONS['format'], help='Format des fragments')
+    parser.add_argument('--workers', type=int, default=None, help='Processus (défaut: nombre de CPU)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    try:
+        options = export_options({'window': args.window, 'step': args.step, 'rolling': args.rolling,
+                                  'channels': args.channels, 'shard_size': args.shard_size,
+                                  'format': args.format})
+        start, end = parse_day(args.start), parse_day(args.end)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    filenames = args.sessions or [f for f in os.listdir(args.data_directory) if f.endswith('.csv')]
+    filenames = select_sessions(filenames, start, end)
+    if not filenames:
+        print(f"❌ Aucune session dans {args.data_directory}")
+        return 1
+
+    manifest = export_features(args.data_directory, filenames, args.output, options, args.workers)
+    print(f"✅ {manifest['rows']} fenêtres × {len(manifest['features'])} caractéristiques, "
+          f"{len(manifest['shards'])} fragments ({manifest['elapsed_s']}s) → {args.output}")
+    if manifest['labels']:
+        print(f"🏷️ Étiquettes: {manifest['labels']}")
+    return 1 if manifest['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
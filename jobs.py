@@ -0,0 +1,213 @@
+"""
+NEUROSITY CROWN MONITOR - TÂCHES EN ARRIÈRE-PLAN
+
+Finalisation des sessions (rapport, résumé JSON) et analyses dans un pool de
+processus borné (MAX_WORKERS) : les requêtes HTTP retournent immédiatement un
+identifiant de tâche, la fin de chaque tâche est annoncée par ``on_complete``
+(événement Socket.IO ``job_completed`` côté serveur).
+
+États d'une tâche : ``pending`` (en file, workers occupés), ``running`` (prise en
+charge par un worker, ``started_at``), puis ``completed`` ou ``failed``.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from data_manager import DataManager
+
+logger = logging.getLogger('neurosity_monitor.jobs')
+
+
+# ===============================================
+# TÂCHES (exécutées dans les workers)
+# ===============================================
+
+def finalize_session(data_directory: str, csv_path: str) -> Dict:
+    """Rapport texte et résumé JSON d'une session terminée"""
+    data_manager = DataManager(data_directory)
+    csv_filename = os.path.basename(csv_path)
+    report = data_manager.generate_session_report(csv_path)
+    summary = data_manager.export_session_summary(csv_filename)
+    return {
+        'session_file': csv_path,
+        'files': [path for path in (report, summary) if path]
+    }
+
+
+def analyze_session(data_directory: str, csv_filename: str) -> Dict:
+    return DataManager(data_directory).analyze_session(csv_filename)
+
+
+def export_features(data_directory: str, filenames: List[str], output_directory: str, options: Dict) -> Dict:
+    """Matrices de caractéristiques (feature_export), sessions exportées l'une après l'autre dans le worker"""
+    from feature_export import export_features as export
+
+    manifest = export(data_directory, filenames, output_directory, options, workers=1)
+    return {
+        'output_directory': output_directory,
+        'manifest': os.path.join(output_directory, 'manifest.json'),
+        'rows': manifest['rows'],
+        'features': len(manifest['features']),
+        'labels': manifest['labels'],
+        'shards': manifest['shards'],
+        'failed': manifest['failed'],
+        'elapsed_s': manifest['elapsed_s']
+    }
+
+
+JOB_FUNCTIONS = {
+    'finalize_session': finalize_session,
+    'analyze_session': analyze_session,
+    'export_features': export_features,
+}
+
+# File des prises en charge, transmise à chaque worker à son démarrage
+_started_queue = None
+
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def run_job(kind: str, job_id: str, *args):
+    """Exécution dans un worker: signale la prise en charge au serveur puis lance la tâche"""
+    _started_queue.put((job_id, datetime.now().isoformat()))
+    return JOB_FUNCTIONS[kind](*args)
+
+
+# ===============================================
+# GESTIONNAIRE DE TÂCHES (processus serveur)
+# ===============================================
+
+class JobManager:
+    """Pool de processus partagé par tous les casques, avec suivi des tâches par identifiant"""
+
+    def __init__(self, max_workers: int = 1, history: int = 200):
+        self.max_workers = max(1, max_workers)
+        self.history = history
+        self.on_complete: Optional[Callable[[Dict], None]] = None
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._started = None
+        self._listener = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Pool créé à la première tâche: aucun worker tant que rien n'est soumis
+        if self._executor is None:
+            context = mp.get_context('spawn')
+            self._started = context.Queue()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                 initializer=_init_worker, initargs=(self._started,))
+            self._listener = threading.Thread(target=self._listen_started, args=(self._started,),
+                                              name='jobs-started', daemon=True)
+            self._listener.start()
+        return self._executor
+
+    def submit(self, kind: str, *args, device_id: Optional[str] = None, **context) -> Dict:
+        """Soumet une tâche; retourne son état initial (job_id, status='pending' jusqu'à sa prise en charge)"""
+        job = {
+            'job_id': uuid.uuid4().hex[:12],
+            'kind': kind,
+            'device_id': device_id,
+            'status': 'pending',
+            'submitted_at': datetime.now().isoformat(),
+            **context
+        }
+        with self._lock:
+            self._jobs[job['job_id']] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+
+        started = time.monotonic()
+        try:
+            future = self._get_executor().submit(run_job, kind, job['job_id'], *args)
+        except Exception as e:
+            self._finish(job, started, error=str(e))
+            return dict(job)
+
+        future.add_done_callback(lambda f: self._on_done(job, started, f))
+        logger.info(f"🧵 Tâche {kind} soumise: {job['job_id']}")
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, device_id: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        if device_id is not None:
+            jobs = [job for job in jobs if job.get('device_id') == device_id]
+        return list(reversed(jobs))
+
+    def shutdown(self, wait: bool = True):
+        """Termine les tâches en cours (finalisations de fin de session) puis arrête le pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._started.put(None)
+            self._listener.join(timeout=5)
+            self._started = self._listener = None
+
+    def _listen_started(self, started):
+        """Thread de réception: tâche prise en charge par un worker → status='running'"""
+        while True:
+            try:
+                message = started.get()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            job_id, started_at = message
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                # Fin parfois reçue avant la prise en charge: l'heure de début est gardée
+                job.setdefault('started_at', started_at)
+                if job['status'] == 'pending':
+                    job['status'] = 'running'
+
+    def _on_done(self, job: Dict, started: float, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            self._finish(job, started, error=str(e))
+            return
+        if isinstance(result, dict) and result.get('error'):
+            self._finish(job, started, result=result, error=result['error'])
+        else:
+            self._finish(job, started, result=result)
+
+    def _finish(self, job: Dict, started: float, result=None, error: Optional[str] = None):
+        with self._lock:
+            job.update({
+                'status': 'failed' if error else 'completed',
+                'result': result,
+                'error': error,
+                'finished_at': datetime.now().isoformat(),
+                'duration': round(time.monotonic() - started, 3)
+            })
+            snapshot = dict(job)
+
+        if error:
+            logger.error(f"❌ Tâche {job['kind']} {job['job_id']} en échec: {error}")
+        else:
+            logger.info(f"✅ Tâche {job['kind']} {job['job_id']} terminée ({snapshot['duration']}s)")
+
+        if self.on_complete:
+            try:
+                self.on_complete(snapshot)
+            except Exception as e:
+                logger.error(f"❌ Erreur notification tâche: {e}")
@@ -0,0 +1,295 @@
+"""
+NEUROSITY CROWN MONITOR - ENREGISTREUR DE SESSIONS
+
+Écriture CSV dans un processus dédié : la pompe de données ne fait qu'ajouter
+les échantillons à un lot en mémoire, envoyé à l'enregistreur par taille ou
+par intervalle. Un disque lent ou un stockage réseau ralentit l'enregistreur,
+jamais l'émission temps réel vers le tableau de bord.
+
+- start_session / stop_session : acquittées par l'enregistreur (fichier ouvert,
+  tous les lots précédents écrits et fichier fermé)
+- horodatage : heure de réception (pompe) de chaque échantillon et début de
+  session pris côté serveur, jamais à l'écriture différée du lot
+- instrumentation : l'enregistreur renvoie ses horodatages par lot, appliqués
+  aux métriques du serveur (csv_write, neurosity_csv_flush_seconds)
+"""
+
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from datetime import datetime
+from queue import Empty, Full
+
+from data_manager import DataManager
+from utils import instrumentation as metrics
+from config.settings import setup_logging
+
+logger = logging.getLogger('neurosity_monitor.recorder')
+
+
+def recorder_process(batch_queue, ack_queue, data_directory, process_name='recorder'):
+    """Processus d'écriture: lots d'échantillons et commandes de session, dans l'ordre d'envoi"""
+    setup_logging(process_name=process_name)
+    recorder_logger = logging.getLogger(f"neurosity_monitor.{process_name}")
+    data_manager = DataManager(data_directory)
+    # Dernière session fermée: un arrêt relancé après un délai dépassé la retrouve
+    closed_session = None
+    recorder_logger.info("Enregistreur démarré (%s)", data_directory)
+
+    while True:
+        try:
+            item = batch_queue.get(timeout=1)
+        except Empty:
+            continue
+        except (EOFError, OSError):
+            break
+
+        kind = item.get('kind')
+        if kind == 'batch':
+            start_ns = metrics.now_ns()
+            written = []
+            errors = []
+            for stream, data, metadata, get_ns, received_at in item['points']:
+                if data_manager.add_data_point(stream, data, metadata, flush=False, timestamp=received_at):
+                    written.append((stream, get_ns))
+                else:
+                    errors.append(stream)
+            # Un seul flush par lot
+            try:
+                data_manager.flush()
+            except Exception as e:
+                recorder_logger.error("Erreur flush CSV: %s", e)
+            recorder_logger.debug("📊 Lot écrit: %s lignes, %s erreurs", len(written), len(errors))
+            ack_queue.put({
+                'kind': 'stats',
+                'written': written,
+                'errors': errors,
+                'flush': (start_ns, metrics.now_ns())
+            })
+
+        elif kind == 'start':
+            try:
+                filename = data_manager.start_session(item.get('session_name'), item.get('start_time'))
+                closed_session = None
+                response = {'success': True, 'session_file': filename}
+            except Exception as e:
+                recorder_logger.error("Erreur démarrage session: %s", e)
+                response = {'success': False, 'error': str(e)}
+            ack_queue.put({'kind': 'ack', 'request_id': item['request_id'], **response})
+
+        elif kind == 'stop':
+            try:
+                if data_manager.csv_file is None and closed_session:
+                    # Session déjà fermée par un arrêt dont l'acquittement est arrivé trop tard
+                    response = {'success': True, 'session_file': closed_session}
+                else:
+                    # Rapport et résumé: finalisation en arrière-plan (jobs.py)
+                    closed_session = data_manager.stop_session(generate_report=False)
+                    data_manager.current_session = None
+                    response = {'success': True, 'session_file': closed_session}
+            except Exception as e:
+                recorder_logger.error("Erreur arrêt session: %s", e)
+                response = {'success': False, 'error': str(e)}
+            ack_queue.put({'kind': 'ack', 'request_id': item['request_id'], **response})
+
+        elif kind == 'quit':
+            if data_manager.csv_file:
+                data_manager.stop_session(generate_report=False)
+            break
+
+    recorder_logger.info("Enregistreur arrêté")
+
+
+class SessionRecorder:
+    """Côté serveur: lot en cours, envoi à l'enregistreur, acquittements et statistiques"""
+
+    def __init__(self, device_key='default', data_directory='data'):
+        self.device_key = device_key
+        self.data_directory = data_directory
+        self.batch_size = int(os.getenv('RECORDER_BATCH_SIZE', 64))
+        self.flush_interval = float(os.getenv('RECORDER_FLUSH_INTERVAL', 0.25))  # secondes
+        self.queue_size = int(os.getenv('RECORDER_QUEUE_SIZE', 1000))  # lots en attente
+
+        self.process = None
+        self.batch_queue = None
+        self.ack_queue = None
+        self.rows_written = 0
+        self.rows_dropped = 0
+
+        self._batch = []
+        self._batch_started = None
+        self._session_open = False
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._request_ids = itertools.count(1)
+        self._dispatcher = None
+        self._dispatching = False
+
+    @property
+    def alive(self):
+        return bool(self.process and self.process.is_alive())
+
+    def start(self):
+        try:
+            self.batch_queue = mp.Queue(maxsize=self.queue_size)
+            self.ack_queue = mp.Queue()
+            self.process = mp.Process(
+                target=recorder_process,
+                args=(self.batch_queue, self.ack_queue, self.data_directory, f"recorder-{self.device_key}"),
+                name=f"recorder-{self.device_key}"
+            )
+            self.process.start()
+
+            self._dispatching = True
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_acks, name=f"recorder-acks-{self.device_key}", daemon=True
+            )
+            self._dispatcher.start()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erreur démarrage enregistreur: {e}")
+            return False
+
+    def stop(self, timeout=10):
+        """Ferme la session éventuelle puis arrête le processus (lots en attente écrits)"""
+        if not self.process:
+            return
+        with self._lock:
+            self._send_batch()
+            self._session_open = False
+        try:
+            self.batch_queue.put({'kind': 'quit'}, timeout=timeout)
+        except Full:
+            pass
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._dispatching = False
+        self._fail_pending('Enregistreur arrêté')
+
+    def start_session(self, session_name=None, timeout=10):
+        """Ouvre la session CSV; retourne le fichier une fois ouvert par l'enregistreur"""
+        with self._lock:
+            # Reliquat d'une session précédente écrit avant l'ouverture
+            self._send_batch()
+        response = self._request('start', timeout, session_name=session_name, start_time=datetime.now())
+        if not response.get('success'):
+            raise RuntimeError(response.get('error', 'Erreur enregistreur'))
+        with self._lock:
+            self._session_open = True
+        return response['session_file']
+
+    def stop_session(self, timeout=30):
+        """
+        Écrit les lots en attente, ferme la session; retourne le fichier une fois fermé
+        Sans acquittement, la session reste ouverte côté serveur et l'arrêt peut être relancé
+        """
+        with self._lock:
+            self._session_open = False
+            self._send_batch()
+        response = self._request('stop', timeout)
+        if not response.get('success'):
+            with self._lock:
+                self._session_open = True
+            raise RuntimeError(response.get('error', 'Erreur enregistreur'))
+        return response['session_file']
+
+    def add(self, stream, data, metadata, get_ns):
+        """Appelé par la pompe de données: ajout au lot, sans E/S (horodaté à la réception)"""
+        with self._lock:
+            if not self._session_open:
+                return
+            received_at = datetime.now()
+            if not self._batch:
+                self._batch_started = time.monotonic()
+            self._batch.append((stream, data, metadata, get_ns, received_at))
+            if len(self._batch) >= self.batch_size:
+                self._send_batch()
+
+    def flush(self):
+        """Appelé à chaque tour de pompe: envoie le lot s'il attend depuis flush_interval"""
+        if self._batch and time.monotonic() - self._batch_started >= self.flush_interval:
+            with self._lock:
+                self._send_batch()
+
+    def pending_batches(self):
+        if self.batch_queue is None:
+            return None
+        try:
+            return self.batch_queue.qsize()
+        except NotImplementedError:
+            return None
+
+    def summary(self):
+        return {
+            'alive': self.alive,
+            'session_open': self._session_open,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+            'pending_batches': self.pending_batches()
+        }
+
+    def _send_batch(self):
+        # Appelé sous self._lock
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            self.batch_queue.put_nowait({'kind': 'batch', 'points': batch})
+        except (Full, AttributeError):
+            # Enregistreur saturé ou absent: le lot est perdu, l'émission n'attend pas
+            self.rows_dropped += len(batch)
+            for stream, *_ in batch:
+                metrics.DROPPED_TOTAL.labels(self.device_key, stream, 'recorder_full').inc()
+
+    def _request(self, kind, timeout, **params):
+        if not self.alive:
+            return {'success': False, 'error': 'Enregistreur non démarré'}
+        future = concurrent.futures.Future()
+        request_id = next(self._request_ids)
+        self._pending[request_id] = future
+        try:
+            self.batch_queue.put({'kind': kind, 'request_id': request_id, **params}, timeout=timeout)
+            return future.result(timeout=timeout)
+        except (Full, concurrent.futures.TimeoutError):
+            return {'success': False, 'error': f"pas d'acquittement de l'enregistreur après {timeout}s"}
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _fail_pending(self, error):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_result({'success': False, 'error': error})
+
+    def _dispatch_acks(self):
+        """Thread de réception: acquittements de session et statistiques d'écriture"""
+        while self._dispatching:
+            try:
+                message = self.ack_queue.get(timeout=0.5)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if message.get('kind') == 'stats':
+                self._apply_stats(message)
+            elif message.get('kind') == 'ack':
+                future = self._pending.get(message.pop('request_id', None))
+                if future is not None and not future.done():
+                    future.set_result(message)
+
+    def _apply_stats(self, stats):
+        flush_start, flush_end = stats['flush']
+        metrics.CSV_FLUSH_LATENCY.labels().observe_ns(flush_start, flush_end)
+        for stream, get_ns in stats['written']:
+            # csv_write: sortie de queue → lot écrit et flushé par l'enregistreur
+            metrics.RECORDED_TOTAL.labels(self.device_key, stream).inc()
+            metrics.STAGE_LATENCY.labels(self.device_key, stream, 'csv_write').observe_ns(get_ns, flush_end)
+        for stream in stats['errors']:
+            metrics.DROPPED_TOTAL.labels(self.device_key, stream, 'recording_error').inc()
+        self.rows_written += len(stats['written'])
@@ -3,12 +3,16 @@
  * Interface utilisateur adaptée à la détection biologique réelle
  */
 
+// Le worker de données est chargé à côté de ce script
+const APP_SCRIPT_URL = document.currentScript ? document.currentScript.src : '/static/js/app.js';
+
 // État global de l'application
 window.AppState = {
     isConnected: false,
     isRecording: false,
     isMonitoring: false,
     socket: null,
+    dataWorker: null,
     chart: null,
     deviceStatus: {
         online: false,
@@ -18,7 +22,17 @@ window.AppState = {
     },
     connectionHealth: true,
     lastDataTime: null,
-    detectionInProgress: false
+    detectionInProgress: false,
+    // Rendu par image d'animation: tampons des graphiques et dernières valeurs des jauges
+    render: {
+        buffers: {},
+        pending: {},
+        frameRequested: false,
+        frames: 0,
+        samples: 0,
+        since: 0,
+        fps: 0
+    }
 };
 
 /**
@@ -29,6 +43,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     initializeUI();
     initializeCharts();
+    initializeRenderer();
     initializeWebSocket();
     loadSessions();
 
@@ -184,7 +199,7 @@ function initializeWebSocket() {
     console.log('🔌 Initialisation WebSocket avec détection du casque...');
 
     try {
-        window.AppState.socket = io({
+        window.AppState.socket = createDataSocket({
             transports: ['polling', 'websocket'],
             timeout: 30000,  // Timeout plus long pour la détection
             reconnection: true,
@@ -207,10 +222,8 @@ function initializeWebSocket() {
             showToast('❌ Erreur de connexion WebSocket', 'error');
         });
 
-        // Données en temps réel
-        window.AppState.socket.on('calm_data', handleCalmData);
-        window.AppState.socket.on('focus_data', handleFocusData);
-        window.AppState.socket.on('brainwaves_data', handleBrainwavesData);
+        // Données en temps réel (calm_data, focus_data, brainwaves_data, backfill):
+        // décodées et agrégées par le worker, reçues dans handleWorkerMessage
 
         // Messages de statut
         window.AppState.socket.on('status', function(data) {
@@ -218,6 +231,7 @@ function initializeWebSocket() {
             if (data.device_status) {
                 updateDeviceStatus(data.device_status);
             }
+            updateChannelQuality(data.signal_quality);
         });
 
         window.AppState.socket.on('status_update', function(data) {
@@ -239,6 +253,8 @@ function initializeWebSocket() {
         window.AppState.socket.on('monitoring_stopped', function() {
             showToast('⏹️ Monitoring arrêté', 'info');
             window.AppState.isMonitoring = false;
+            window.AppState.signalQuality = null;
+            updateChannelQuality(null);
             updateMonitoringStatus(false);
             updateConnectionStatus(window.AppState.isConnected, window.AppState.isRecording, false);
         });
@@ -256,6 +272,36 @@ function initializeWebSocket() {
             updateConnectionHealth(true);
         });
 
+        window.AppState.socket.on('acquisition_restarted', function(data) {
+            if (data.restored) {
+                showToast(`🔁 Acquisition redémarrée (${data.reason}), interruption de ${data.gap_seconds}s`, 'warning', 6000);
+            } else {
+                showToast('❌ Acquisition redémarrée mais casque non reconnecté', 'error');
+            }
+            updateConnectionStatus(data.connected, data.recording, data.monitoring);
+        });
+
+        // Qualité du signal par canal (publiée seulement quand elle change)
+        window.AppState.socket.on('signal_quality', handleSignalQuality);
+
+        // Alertes des règles déclaratives (config/rules.json)
+        window.AppState.socket.on('alert', function(alert) {
+            const types = { info: 'info', warning: 'warning', critical: 'error' };
+            showToast(`🚨 ${alert.message}`, types[alert.severity] || 'info', 6000);
+        });
+
+        // Tâches en arrière-plan (finalisation et analyse des sessions)
+        window.AppState.socket.on('job_completed', function(job) {
+            if (job.status === 'completed') {
+                if (job.kind === 'finalize_session') {
+                    showToast('📄 Rapport de session prêt', 'success', 3000);
+                    loadSessions();
+                }
+            } else {
+                showToast(`❌ Tâche ${job.kind} en échec: ${job.error}`, 'error');
+            }
+        });
+
         window.AppState.socket.on('device_status_response', function(data) {
             console.log('Statut dispositif:', data);
             if (data.device_status) {
@@ -454,6 +500,36 @@ function stopMonitoring() {
     }
 }
 
+/**
+ * Qualité du signal par canal: état global du casque et électrodes à repositionner
+ */
+function handleSignalQuality(quality) {
+    window.AppState.signalQuality = quality;
+    updateDeviceStatus({ ...window.AppState.deviceStatus, signal: quality.signal });
+    updateChannelQuality(quality);
+
+    const degraded = quality.channels.filter((channel, i) => quality.states[i] === 'poor' || quality.states[i] === 'flat');
+    if (degraded.length) {
+        showToast(`📶 Vérifiez le contact des électrodes: ${degraded.join(', ')}`, 'warning', 6000);
+    }
+}
+
+function updateChannelQuality(quality) {
+    const element = document.getElementById('systemChannelQuality');
+    if (!element) return;
+
+    if (!quality) {
+        element.textContent = '-- --';
+        element.title = '';
+        return;
+    }
+
+    const emoji = { good: '🟢', fair: '🟡', poor: '🟠', flat: '⚫' };
+    element.textContent = quality.channels.map((channel, i) => `${emoji[quality.states[i]] || '🔴'} ${channel}`).join('  ');
+    element.title = quality.channels.map((channel, i) =>
+        `${channel}: ${quality.std_uv[i]} μV, secteur ${Math.round(quality.line_ratio[i] * 100)} %`).join('\n');
+}
+
 /**
  * Met à jour le statut du dispositif avec informations de validation
  */
@@ -485,6 +561,7 @@ function updateDeviceStatus(deviceStatus) {
                     'excellent': '🟢',
                     'good': '🟡',
                     'poor': '🟠',
+                    'no_contact': '⚫',
                     'biological_data_confirmed': '🔬'
                 }[deviceStatus.signal] || '🔴';
                 statusText += ` ${signalEmoji}`;
@@ -686,9 +763,163 @@ function initializeCharts() {
         }
     });
 
+    registerChartBuffers('brainwaves', window.AppState.chart);
     console.log('✅ Graphiques créés avec validation');
 }
 
+/**
+ * Rendu des graphiques et jauges
+ * Les échantillons sont accumulés dans des tampons circulaires (Float64Array) et
+ * les dernières valeurs des jauges mises de côté; chaque graphique est redessiné
+ * au plus une fois par image d'animation, jamais quand l'onglet est masqué.
+ */
+const CHART_POINTS = 50;
+
+class RingBuffer {
+    constructor(capacity) {
+        this.values = new Float64Array(capacity);
+        this.start = 0;
+        this.length = 0;
+    }
+
+    push(value) {
+        const capacity = this.values.length;
+        this.values[(this.start + this.length) % capacity] = value;
+        if (this.length < capacity) {
+            this.length++;
+        } else {
+            this.start = (this.start + 1) % capacity;
+        }
+    }
+
+    clear() {
+        this.start = 0;
+        this.length = 0;
+    }
+
+    // Valeurs dans l'ordre chronologique (transformées par map si fourni)
+    toArray(map) {
+        const result = new Array(this.length);
+        for (let i = 0; i < this.length; i++) {
+            const value = this.values[(this.start + i) % this.values.length];
+            result[i] = map ? map(value) : value;
+        }
+        return result;
+    }
+}
+
+function initializeRenderer() {
+    const render = window.AppState.render;
+    render.since = performance.now();
+
+    // Onglet de nouveau visible: un seul dessin avec tout ce qui a été reçu entre-temps
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) scheduleRender();
+    });
+
+    // Images par seconde mesurées (dessins effectifs), affichées sous le graphique
+    setInterval(() => {
+        const now = performance.now();
+        const elapsed = (now - render.since) / 1000;
+        render.fps = render.frames / elapsed;
+        const element = document.getElementById('brainwavesRender');
+        if (element) {
+            element.textContent = document.hidden
+                ? 'Rendu: onglet masqué'
+                : `Rendu: ${render.fps.toFixed(1)} img/s · ${Math.round(render.samples / elapsed)} échantillons/s`;
+        }
+        render.frames = 0;
+        render.samples = 0;
+        render.since = now;
+    }, 1000);
+}
+
+function registerChartBuffers(name, chart) {
+    window.AppState.render.buffers[name] = {
+        chart: chart,
+        times: new RingBuffer(CHART_POINTS),
+        series: chart.data.datasets.map(() => new RingBuffer(CHART_POINTS)),
+        dirty: false
+    };
+}
+
+function pushChartSample(name, time, values) {
+    const buffer = window.AppState.render.buffers[name];
+    if (!buffer) return;
+
+    buffer.times.push(time);
+    values.forEach((value, index) => buffer.series[index].push(value));
+    buffer.dirty = true;
+    scheduleRender();
+}
+
+// Dernier événement par type, appliqué au DOM à la prochaine image
+function queueUpdate(type, data) {
+    window.AppState.render.pending[type] = data;
+    scheduleRender();
+}
+
+function scheduleRender() {
+    const render = window.AppState.render;
+    if (render.frameRequested || document.hidden) return;
+    render.frameRequested = true;
+    requestAnimationFrame(renderFrame);
+}
+
+function renderFrame() {
+    const render = window.AppState.render;
+    render.frameRequested = false;
+    if (document.hidden) return;
+
+    let drawn = false;
+    Object.values(render.buffers).forEach(buffer => {
+        if (!buffer.dirty) return;
+        buffer.dirty = false;
+
+        // Libellés à la seconde: formatés une fois par seconde distincte
+        let second = null;
+        let label = '--';
+        buffer.chart.data.labels = buffer.times.toArray(time => {
+            if (Math.floor(time / 1000) !== second) {
+                second = Math.floor(time / 1000);
+                label = formatTime(time);
+            }
+            return label;
+        });
+        buffer.series.forEach((series, index) => {
+            buffer.chart.data.datasets[index].data = series.toArray();
+        });
+        buffer.chart.update('none');
+        drawn = true;
+    });
+
+    const pending = render.pending;
+    render.pending = {};
+    Object.entries(pending).forEach(([type, data]) => {
+        applyUpdate(type, data);
+        drawn = true;
+    });
+
+    if (drawn) render.frames++;
+}
+
+function applyUpdate(type, data) {
+    if (type === 'brainwaves') {
+        const timestampElement = document.getElementById('brainwavesTimestamp');
+        if (timestampElement) {
+            const contaminated = Object.keys(data.artifacts || {});
+            timestampElement.textContent = 'Dernière validation: ' + formatTimestamp(data.timestamp) +
+                (contaminated.length ? ` · artefacts: ${contaminated.join(', ')}` : '');
+        }
+        updateBandTrends(data.trends);
+    } else {
+        updateCircularProgress(type, data[type], data.timestamp);
+        updateRollingWindows(type, data.windows);
+        updateTrend(type, data.trends);
+    }
+    flashDataIndicator(type);
+}
+
 /**
  * Gère l'enregistrement
  */
@@ -723,6 +954,8 @@ async function toggleRecording() {
                 setTimeout(loadSessions, 1000);
             }
         } else {
+            // Arrêt non confirmé: le serveur indique si l'enregistrement est toujours actif
+            if (typeof result.recording === 'boolean') window.AppState.isRecording = result.recording;
             showToast('❌ Erreur enregistrement: ' + (result.error || 'Erreur inconnue'), 'error');
         }
 
@@ -822,60 +1055,76 @@ function updateConnectionStatus(connected, recording, monitoring) {
 }
 
 /**
- * Gestionnaires des données en temps réel
+ * Socket.IO dans le worker de données (static/js/data_worker.js)
+ * Le thread principal garde l'interface socket.on / socket.emit: les événements
+ * de contrôle sont relayés par le worker, les flux de données arrivent en lots
+ * de tableaux typés déjà moyennés et sous-échantillonnés.
  */
-function handleCalmData(data) {
-    if (!window.AppState.isConnected) return;
+function createDataSocket(options) {
+    const handlers = {};
+    const worker = new Worker(new URL('data_worker.js', APP_SCRIPT_URL));
+    const socketio = document.querySelector('script[src*="socket.io"]');
+
+    worker.onmessage = event => handleWorkerMessage(event.data, handlers);
+    worker.onerror = error => {
+        console.error('❌ Erreur worker de données:', error);
+        showToast('❌ Erreur du worker de données - rechargez la page', 'error');
+    };
+    worker.postMessage({
+        type: 'connect',
+        socketio: socketio.src,
+        origin: window.location.origin,
+        options: options,
+        resolution: 1000 / 4,  // un point du graphique par fenêtre de 250 ms
+        flushInterval: 50
+    });
+    window.AppState.dataWorker = worker;
 
-    window.AppState.lastDataTime = new Date();
-    updateCircularProgress('calm', data.calm, data.timestamp);
-    flashDataIndicator('calm');
+    return {
+        on(event, handler) {
+            if (!handlers[event]) {
+                handlers[event] = [];
+                worker.postMessage({ type: 'subscribe', event: event });
+            }
+            handlers[event].push(handler);
+        },
+        emit(event, data) {
+            worker.postMessage({ type: 'emit', event: event, data: data });
+        }
+    };
 }
 
-function handleFocusData(data) {
-    if (!window.AppState.isConnected) return;
-
-    window.AppState.lastDataTime = new Date();
-    updateCircularProgress('focus', data.focus, data.timestamp);
-    flashDataIndicator('focus');
+function handleWorkerMessage(message, handlers) {
+    switch (message.type) {
+        case 'event':
+            if (message.event === 'worker_error') {
+                console.error('❌ Worker de données:', message.data.message);
+            }
+            (handlers[message.event] || []).forEach(handler => handler(message.data));
+            break;
+        case 'batch':
+            handleDataBatch(message);
+            break;
+        case 'history':
+            applyHistory(message.series);
+            break;
+    }
 }
 
-function handleBrainwavesData(data) {
-    if (!window.AppState.isConnected || !window.AppState.chart) return;
+/**
+ * Lot du worker: points du graphique (Float64Array) et dernier événement par type
+ */
+function handleDataBatch(batch) {
+    if (!window.AppState.isConnected) return;
 
     window.AppState.lastDataTime = new Date();
+    window.AppState.render.samples += batch.received;
 
-    const time = formatTime(data.timestamp);
-    const chart = window.AppState.chart;
-
-    const avgData = {
-        delta: calculateAverage(data.delta),
-        theta: calculateAverage(data.theta),
-        alpha: calculateAverage(data.alpha),
-        beta: calculateAverage(data.beta),
-        gamma: calculateAverage(data.gamma)
-    };
-
-    chart.data.labels.push(time);
-    chart.data.datasets[0].data.push(avgData.delta);
-    chart.data.datasets[1].data.push(avgData.theta);
-    chart.data.datasets[2].data.push(avgData.alpha);
-    chart.data.datasets[3].data.push(avgData.beta);
-    chart.data.datasets[4].data.push(avgData.gamma);
-
-    if (chart.data.labels.length > 50) {
-        chart.data.labels.shift();
-        chart.data.datasets.forEach(dataset => dataset.data.shift());
-    }
-
-    chart.update('none');
-
-    const timestampElement = document.getElementById('brainwavesTimestamp');
-    if (timestampElement) {
-        timestampElement.textContent = 'Dernière validation: ' + formatTimestamp(data.timestamp);
+    const { times, values } = batch.brainwaves;
+    for (let i = 0; i < times.length; i++) {
+        pushChartSample('brainwaves', times[i], values.map(series => series[i]));
     }
-
-    flashDataIndicator('brainwaves');
+    Object.entries(batch.latest).forEach(([type, data]) => queueUpdate(type, data));
 }
 
 /**
@@ -888,11 +1137,14 @@ function flashDataIndicator(type) {
         'brainwaves': document.querySelector('.chart-card')
     };
 
+    // Un seul flash en cours par carte, quel que soit le débit
     const element = elements[type];
-    if (element) {
+    if (element && !element.dataset.flashing) {
+        element.dataset.flashing = 'true';
         element.style.boxShadow = '0 0 20px rgba(139, 92, 246, 0.4)';
         setTimeout(() => {
             element.style.boxShadow = '';
+            delete element.dataset.flashing;
         }, 300);
     }
 }
@@ -923,6 +1175,76 @@ function updateCircularProgress(type, value, timestamp) {
     }
 }
 
+/**
+ * Agrégats glissants calculés par le serveur (ex: {"10s": {mean, std, ...}, "60s": {...}})
+ */
+function updateRollingWindows(type, windows) {
+    const element = document.getElementById(`${type}Windows`);
+    if (!element || !windows) return;
+
+    element.textContent = Object.entries(windows)
+        .filter(([, stats]) => stats.count > 1)
+        .map(([label, stats]) => `${label}: ${Math.round(stats.mean)}% ±${Math.round(stats.std)}`)
+        .join(' · ') || '--';
+}
+
+/**
+ * Tendances calculées par le serveur (ex: {"10s": {direction, slope, confidence, ...}, "60s": {...}})
+ * L'hystérésis est appliquée côté serveur: l'indicateur est affiché tel quel
+ */
+const TREND_ARROWS = { ascending: '↗', descending: '↘', stable: '→' };
+
+function updateTrend(type, trends) {
+    const element = document.getElementById(`${type}Trend`);
+    if (!element || !trends) return;
+
+    element.textContent = Object.entries(trends)
+        .map(([label, trend]) => `${label} ${TREND_ARROWS[trend.direction] || '→'} ${Math.round(trend.confidence * 100)}%`)
+        .join(' · ') || '--';
+}
+
+function updateBandTrends(trends) {
+    const element = document.getElementById('brainwavesTrends');
+    if (!element || !trends) return;
+
+    element.textContent = Object.entries(trends)
+        .map(([band, windows]) => {
+            const trend = Object.values(windows)[0];
+            return trend ? `${band} ${TREND_ARROWS[trend.direction] || '→'}` : null;
+        })
+        .filter(Boolean)
+        .join(' · ') || '--';
+}
+
+/**
+ * Graphique et jauges pré-remplis: un onglet ouvert en cours de session ne part pas de zéro
+ */
+function applyHistory(series) {
+    const bands = ['delta', 'theta', 'alpha', 'beta', 'gamma'];
+    const buffer = window.AppState.render.buffers.brainwaves;
+    const reference = series['brainwaves.delta'];
+
+    // Séries décodées par le worker: {times (ms), values} en Float64Array
+    if (buffer && reference && reference.times.length) {
+        buffer.times.clear();
+        buffer.series.forEach(ring => ring.clear());
+        for (let i = Math.max(reference.times.length - CHART_POINTS, 0); i < reference.times.length; i++) {
+            pushChartSample('brainwaves', reference.times[i], bands.map(band => {
+                const values = series[`brainwaves.${band}`];
+                return values && i < values.values.length ? values.values[i] : NaN;
+            }));
+        }
+    }
+
+    ['calm', 'focus'].forEach(type => {
+        const points = series[type];
+        if (points && points.times.length) {
+            const last = points.times.length - 1;
+            updateCircularProgress(type, points.values[last], points.times[last]);
+        }
+    });
+}
+
 /**
  * Charge la liste des sessions
  */
@@ -1046,16 +1368,24 @@ function updateSystemStatus(connected, monitoring, deviceStatus) {
             let signalBg = 'rgba(239, 68, 68, 0.1)';
             let signalEmoji = '🔴';
 
-            if (validation === 'biological_data_confirmed_v2') {
+            // Qualité mesurée sur l'EEG brut pendant le monitoring, sinon résultat de la détection
+            const measured = {
+                excellent: { text: 'Excellent', color: '#059669', bg: 'rgba(16, 185, 129, 0.1)', emoji: '🟢' },
+                good: { text: 'Bon', color: '#ca8a04', bg: 'rgba(234, 179, 8, 0.1)', emoji: '🟡' },
+                poor: { text: 'Médiocre', color: '#ea580c', bg: 'rgba(249, 115, 22, 0.1)', emoji: '🟠' },
+                no_contact: { text: 'Aucun contact', color: '#dc2626', bg: 'rgba(239, 68, 68, 0.1)', emoji: '⚫' }
+            }[signal];
+
+            if (measured) {
+                signalText = measured.text;
+                signalColor = measured.color;
+                signalBg = measured.bg;
+                signalEmoji = measured.emoji;
+            } else if (validation === 'biological_data_confirmed_v2') {
                 signalText = 'Données Biologiques ✓';
                 signalColor = '#8b5cf6';
                 signalBg = 'rgba(139, 92, 246, 0.1)';
                 signalEmoji = '🔬';
-            } else if (signal === 'excellent') {
-                signalText = 'Excellent';
-                signalColor = '#059669';
-                signalBg = 'rgba(16, 185, 129, 0.1)';
-                signalEmoji = '🟢';
             }
 
             elements.signal.textContent = `${signalEmoji} ${signalText}`;
@@ -1116,13 +1446,6 @@ setInterval(checkDeviceStatus, 30000);
 /**
  * Fonctions utilitaires
  */
-function calculateAverage(array) {
-    if (!array || array.length === 0) return 0;
-    const validNumbers = array.filter(val => typeof val === 'number' && !isNaN(val));
-    if (validNumbers.length === 0) return 0;
-    return validNumbers.reduce((a, b) => a + b, 0) / validNumbers.length;
-}
-
 function formatTimestamp(timestamp) {
     if (!timestamp) return '--';
     try {
@@ -0,0 +1,198 @@
+/**
+ * WORKER DE DONNÉES NEUROSITY MONITOR
+ * Connexion Socket.IO hors du thread d'interface: décodage des messages (JSON et
+ * backfill binaire), moyenne des canaux, agrégation par fenêtres de temps et
+ * sous-échantillonnage. Le thread principal reçoit des tableaux typés prêts à
+ * dessiner (transférés, sans copie) et les événements de contrôle tels quels.
+ *
+ * Messages reçus:  {type: 'connect', socketio, origin, options, resolution, flushInterval}
+ *                  {type: 'subscribe', event} · {type: 'emit', event, data}
+ * Messages émis:   {type: 'event', event, data} · {type: 'batch', ...} · {type: 'history', series}
+ */
+
+const BANDS = ['delta', 'theta', 'alpha', 'beta', 'gamma'];
+const GAUGES = ['calm', 'focus'];
+
+const state = {
+    socket: null,
+    resolution: 250,      // ms par point du graphique (fenêtre d'agrégation)
+    flushInterval: 50,    // ms entre deux lots envoyés au thread principal
+    flushTimer: null,
+    bucket: null,         // fenêtre en cours: {key, time, sums, count, opened}
+    points: [],           // fenêtres fermées en attente d'envoi: [time, delta, ..., gamma]
+    latest: {},           // dernier événement par type (jauges, textes)
+    received: 0
+};
+
+self.onmessage = function(event) {
+    const message = event.data;
+    switch (message.type) {
+        case 'connect':
+            connect(message);
+            break;
+        case 'subscribe':
+            // Événements de contrôle relayés tels quels (Error non clonable: message seul)
+            state.socket.on(message.event, data => {
+                self.postMessage({
+                    type: 'event',
+                    event: message.event,
+                    data: data instanceof Error ? { message: data.message } : data
+                });
+            });
+            break;
+        case 'emit':
+            state.socket.emit(message.event, message.data);
+            break;
+    }
+};
+
+function connect(message) {
+    importScripts(message.socketio);
+    state.resolution = message.resolution || state.resolution;
+    state.flushInterval = message.flushInterval || state.flushInterval;
+    state.socket = io(message.origin, message.options);
+
+    GAUGES.forEach(type => {
+        state.socket.on(`${type}_data`, data => {
+            state.latest[type] = withAggregates({ timestamp: data.timestamp, [type]: data[type] }, data, state.latest[type]);
+            received();
+        });
+    });
+    state.socket.on('brainwaves_data', addBrainwaves);
+    state.socket.on('backfill', payload => {
+        try {
+            const series = decodeBackfill(payload);
+            self.postMessage({ type: 'history', series }, transferables(series));
+        } catch (error) {
+            self.postMessage({ type: 'event', event: 'worker_error', data: { message: `backfill: ${error.message}` } });
+        }
+    });
+}
+
+/**
+ * Puissances par bande: moyenne des canaux puis moyenne par fenêtre de `resolution` ms
+ */
+function addBrainwaves(data) {
+    const time = typeof data.timestamp === 'number' ? data.timestamp : Date.parse(data.timestamp);
+    const key = Math.floor(time / state.resolution);
+    if (state.bucket && state.bucket.key !== key) closeBucket();
+    if (!state.bucket) {
+        state.bucket = { key, time, sums: new Float64Array(BANDS.length), count: 0, opened: performance.now() };
+    }
+
+    const bucket = state.bucket;
+    BANDS.forEach((band, index) => {
+        bucket.sums[index] += average(data[band]);
+    });
+    bucket.count++;
+    bucket.time = time;
+
+    // Les valeurs par canal restent dans le worker: seul le texte d'état est transmis
+    state.latest.brainwaves = withAggregates({ timestamp: data.timestamp, artifacts: data.artifacts }, data, state.latest.brainwaves);
+    received();
+}
+
+/**
+ * Agrégats (windows, trends) publiés par intervalles: ceux d'un événement précédent
+ * du même lot sont conservés si l'événement courant n'en porte pas
+ */
+function withAggregates(latest, data, previous) {
+    latest.windows = data.windows || (previous && previous.windows);
+    latest.trends = data.trends || (previous && previous.trends);
+    return latest;
+}
+
+function closeBucket() {
+    const bucket = state.bucket;
+    const point = [bucket.time];
+    bucket.sums.forEach(sum => point.push(sum / bucket.count));
+    state.points.push(point);
+    state.bucket = null;
+}
+
+function received() {
+    state.received++;
+    if (state.flushTimer === null) {
+        state.flushTimer = setTimeout(flush, state.flushInterval);
+    }
+}
+
+function flush() {
+    state.flushTimer = null;
+    // Fenêtre ouverte depuis plus d'une résolution: envoyée sans attendre l'échantillon suivant
+    if (state.bucket && performance.now() - state.bucket.opened >= state.resolution) closeBucket();
+
+    const count = state.points.length;
+    const times = new Float64Array(count);
+    const values = BANDS.map(() => new Float64Array(count));
+    state.points.forEach((point, index) => {
+        times[index] = point[0];
+        values.forEach((series, band) => {
+            series[index] = point[band + 1];
+        });
+    });
+
+    self.postMessage({
+        type: 'batch',
+        brainwaves: { times, values },
+        latest: state.latest,
+        received: state.received
+    }, [times.buffer, ...values.map(series => series.buffer)]);
+
+    state.points = [];
+    state.latest = {};
+    state.received = 0;
+    // Fenêtre encore ouverte: prochain envoi planifié pour la fermer
+    if (state.bucket) state.flushTimer = setTimeout(flush, state.flushInterval);
+}
+
+function average(values) {
+    if (!values || values.length === 0) return 0;
+    let sum = 0;
+    let count = 0;
+    for (let i = 0; i < values.length; i++) {
+        const value = values[i];
+        if (typeof value === 'number' && !isNaN(value)) {
+            sum += value;
+            count++;
+        }
+    }
+    return count ? sum / count : 0;
+}
+
+/**
+ * Backfill binaire envoyé à la connexion (dernières secondes de chaque flux)
+ * Format: "NBF1" | uint32 taille en-tête | en-tête JSON | par série, décalages
+ * depuis t0 puis valeurs en float32 little-endian
+ * Retourne {série: {times: Float64Array (ms), values: Float64Array}}
+ */
+function decodeBackfill(payload) {
+    const bytes = payload instanceof ArrayBuffer
+        ? new Uint8Array(payload)
+        : new Uint8Array(payload.buffer, payload.byteOffset, payload.byteLength);
+    // Copie alignée: un Float32Array exige un décalage multiple de 4
+    const buffer = bytes.slice().buffer;
+
+    if (String.fromCharCode(...bytes.subarray(0, 4)) !== 'NBF1') {
+        throw new Error('format de backfill inconnu');
+    }
+    const headerLength = new DataView(buffer).getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+
+    let offset = 8 + headerLength;
+    const series = {};
+    header.series.forEach(({ name, count }) => {
+        const offsets = new Float32Array(buffer, offset, count);
+        const times = new Float64Array(count);
+        offsets.forEach((value, index) => {
+            times[index] = (header.t0 + value) * 1000;
+        });
+        series[name] = { times, values: Float64Array.from(new Float32Array(buffer, offset + count * 4, count)) };
+        offset += count * 8;
+    });
+    return series;
+}
+
+function transferables(series) {
+    return Object.values(series).flatMap(({ times, values }) => [times.buffer, values.buffer]);
+}
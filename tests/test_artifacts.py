@@ -0,0 +1,66 @@
+"""Régressions du détecteur d'artefacts (utils/artifacts.py)"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.artifacts import ArtifactDetector  # noqa: E402
+
+SAMPLING_RATE = 256
+EPOCH = 16
+CHANNELS = 8
+
+
+def flagged_epochs(detector, signal):
+    """Marqueurs par (canal, époque): True si un échantillon de l'époque est marqué"""
+    return np.array([detector.scan(signal[:, start:start + EPOCH]).any(axis=1)
+                     for start in range(0, signal.shape[1], EPOCH)]).T
+
+
+def eeg(seconds, rng):
+    return rng.normal(0, 10.0, (CHANNELS, int(seconds * SAMPLING_RATE)))
+
+
+def test_signal_after_flat_warmup_is_not_flagged_forever():
+    rng = np.random.default_rng(1)
+    signal = np.concatenate([np.zeros((CHANNELS, 2 * SAMPLING_RATE)), eeg(30, rng)], axis=1)
+    detector = ArtifactDetector(SAMPLING_RATE)
+    flags = flagged_epochs(detector, signal)
+
+    # Après réamorçage (2 s), les canaux redeviennent exploitables
+    tail = flags[:, -(20 * SAMPLING_RATE // EPOCH):]
+    assert tail.mean() < 0.05
+    assert detector.stats()['reseeded_channels'] >= CHANNELS
+
+
+def test_dc_step_exclusion_is_bounded():
+    rng = np.random.default_rng(2)
+    signal = eeg(40, rng)
+    step = 10 * SAMPLING_RATE
+    signal[0, step:] += 300.0
+    detector = ArtifactDetector(SAMPLING_RATE)
+    flags = flagged_epochs(detector, signal)
+
+    epochs_per_second = SAMPLING_RATE // EPOCH
+    assert flags[0, step // EPOCH]
+    # Le saut est marqué puis le canal revient après au plus reseed_seconds (+ marge)
+    assert not flags[0, step // EPOCH + 4 * epochs_per_second:].any()
+    assert not flags[1:, step // EPOCH:].any()
+
+
+def test_all_channels_bad_frame_is_excluded_but_not_forever():
+    rng = np.random.default_rng(3)
+    signal = eeg(20, rng)
+    signal[:, 5 * SAMPLING_RATE:] += 300.0
+    detector = ArtifactDetector(SAMPLING_RATE)
+    flags = flagged_epochs(detector, signal)
+
+    frames = [detector.annotate({'channels': [f'CH{i}' for i in range(CHANNELS)],
+                                 'alpha': [1.0] * CHANNELS,
+                                 'artifact_flags': flags[:, index].astype(np.uint8).tolist()}, ('alpha',))
+              for index in range(flags.shape[1])]
+    assert frames[5 * SAMPLING_RATE // EPOCH] is None
+    assert all(frame is not None for frame in frames[-10 * SAMPLING_RATE // EPOCH:])
@@ -0,0 +1,34 @@
+"""Publication des agrégats glissants (utils/neurosity_helper.py MetricsProcessor)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.neurosity_helper import MetricsProcessor  # noqa: E402
+
+BANDS = {wave_type: [1.0, 3.0] for wave_type in ('delta', 'theta', 'alpha', 'beta', 'gamma')}
+
+
+def test_publish_is_throttled_but_aggregates_every_sample():
+    processor = MetricsProcessor(windows=(1.0,), trend_windows=(10.0,), publish_interval=0.25)
+    published = [processor.publish('calm', float(i), i / 16) for i in range(16)]
+
+    # 16 Hz pendant une seconde: une publication tous les 4 échantillons
+    assert [i for i, payload in enumerate(published) if payload] == [0, 4, 8, 12]
+    assert set(published[12]) == {'windows', 'trends'}
+    assert processor.window_stats('calm')['1s']['count'] == 16
+    assert processor.session['calm']['count'] == 16
+
+
+def test_publish_bands_matches_update_bands():
+    throttled = MetricsProcessor(windows=(1.0,), publish_interval=0.25)
+    reference = MetricsProcessor(windows=(1.0,))
+    for i in range(8):
+        throttled.publish_bands(BANDS, i / 16)
+        reference.update_bands(BANDS, i / 16)
+
+    payload = throttled.publish_bands(BANDS, 8 / 16)
+    expected = reference.update_bands(BANDS, 8 / 16)
+    assert payload['windows'] == expected
+    assert set(payload['trends']) == set(BANDS)
@@ -0,0 +1,29 @@
+"""Arrêt du suivi mémoire (utils/profiling.py MemoryProfiler)"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.profiling import MemoryProfiler  # noqa: E402
+
+
+def test_stop_ends_tracing():
+    profiler = MemoryProfiler(window=0)
+    assert profiler.snapshot()['tracing_started']
+    assert profiler.stop() == {'tracing_stopped': True}
+    assert not tracemalloc.is_tracing()
+    assert profiler.stop() == {'tracing_stopped': False}
+
+
+def test_tracing_stops_after_window_without_snapshot():
+    profiler = MemoryProfiler(window=0.2)
+    profiler.snapshot()
+    time.sleep(0.1)
+    profiler.snapshot()  # repousse l'arrêt
+    time.sleep(0.15)
+    assert tracemalloc.is_tracing()
+    time.sleep(0.2)
+    assert not tracemalloc.is_tracing()
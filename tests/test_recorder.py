@@ -0,0 +1,39 @@
+"""Horodatage des lignes CSV (recorder.py SessionRecorder / recorder_process)"""
+
+import csv
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder  # noqa: E402
+from recorder import SessionRecorder, recorder_process  # noqa: E402
+
+
+def test_row_timestamp_does_not_depend_on_batch_write_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder, 'setup_logging', lambda **kwargs: None)
+    session = SessionRecorder('test', str(tmp_path))
+    session.batch_queue, session.ack_queue = queue.Queue(), queue.Queue()
+    start_time = datetime.now() - timedelta(seconds=5)
+    session.batch_queue.put({'kind': 'start', 'request_id': 1, 'session_name': 'session', 'start_time': start_time})
+    session._session_open = True
+
+    before = datetime.now()
+    session.add('calm', {'probability': 0.5}, {}, 0)
+    after = datetime.now()
+    # Lot écrit bien plus tard (disque lent, file d'attente de l'enregistreur)
+    time.sleep(0.3)
+    with session._lock:
+        session._send_batch()
+    session.batch_queue.put({'kind': 'quit'})
+    recorder_process(session.batch_queue, session.ack_queue, str(tmp_path))
+
+    with open(tmp_path / 'session.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f, delimiter=';'))
+    assert len(rows) == 1
+    timestamp = datetime.fromisoformat(rows[0]['timestamp'])
+    assert before <= timestamp <= after
+    assert float(rows[0]['session_duration']) == (timestamp - start_time).total_seconds()
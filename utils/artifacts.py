@@ -0,0 +1,219 @@
+"""
+Détection d'artefacts en continu sur l'EEG brut (clignements, mâchoire, mouvements, secteur)
+
+Chaque époque (canaux × échantillons) est examinée en une passe vectorisée :
+
+- amplitude : écart à la ligne de base du canal (moyenne glissante des
+  échantillons propres) supérieur à ``amplitude_uv`` - clignements, mouvements
+- pic : différence entre échantillons consécutifs supérieure à ``spike_zscore``
+  écarts-types de ces différences (variance glissante des échantillons
+  propres) - contractions de la mâchoire (EMG), sauts d'électrode
+- secteur : part de la puissance autour de la fréquence secteur supérieure à
+  ``line_ratio`` (calculée avec les puissances par bande, voir utils/dsp.py)
+
+Les marqueurs sont un masque binaire par échantillon (``AMPLITUDE | SPIKE``)
+stocké avec la fenêtre de ``BandPowerEngine`` : chaque puissance par bande sait
+quels canaux de sa fenêtre sont contaminés. ``annotate`` les étiquette
+(``artifacts``) et, selon la politique, les exclut des listes par canal avant
+toute statistique, émission ou écriture CSV.
+
+Lignes de base et variances n'apprennent que des échantillons propres : un
+canal marqué sur plus de la moitié de ses échantillons pendant
+``reseed_seconds`` (saut de niveau continu, signal apparu après un
+préchauffage à plat) est réamorcé sur l'époque courante. L'exclusion d'un
+canal est ainsi bornée, même quand la ligne de base est périmée.
+
+Budget CPU : le temps CPU du thread par échantillon est suivi (moyenne
+glissante, hors premières époques). Au-delà de
+``budget_us`` μs par échantillon (tous canaux), le détecteur passe en mode
+allégé (seuil d'amplitude seul) plutôt que de ralentir l'acquisition.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger('neurosity_monitor.artifacts')
+
+AMPLITUDE = 1
+SPIKE = 2
+LINE_NOISE = 4
+REASONS = {AMPLITUDE: 'amplitude', SPIKE: 'spike', LINE_NOISE: 'line_noise'}
+POLICIES = ('exclude', 'tag')
+
+
+def parse_line_frequency(value, default: float = 60.0) -> float:
+    """Fréquence secteur: 60, '60Hz', '50 Hz' (défaut si illisible)"""
+    try:
+        return float(str(value).lower().replace('hz', '').strip())
+    except (TypeError, ValueError):
+        return default
+
+
+class ArtifactDetector:
+    """Marqueurs d'artefacts par échantillon et étiquetage/exclusion des puissances par bande"""
+
+    def __init__(self, sampling_rate: float = 256.0, amplitude_uv: float = 150.0,
+                 spike_zscore: float = 6.0, line_ratio: float = 0.5, policy: str = 'exclude',
+                 budget_us: float = 25.0, baseline_seconds: float = 5.0, warmup_seconds: float = 1.0,
+                 reseed_seconds: float = 2.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique d'artefacts inconnue: {policy!r}")
+        self.sampling_rate = float(sampling_rate)
+        self.amplitude_uv = amplitude_uv
+        self.spike_threshold = spike_zscore ** 2
+        self.line_ratio = line_ratio
+        self.policy = policy
+        self.budget_us = budget_us
+        self.baseline_samples = baseline_seconds * self.sampling_rate
+        self.warmup = int(warmup_seconds * self.sampling_rate)
+        self.reseed_samples = reseed_seconds * self.sampling_rate
+        self.light = False
+
+        self.samples = 0
+        self.flagged = dict.fromkeys(REASONS.values(), 0)
+        self.frames = 0
+        self.contaminated = 0
+        self.excluded = 0
+        self.reseeded = 0
+        self.cost_us = 0.0
+        self._batches = 0
+
+        self._baseline = None
+        self._diff_var = None
+        self._last = None
+        self._flagged_run = None
+
+    def reset(self):
+        self._baseline = None
+        self._diff_var = None
+        self._last = None
+        self._flagged_run = None
+        self.samples = 0
+
+    def scan(self, epoch: np.ndarray) -> np.ndarray:
+        """Marqueurs (uint8, même forme que l'époque) : AMPLITUDE et SPIKE par échantillon"""
+        start_ns = time.thread_time_ns()
+        channels, count = epoch.shape
+        if self._baseline is None or self._baseline.shape[0] != channels:
+            self.reset()
+            self._baseline = epoch.mean(axis=1)
+            self._last = epoch[:, 0].copy()
+            self._diff_var = np.zeros(channels)
+            self._flagged_run = np.zeros(channels)
+
+        flags = (np.abs(epoch - self._baseline[:, None]) > self.amplitude_uv).astype(np.uint8)
+        if self.light:
+            # Mode allégé: amplitude seule, ligne de base sur toute l'époque
+            self._baseline += (1.0 - np.exp(-count / self.baseline_samples)) * (epoch.mean(axis=1) - self._baseline)
+            self._finish(flags, count, start_ns)
+            return flags
+
+        previous = np.empty_like(epoch)
+        previous[:, 0] = self._last
+        previous[:, 1:] = epoch[:, :-1]
+        diffs = epoch - previous
+        squared = diffs * diffs
+        if self.samples >= self.warmup:
+            flags |= (squared > self.spike_threshold * self._diff_var[:, None]).astype(np.uint8) << 1
+
+        # Lignes de base et variance des différences: échantillons propres seulement
+        if not flags.any():
+            counts = np.full(channels, count)
+            means = epoch.mean(axis=1)
+            variances = squared.mean(axis=1)
+        else:
+            clean = flags == 0
+            counts = clean.sum(axis=1)
+            safe = np.maximum(counts, 1)
+            means = np.where(clean, epoch, 0.0).sum(axis=1) / safe
+            variances = np.where(clean, squared, 0.0).sum(axis=1) / safe
+        if counts.any():
+            safe = np.maximum(counts, 1)
+            if self.samples < self.warmup:
+                # Préchauffage: moyennes cumulées
+                weight = counts / (self.samples + safe)
+            else:
+                weight = 1.0 - np.exp(-counts / self.baseline_samples)
+            self._baseline += weight * (means - self._baseline)
+            self._diff_var += weight * (variances - self._diff_var)
+
+        # Canal marqué en continu: réamorcé sur l'époque après reseed_seconds
+        stale = counts * 2 < count
+        self._flagged_run = np.where(stale, self._flagged_run + count, 0.0)
+        reseed = self._flagged_run >= self.reseed_samples
+        if reseed.any():
+            self._baseline[reseed] = epoch[reseed].mean(axis=1)
+            self._diff_var[reseed] = squared[reseed].mean(axis=1)
+            self._flagged_run[reseed] = 0.0
+            self.reseeded += int(np.count_nonzero(reseed))
+        self._last = epoch[:, -1].copy()
+        self._finish(flags, count, start_ns)
+        return flags
+
+    def _finish(self, flags: np.ndarray, count: int, start_ns: int):
+        """Compteurs, coût par échantillon (moyenne glissante) et passage en mode allégé au-delà du budget"""
+        self.samples += count
+        if flags.any():
+            for bit, reason in ((AMPLITUDE, 'amplitude'), (SPIKE, 'spike')):
+                self.flagged[reason] += int(np.count_nonzero(flags & bit))
+        cost = (time.thread_time_ns() - start_ns) / 1000 / count
+        self._batches += 1
+        if self._batches <= 10:
+            # Premières époques (allocations, caches froids): hors moyenne
+            self.cost_us = cost
+            return
+        self.cost_us += 0.05 * (cost - self.cost_us)
+        if not self.light and self._batches >= 60 and self.budget_us and self.cost_us > self.budget_us:
+            self.light = True
+            logger.warning("⏱️ Détection d'artefacts: %.1f μs/échantillon > budget %.1f μs, mode allégé (amplitude seule)",
+                           self.cost_us, self.budget_us)
+
+    def annotate(self, frame: Dict, bands: Iterable[str]) -> Optional[Dict]:
+        """Puissances d'une fenêtre: étiquette ``artifacts`` (canal → raisons) et, en mode 'exclude',
+        retire les canaux contaminés; None si aucun canal n'est exploitable"""
+        channels = frame.get('channels') or []
+        flags = np.asarray(frame.pop('artifact_flags', [0] * len(channels)), dtype=np.uint8)
+        ratio = frame.pop('line_ratio', None)
+        if ratio is not None:
+            noisy = np.asarray(ratio) > self.line_ratio
+            flags = flags | (noisy.astype(np.uint8) * LINE_NOISE)
+            self.flagged['line_noise'] += int(np.count_nonzero(noisy))
+
+        self.frames += 1
+        bad = np.flatnonzero(flags)
+        frame['artifacts'] = {
+            channels[i]: [reason for bit, reason in REASONS.items() if flags[i] & bit] for i in bad
+        }
+        if not bad.size:
+            return frame
+        self.contaminated += 1
+        if self.policy == 'tag':
+            return frame
+        if bad.size == len(channels):
+            self.excluded += 1
+            return None
+
+        keep = np.flatnonzero(flags == 0)
+        for band in bands:
+            values = frame.get(band)
+            if values:
+                frame[band] = [values[i] for i in keep]
+        frame['channels'] = [channels[i] for i in keep]
+        return frame
+
+    def stats(self) -> Dict:
+        return {
+            'policy': self.policy,
+            'mode': 'light' if self.light else 'full',
+            'cost_us_per_sample': round(self.cost_us, 3),
+            'budget_us_per_sample': self.budget_us,
+            'samples': self.samples,
+            'flagged': dict(self.flagged),
+            'frames': self.frames,
+            'contaminated_frames': self.contaminated,
+            'excluded_frames': self.excluded,
+            'reseeded_channels': self.reseeded
+        }
@@ -0,0 +1,171 @@
+"""
+Puissance par bande en continu sur l'EEG brut (``brainwaves_raw``)
+
+Chaque canal alimente une fenêtre glissante circulaire. Tous les ``hop``
+échantillons, la densité spectrale est estimée par la méthode de Welch
+(segments Hann avec recouvrement de 50 %, FFT réelle vectorisée sur tous les
+canaux et segments à la fois) puis intégrée sur chaque bande.
+
+Le coût CPU est fixé par la configuration : une FFT de ``segment`` points par
+segment et par canal, ``sampling_rate / hop`` fois par seconde, quel que soit
+le débit des époques reçues. Tout ce qui ne dépend pas du signal (fenêtre de
+Hann, normalisation et repli du spectre unilatéral) est précalculé dans la
+matrice d'intégration, et chaque échantillon est écrit deux fois dans un
+tampon de double longueur : la fenêtre chronologique est une simple vue.
+
+Avec ``line_frequency``, la même multiplication matricielle donne aussi la part
+de puissance autour de la fréquence secteur (``line_ratio``); avec des marqueurs
+d'artefacts par échantillon (``push(..., flags=)``), chaque résultat porte les
+marqueurs cumulés de sa fenêtre par canal (``artifact_flags``, voir
+utils/artifacts.py).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bandes (Hz) de l'application, bornées à la fréquence de Nyquist
+BANDS = {
+    'delta': (1.0, 4.0),
+    'theta': (4.0, 8.0),
+    'alpha': (8.0, 13.0),
+    'beta': (13.0, 30.0),
+    'gamma': (30.0, 100.0)
+}
+
+
+def psd_weights(sampling_rate: float, segment: int, taper: np.ndarray) -> np.ndarray:
+    """Facteurs par fréquence qui convertissent |FFT|² en DSP unilatérale (μV²/Hz)"""
+    weights = np.full(segment // 2 + 1, 1.0 / (sampling_rate * np.sum(taper ** 2)))
+    # Spectre unilatéral: énergie des fréquences négatives reportée (hors DC et Nyquist)
+    weights[1:-1 if segment % 2 == 0 else None] *= 2
+    return weights
+
+
+def segment_power(windows: np.ndarray, segment: int, taper: np.ndarray) -> np.ndarray:
+    """|FFT|² moyen des segments Hann (recouvrement 50 %, moyenne retirée) le long du dernier axe"""
+    step = segment // 2
+    segments = np.lib.stride_tricks.sliding_window_view(windows, segment, axis=-1)[..., ::step, :]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    spectrum = np.fft.rfft(segments * taper, axis=-1)
+    return (spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=-2)
+
+
+def welch_psd(windows: np.ndarray, sampling_rate: float, segment: int) -> Tuple[np.ndarray, np.ndarray]:
+    """DSP de Welch le long du dernier axe: (..., n) → fréquences, (..., segment // 2 + 1)"""
+    taper = np.hanning(segment)
+    psd = segment_power(windows, segment, taper) * psd_weights(sampling_rate, segment, taper)
+    return np.fft.rfftfreq(segment, 1.0 / sampling_rate), psd
+
+
+class BandPowerEngine:
+    """Fenêtres glissantes par canal et puissance par bande (μV²) toutes les ``hop`` secondes"""
+
+    def __init__(self, sampling_rate: float = 256.0, window_seconds: float = 2.0,
+                 hop_seconds: float = 0.25, segment_seconds: float = 1.0,
+                 bands: Optional[Dict[str, tuple]] = None, line_frequency: Optional[float] = None):
+        self.sampling_rate = float(sampling_rate)
+        self.window = max(int(round(window_seconds * self.sampling_rate)), 2)
+        self.hop = max(int(round(hop_seconds * self.sampling_rate)), 1)
+        self.segment = min(max(int(round(segment_seconds * self.sampling_rate)), 2), self.window)
+        self.bands = bands or BANDS
+        self.channel_names: List[str] = []
+        self.computed = 0
+
+        self._buffer = None
+        self._flags = None
+        self._position = 0
+        self._filled = 0
+        self._since_last = 0
+
+        # Matrice d'intégration (fréquences × bandes): puissance = DSP @ matrice
+        frequencies = np.fft.rfftfreq(self.segment, 1.0 / self.sampling_rate)
+        resolution = frequencies[1] - frequencies[0]
+        ranges = list(self.bands.values())
+        # Secteur: ±2 Hz autour de la fréquence, rapportés à la puissance totale au-dessus de 1 Hz
+        self.line_frequency = line_frequency if line_frequency and line_frequency + 2 < self.sampling_rate / 2 else None
+        if self.line_frequency:
+            ranges += [(self.line_frequency - 2, self.line_frequency + 2), (1.0, np.inf)]
+        self._taper = np.hanning(self.segment)
+        # Normalisation de la DSP comprise: puissance = |FFT|² moyen @ matrice
+        self._band_matrix = np.stack([
+            ((frequencies >= low) & (frequencies < high)) * resolution
+            for low, high in ranges
+        ], axis=1) * psd_weights(self.sampling_rate, self.segment, self._taper)[:, None]
+
+    def reset(self):
+        self._buffer = None
+        self._flags = None
+        self._position = 0
+        self._filled = 0
+        self._since_last = 0
+
+    def push(self, samples: Sequence[Sequence[float]], channel_names: Optional[List[str]] = None,
+             flags: Optional[np.ndarray] = None) -> List[Dict]:
+        """Ajoute une époque (canaux × échantillons) et ses marqueurs d'artefacts éventuels (même forme);
+        retourne les puissances calculées (0, 1 ou plus)"""
+        epoch = np.asarray(samples, dtype=float)
+        if epoch.ndim != 2 or not epoch.size:
+            return []
+        channels, count = epoch.shape
+        if self._buffer is None or self._buffer.shape[0] != channels:
+            self.reset()
+            # Double longueur: buffer[:, position:position + window] est toujours chronologique
+            self._buffer = np.zeros((channels, 2 * self.window))
+            self.channel_names = list(channel_names or [f'ch{i}' for i in range(channels)])
+        if flags is not None and self._flags is None:
+            self._flags = np.zeros((channels, self.window), dtype=np.uint8)
+        elif flags is None and self._flags is not None:
+            flags = np.zeros(epoch.shape, dtype=np.uint8)
+
+        results = []
+        offset = 0
+        while offset < count:
+            # Écriture jusqu'au prochain calcul, pour respecter le pas même avec de longues époques
+            chunk = min(count - offset, self.hop - self._since_last)
+            self._write(epoch[:, offset:offset + chunk],
+                        None if flags is None else flags[:, offset:offset + chunk])
+            offset += chunk
+            self._since_last += chunk
+            if self._since_last >= self.hop:
+                self._since_last = 0
+                if self._filled >= self.window:
+                    results.append(self._compute())
+        return results
+
+    def _write(self, block: np.ndarray, flags: Optional[np.ndarray] = None):
+        count = block.shape[1]
+        if count >= self.window:
+            block = block[:, -self.window:]
+            flags = None if flags is None else flags[:, -self.window:]
+            count = self.window
+        # Même écriture circulaire dans les deux moitiés du tampon des valeurs
+        targets = [(self._buffer[:, :self.window], block), (self._buffer[:, self.window:], block)]
+        if flags is not None:
+            targets.append((self._flags, flags))
+        end = self._position + count
+        for buffer, values in targets:
+            if end <= self.window:
+                buffer[:, self._position:end] = values
+            else:
+                split = self.window - self._position
+                buffer[:, self._position:] = values[:, :split]
+                buffer[:, :end - self.window] = values[:, split:]
+        self._position = end % self.window
+        self._filled = min(self._filled + count, self.window)
+
+    def _compute(self) -> Dict:
+        ordered = self._buffer[:, self._position:self._position + self.window]
+        powers = segment_power(ordered, self.segment, self._taper) @ self._band_matrix
+        self.computed += 1
+
+        rounded = powers.T.round(6).tolist()
+        result = dict(zip(self.bands, rounded))
+        result['channels'] = self.channel_names
+        if self.line_frequency:
+            line, total = powers[:, -2], powers[:, -1]
+            result['line_ratio'] = np.divide(line, total, out=np.zeros_like(line), where=total > 0).round(4).tolist()
+        if self._flags is not None:
+            # Marqueurs cumulés (OU binaire) des échantillons de la fenêtre, par canal
+            result['artifact_flags'] = np.bitwise_or.reduce(self._flags, axis=1).tolist()
+        return result
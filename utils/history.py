@@ -0,0 +1,244 @@
+"""
+Historique en mémoire multi-résolution, alimenté par la pompe de données
+
+Par série (calm, focus, brainwaves.<bande>) :
+- niveau brut : derniers échantillons à pleine résolution (quelques minutes)
+- agrégats 1 s et 10 s : moyenne, min, max et nombre d'échantillons par
+  intervalle, sur plusieurs heures
+
+Chaque niveau est un tableau NumPy circulaire alloué à la création de la
+série : la mémoire est fixe quelle que soit la durée de la session. Une
+requête choisit le niveau le plus fin qui couvre la plage demandée.
+
+``BackfillCache`` encode une fois les dernières secondes de toutes les séries
+dans un message binaire compact, partagé par tous les clients qui se
+connectent (graphiques pleins dès l'ouverture du tableau de bord).
+"""
+
+import json
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (résolution en secondes, nombre d'intervalles conservés)
+DEFAULT_TIERS = ((1.0, 3 * 3600), (10.0, 12 * 360))
+
+
+def parse_range(value: Optional[str], default: float = 300.0) -> float:
+    """Plage en secondes: '90', '90s', '15m', '2h'"""
+    if not value:
+        return default
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    value = value.strip().lower()
+    if value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+class _Ring:
+    """Tableau circulaire de lignes (temps en première colonne, croissant)"""
+
+    def __init__(self, capacity: int, columns: int):
+        self.data = np.zeros((capacity, columns))
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+
+    def append(self, row: Sequence[float]):
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def oldest(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return self.data[(self.head - self.size) % self.capacity, 0]
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        if not self.size:
+            return self.data[:0]
+        first = (self.head - self.size) % self.capacity
+        if first + self.size <= self.capacity:
+            rows = self.data[first:first + self.size]
+        else:
+            rows = np.concatenate((self.data[first:], self.data[:self.head]))
+        times = rows[:, 0]
+        return rows[np.searchsorted(times, start, 'left'):np.searchsorted(times, end, 'right')]
+
+
+class _Rollup:
+    """Niveau agrégé: intervalle en cours + intervalles terminés (temps, moyenne, min, max, n)"""
+
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.ring = _Ring(capacity, 5)
+        self.bucket = None
+
+    def add(self, timestamp: float, value: float):
+        start = timestamp - timestamp % self.resolution
+        bucket = self.bucket
+        if bucket is not None and start == bucket[0]:
+            bucket[1] += value
+            bucket[2] = min(bucket[2], value)
+            bucket[3] = max(bucket[3], value)
+            bucket[4] += 1
+            return
+        if bucket is not None and start < bucket[0]:
+            return  # échantillon en retard sur un intervalle déjà fermé
+        self._close()
+        self.bucket = [start, value, value, value, 1]
+
+    def _close(self):
+        if self.bucket is not None:
+            start, total, low, high, count = self.bucket
+            self.ring.append((start, total / count, low, high, count))
+
+    def query(self, start: float, end: float) -> np.ndarray:
+        rows = self.ring.between(start, end)
+        if self.bucket is not None and start <= self.bucket[0] <= end:
+            # Intervalle en cours: valeur provisoire
+            b_start, total, low, high, count = self.bucket
+            rows = np.vstack((rows, (b_start, total / count, low, high, count)))
+        return rows
+
+
+class _Series:
+    def __init__(self, raw_capacity: int, tiers: Sequence[Tuple[float, int]]):
+        self.raw = _Ring(raw_capacity, 2)
+        self.rollups = [_Rollup(resolution, capacity) for resolution, capacity in tiers]
+
+    def add(self, timestamp: float, value: float):
+        self.raw.append((timestamp, value))
+        for rollup in self.rollups:
+            rollup.add(timestamp, value)
+
+    def nbytes(self) -> int:
+        return self.raw.data.nbytes + sum(rollup.ring.data.nbytes for rollup in self.rollups)
+
+
+class HistoryStore:
+    """Historique à mémoire fixe par série, interrogeable par plage de temps"""
+
+    def __init__(self, raw_capacity: int = 2400, tiers: Sequence[Tuple[float, int]] = DEFAULT_TIERS):
+        self.raw_capacity = raw_capacity
+        self.tiers = tuple(tiers)
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def add(self, series: str, value: float, timestamp: Optional[float] = None):
+        """Ajoute une valeur (horodatage Unix en secondes, par défaut maintenant)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            store = self._series.get(series)
+            if store is None:
+                store = self._series[series] = _Series(self.raw_capacity, self.tiers)
+            store.add(timestamp, value)
+            self.version += 1
+
+    def add_bands(self, data: Dict, timestamp: Optional[float] = None, bands: Sequence[str] = ()):
+        """Puissances par bande: la moyenne des canaux de chaque bande"""
+        for band in bands:
+            values = data.get(band)
+            if values:
+                self.add(f'brainwaves.{band}', sum(values) / len(values), timestamp)
+
+    def series(self) -> List[str]:
+        return sorted(self._series)
+
+    def query(self, series: str, seconds: float, end: Optional[float] = None) -> Optional[Dict]:
+        """Points des ``seconds`` dernières secondes, depuis le niveau le plus fin qui les couvre"""
+        end = time.time() if end is None else end
+        start = end - seconds
+        with self._lock:
+            store = self._series.get(series)
+            if store is None:
+                return None
+
+            oldest = store.raw.oldest()
+            if oldest is not None and (oldest <= start or store.raw.size < store.raw.capacity):
+                rows = store.raw.between(start, end)
+                return {'tier': 'raw', 'resolution': None, 'columns': ['t', 'value'],
+                        'points': rows.round(6).tolist()}
+
+            rollup = next((r for r in store.rollups
+                           if r.ring.size < r.ring.capacity or r.ring.oldest() <= start), store.rollups[-1])
+            rows = rollup.query(start, end)
+            return {'tier': f'{rollup.resolution:g}s', 'resolution': rollup.resolution,
+                    'columns': ['t', 'mean', 'min', 'max', 'count'], 'points': rows.round(6).tolist()}
+
+    def recent(self, seconds: float, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Échantillons bruts des ``seconds`` dernières secondes de chaque série (t, valeur)"""
+        end = time.time() if end is None else end
+        with self._lock:
+            return {name: store.raw.between(end - seconds, end).copy() for name, store in self._series.items()}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'series': sorted(self._series),
+                'memory_bytes': sum(store.nbytes() for store in self._series.values()),
+                'bytes_per_series': 8 * (2 * self.raw_capacity + sum(5 * capacity for _, capacity in self.tiers)),
+                'raw_points': self.raw_capacity,
+                'tiers': [{'resolution': resolution, 'retention_s': resolution * capacity}
+                          for resolution, capacity in self.tiers]
+            }
+
+
+# ===============================================
+# BACKFILL BINAIRE DES NOUVEAUX CLIENTS
+# ===============================================
+
+BACKFILL_MAGIC = b'NBF1'
+
+
+def encode_backfill(store: HistoryStore, seconds: float, device_id: str = '') -> bytes:
+    """Message binaire: en-tête JSON puis, par série, décalages (float32, s depuis t0) et valeurs (float32)
+
+    Format (little-endian) : b'NBF1' | uint32 longueur de l'en-tête | en-tête JSON
+    complété à un multiple de 4 octets | tableaux float32 dans l'ordre de l'en-tête
+    """
+    recent = {name: rows for name, rows in store.recent(seconds).items() if len(rows)}
+    t0 = min((rows[0, 0] for rows in recent.values()), default=time.time())
+
+    header = json.dumps({
+        'device_id': device_id,
+        't0': t0,
+        'range_s': seconds,
+        'series': [{'name': name, 'count': len(rows)} for name, rows in recent.items()]
+    }, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+
+    parts = [BACKFILL_MAGIC, struct.pack('<I', len(header)), header]
+    for rows in recent.values():
+        parts.append((rows[:, 0] - t0).astype('<f4').tobytes())
+        parts.append(rows[:, 1].astype('<f4').tobytes())
+    return b''.join(parts)
+
+
+class BackfillCache:
+    """Backfill encodé au plus une fois par ``max_age`` secondes, partagé par tous les clients"""
+
+    def __init__(self, store: HistoryStore, seconds: float = 60.0, device_id: str = '', max_age: float = 0.5):
+        self.store = store
+        self.seconds = seconds
+        self.device_id = device_id
+        self.max_age = max_age
+        self.encoded = 0
+        self._payload = None
+        self._version = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> bytes:
+        with self._lock:
+            fresh = time.monotonic() - self._built_at < self.max_age
+            if self._payload is None or (self._version != self.store.version and not fresh):
+                self._version = self.store.version
+                self._payload = encode_backfill(self.store, self.seconds, self.device_id)
+                self._built_at = time.monotonic()
+                self.encoded += 1
+            return self._payload
@@ -0,0 +1,313 @@
+"""
+Instrumentation légère du pipeline - histogrammes, compteurs et jauges
+exposés au format texte Prometheus (endpoint /metrics)
+
+Les horodatages des étapes utilisent ``time.monotonic_ns()`` : horloge monotone
+commune à tous les processus de la machine, donc comparable entre le processus
+d'acquisition et le serveur.
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Bornes (secondes) adaptées aux latences du pipeline: de 100 μs à 5 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def now_ns() -> int:
+    """Horodatage monotone en nanosecondes"""
+    return time.monotonic_ns()
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base commune: une famille de séries indexées par valeurs d'étiquettes"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues, **labelkwargs):
+        """Retourne (en le créant au besoin) l'enfant pour ces étiquettes"""
+        if labelkwargs:
+            labelvalues = tuple(labelkwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+    def _render_child(self, labelvalues, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render_child(self, labelvalues, child):
+        return [f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}']
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], Optional[float]]):
+        """Valeur calculée à chaque collecte (ex: profondeur de queue)"""
+        self.function = function
+
+    def get(self) -> Optional[float]:
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return None
+
+
+class Gauge(_Metric):
+    """Valeur instantanée, fixée ou calculée à la collecte"""
+
+    metric_type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _render_child(self, labelvalues, child):
+        value = child.get()
+        if value is None:
+            return []
+        return [f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'bucket_counts', 'sum', 'count', '_lock')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def observe_ns(self, start_ns: Optional[int], end_ns: Optional[int]):
+        """Observe la durée entre deux horodatages monotones (ignorée si incomplète)"""
+        if start_ns is None or end_ns is None or end_ns < start_ns:
+            return
+        self.observe((end_ns - start_ns) / 1e9)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimation d'un quantile par la borne supérieure du bucket"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.upper_bounds + (float('inf'),), self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+
+class Histogram(_Metric):
+    """Histogramme cumulatif à buckets fixes"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def _render_child(self, labelvalues, child):
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(child.upper_bounds + (float('inf'),), child.bucket_counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}')
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Registre des métriques d'un processus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Exposition au format texte Prometheus 0.0.4"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+
+# Registre par défaut du processus
+REGISTRY = MetricsRegistry()
+
+# Métriques du pipeline partagées par app.py et data_manager.py
+STAGE_LATENCY = REGISTRY.histogram(
+    'neurosity_stage_latency_seconds',
+    "Latence entre étapes du pipeline par flux (callback SDK → queue → emit → CSV)",
+    ('device', 'stream', 'stage')
+)
+SAMPLES_TOTAL = REGISTRY.counter(
+    'neurosity_samples_total', "Échantillons reçus depuis data_queue", ('device', 'stream')
+)
+EMITTED_TOTAL = REGISTRY.counter(
+    'neurosity_emitted_total', "Événements Socket.IO émis", ('device', 'stream')
+)
+RECORDED_TOTAL = REGISTRY.counter(
+    'neurosity_recorded_total', "Échantillons écrits dans la session CSV", ('device', 'stream')
+)
+DROPPED_TOTAL = REGISTRY.counter(
+    'neurosity_dropped_total', "Échantillons perdus (envoi queue ou enregistrement en échec)", ('device', 'stream', 'reason')
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    'neurosity_queue_depth', "Messages en attente par queue inter-processus", ('device', 'queue')
+)
+LAST_SAMPLE_AGE = REGISTRY.gauge(
+    'neurosity_last_sample_age_seconds', "Temps écoulé depuis le dernier échantillon reçu", ('device',)
+)
+CSV_FLUSH_LATENCY = REGISTRY.histogram(
+    'neurosity_csv_flush_seconds', "Durée écriture + flush d'un lot de lignes CSV (processus enregistreur)"
+)
+
+# Supervision du processus d'acquisition (battement de cœur, redémarrages)
+RECOVERY_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 60.0, 120.0)
+
+HEARTBEAT_AGE = REGISTRY.gauge(
+    'neurosity_heartbeat_age_seconds', "Temps écoulé depuis le dernier battement du processus d'acquisition", ('device',)
+)
+RESTARTS_TOTAL = REGISTRY.counter(
+    'neurosity_acquisition_restarts_total', "Redémarrages du processus d'acquisition par le superviseur", ('device', 'reason')
+)
+RECOVERY_SECONDS = REGISTRY.histogram(
+    'neurosity_recovery_seconds', "Durée d'interruption: dernier battement → état connecté/monitoring restauré",
+    ('device',), buckets=RECOVERY_BUCKETS
+)
+MTTR_SECONDS = REGISTRY.gauge(
+    'neurosity_mttr_seconds', "Temps moyen de rétablissement du processus d'acquisition", ('device',)
+)
+GAP_SECONDS_TOTAL = REGISTRY.counter(
+    'neurosity_acquisition_gap_seconds_total', "Durée cumulée sans acquisition pendant le monitoring (redémarrages)", ('device',)
+)
+
+# Connexion au casque: durée par phase (sdk_init, login, detection, subscribe)
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+CONNECT_PHASE = REGISTRY.histogram(
+    'neurosity_connect_phase_seconds', "Durée des phases de connexion et de démarrage du monitoring",
+    ('device', 'phase'), buckets=PHASE_BUCKETS
+)
+
+# Règles d'alerte (utils/rules.py)
+ALERTS_TOTAL = REGISTRY.counter(
+    'neurosity_alerts_total', "Alertes déclenchées par les règles déclaratives", ('device', 'rule', 'severity')
+)
+
+# Artefacts de l'EEG brut (utils/artifacts.py)
+ARTIFACT_FRAMES = REGISTRY.counter(
+    'neurosity_artifact_frames_total', "Puissances par bande reçues avec des canaux contaminés, par raison",
+    ('device', 'reason')
+)
+
+# Qualité du signal par canal (utils/signal_quality.py)
+SIGNAL_QUALITY = REGISTRY.gauge(
+    'neurosity_signal_quality', "État du signal par canal: 0 good, 1 fair, 2 poor, 3 flat", ('device', 'channel')
+)
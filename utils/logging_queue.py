@@ -0,0 +1,141 @@
+"""
+Journalisation hors du chemin critique
+
+Les appels ``logger.xxx()`` dans les callbacks SDK et la pompe de données ne font
+qu'un filtrage en mémoire puis un ``put_nowait`` dans une queue bornée : le
+formatage et les écritures console/fichier sont faits par le thread du
+``QueueListener``.
+
+- RateLimitFilter : seau à jetons par type de message (site d'appel), avec
+  compte des messages supprimés ajouté au message suivant
+- SamplingFilter : ne garde qu'un message sur N quand l'appel le demande via
+  ``extra=sampled(N)``
+
+Les deux filtres ne concernent que DEBUG et INFO : WARNING et au-delà passent toujours.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def sampled(every: int) -> Dict:
+    """Argument ``extra`` pour ne journaliser qu'un appel sur ``every``"""
+    return {'sample_every': every}
+
+
+def _message_key(record: logging.LogRecord):
+    # Type de message = site d'appel (le texte varie avec les f-strings)
+    return record.name, record.levelno, record.pathname, record.lineno
+
+
+class SamplingFilter(logging.Filter):
+    """Échantillonnage 1/N par type de message pour les logs par échantillon (DEBUG/INFO)"""
+
+    def __init__(self, exempt_level: int = logging.WARNING):
+        super().__init__()
+        self.exempt_level = exempt_level
+        self._counts = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, 'sample_every', 1)
+        if every <= 1 or record.levelno >= self.exempt_level:
+            return True
+        key = _message_key(record)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """Limite chaque type de message DEBUG/INFO à ``rate`` par seconde (rafale ``burst``)"""
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, exempt_level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.exempt_level = exempt_level
+        self.suppressed_total = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= self.exempt_level:
+            return True
+
+        key = _message_key(record)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                self.suppressed_total += 1
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} messages similaires supprimés)"
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui ne bloque jamais et ne formate pas dans le thread appelant"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Même processus : le listener formate lui-même l'enregistrement
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def install_queue_logging(handlers: List[logging.Handler], level: int = logging.INFO,
+                          queue_size: int = 10000, rate: float = 5.0,
+                          burst: int = 10) -> NonBlockingQueueHandler:
+    """
+    Remplace les handlers du logger racine par un QueueHandler non bloquant
+    et démarre le thread d'écriture qui dessert ``handlers``
+    """
+    global _listener
+    stop_queue_logging()
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(RateLimitFilter(rate, burst))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_queue_logging)
+    return queue_handler
+
+
+def stop_queue_logging():
+    """Vide la queue et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
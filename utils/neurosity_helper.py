@@ -4,13 +4,56 @@ Helpers et utilitaires pour le SDK Neurosity - Version Corrigée
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Callable, Any
-from datetime import datetime, timedelta
+import math
+import os
+import random
+from collections import deque
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Callable, Any
+from datetime import datetime
 import json
 import time
 
+import numpy as np
+
+from utils.signal_quality import SignalQualityEstimator
+
 logger = logging.getLogger(__name__)
 
+SIMULATOR_MODES = ('simulator', 'sim', 'fake')
+
+
+def is_simulator_mode() -> bool:
+    """Indique si le simulateur local est sélectionné (NEUROSITY_SDK=simulator)"""
+    return os.getenv('NEUROSITY_SDK', 'real').lower() in SIMULATOR_MODES
+
+
+def get_sdk_class():
+    """Retourne la classe SDK à utiliser : NeurositySDK réel ou simulateur local"""
+    if is_simulator_mode():
+        from utils.neurosity_simulator import SimulatedNeurositySDK
+        return SimulatedNeurositySDK
+    
+    from neurosity import NeurositySDK
+    return NeurositySDK
+
+
+def get_device_ids() -> List[str]:
+    """Casques configurés: NEUROSITY_DEVICE_IDS (séparés par des virgules) ou NEUROSITY_DEVICE_ID"""
+    device_ids = [d.strip() for d in os.getenv('NEUROSITY_DEVICE_IDS', '').split(',') if d.strip()]
+    if not device_ids and os.getenv('NEUROSITY_DEVICE_ID'):
+        device_ids = [os.getenv('NEUROSITY_DEVICE_ID')]
+    # Ordre conservé, doublons ignorés
+    return list(dict.fromkeys(device_ids))
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 15.0) -> float:
+    """Attente avant la tentative suivante: backoff exponentiel plafonné, jitter complet
+
+    Le tirage uniforme dans [0, min(cap, base * 2^attempt)] évite que plusieurs
+    clients relancés ensemble réessaient au même instant.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
 
 class NeurosityConnectionManager:
     """Gestionnaire de connexion Neurosity avec gestion d'erreurs avancée"""
@@ -23,10 +66,21 @@ class NeurosityConnectionManager:
         self.max_attempts = 3
         self.last_connection_time = None
         self.subscriptions = {}
+        # Qualité du signal mesurée sur les époques brutes (créée à la première époque)
+        self.signal_quality = None
     
     def connect(self) -> bool:
-        """CORRECTION: Connecte au dispositif Neurosity (version synchrone)"""
-        from neurosity import NeurositySDK
+        """Connecte au dispositif Neurosity (version synchrone, bloquante pendant le backoff)"""
+        while True:
+            if self._open_session():
+                return True
+            if self.connection_attempts >= self.max_attempts:
+                return False
+            time.sleep(backoff_delay(self.connection_attempts))
+    
+    def _open_session(self) -> bool:
+        """Une tentative: SDK, login et vérification du dispositif"""
+        NeurositySDK = get_sdk_class()
         
         self.connection_attempts += 1
         
@@ -60,11 +114,6 @@ class NeurosityConnectionManager:
         
         except Exception as e:
             logger.error(f"❌ Erreur de connexion: {e}")
-            
-            if self.connection_attempts < self.max_attempts:
-                time.sleep(2 ** self.connection_attempts)  # Backoff exponentiel
-                return self.connect()
-            
             return False
     
     def disconnect(self):
@@ -79,6 +128,7 @@ class NeurosityConnectionManager:
             
             self.is_connected = False
             self.neurosity = None
+            self.signal_quality = None
             logger.info("Déconnexion Neurosity réussie")
         
         except Exception as e:
@@ -162,8 +212,11 @@ class NeurosityConnectionManager:
                 # Attention pourrait ne pas exister dans l'API réelle
                 subscription = self.neurosity.attention(safe_callback) if hasattr(self.neurosity, 'attention') else None
             elif metric == 'brainwaves':
-                # Probablement brainwaves ou rawBrainwaves
-                subscription = self.neurosity.brainwaves(safe_callback)
+                # Époques brutes (brainwaves_raw) ou ancienne API brainwaves
+                if hasattr(self.neurosity, 'brainwaves_raw'):
+                    subscription = self.neurosity.brainwaves_raw(safe_callback)
+                else:
+                    subscription = self.neurosity.brainwaves(safe_callback)
             elif metric == 'kinesis':
                 # Pour les mouvements
                 subscription = self.neurosity.kinesis(safe_callback) if hasattr(self.neurosity, 'kinesis') else None
@@ -187,9 +240,12 @@ class NeurosityConnectionManager:
             try:
                 # Valider les données
                 if not self._validate_metric_data(data, metric):
-                    logger.warning(f"Données invalides pour {metric}: {data}")
+                    logger.warning("Données invalides pour %s: %s", metric, data)
                     return
                 
+                if metric == 'brainwaves' and 'data' in data:
+                    self._update_signal_quality(data)
+                
                 # Enrichir avec métadonnées
                 enriched_data = self._enrich_data(data, metric)
                 
@@ -197,7 +253,7 @@ class NeurosityConnectionManager:
                 callback(enriched_data)
             
             except Exception as e:
-                logger.error(f"Erreur dans le callback {metric}: {e}")
+                logger.error("Erreur dans le callback %s: %s", metric, e)
         
         return safe_callback
     
@@ -212,6 +268,10 @@ class NeurosityConnectionManager:
             return isinstance(probability, (int, float)) and 0 <= probability <= 1
         
         elif metric == 'brainwaves':
+            # Époque brute: un canal par ligne
+            if 'data' in data:
+                return isinstance(data['data'], list)
+            
             # CORRECTION: Validation plus flexible pour les ondes cérébrales
             # L'API réelle peut avoir des structures différentes
             required_waves = ['delta', 'theta', 'alpha', 'beta', 'gamma']
@@ -240,21 +300,21 @@ class NeurosityConnectionManager:
             'connection_quality': self._get_connection_quality()
         }
     
+    def _update_signal_quality(self, data: Dict):
+        """Époque brute (canaux × échantillons): variance, ligne plate et secteur par canal"""
+        info = data.get('info') or {}
+        sampling_rate = float(info.get('samplingRate') or 256)
+        if self.signal_quality is None or self.signal_quality.sampling_rate != sampling_rate:
+            self.signal_quality = SignalQualityEstimator(sampling_rate)
+        epoch = np.asarray(data['data'], dtype=float)
+        if epoch.ndim == 2 and epoch.size:
+            self.signal_quality.push(epoch, info.get('channelNames'))
+    
     def _get_connection_quality(self) -> str:
-        """Évalue la qualité de la connexion"""
+        """Qualité du signal mesurée sur l'EEG brut (inconnue sans souscription brainwaves)"""
         if not self.is_connected:
             return 'disconnected'
-        
-        if self.last_connection_time:
-            duration = datetime.now() - self.last_connection_time
-            if duration < timedelta(minutes=1):
-                return 'excellent'
-            elif duration < timedelta(minutes=5):
-                return 'good'
-            else:
-                return 'fair'
-        
-        return 'unknown'
+        return self.signal_quality.signal if self.signal_quality else 'unknown'
     
     def unsubscribe_all(self):
         """CORRECTION: Désabonne de toutes les métriques (version synchrone)"""
@@ -295,8 +355,183 @@ class NeurosityConnectionManager:
             'connection_attempts': self.connection_attempts,
             'last_connection': self.last_connection_time.isoformat() if self.last_connection_time else None,
             'active_subscriptions': list(self.subscriptions.keys()),
-            'connection_quality': self._get_connection_quality()
+            'connection_quality': self._get_connection_quality(),
+            'signal_quality': self.signal_quality.published if self.signal_quality else None
+        }
+
+
+_END_OF_STREAM = object()
+
+
+class MetricStream:
+    """Itérateur asynchrone sur une métrique
+    
+    File bornée par consommateur: un consommateur lent perd ses échantillons
+    les plus anciens sans ralentir le SDK ni les autres consommateurs.
+    """
+    
+    def __init__(self, manager: 'AsyncNeurosityConnectionManager', metric: str, maxsize: int):
+        self.manager = manager
+        self.metric = metric
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._closed = False
+    
+    def _offer(self, item: Any):
+        # Appelé dans la boucle d'événements (call_soon_threadsafe)
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+    
+    def __aiter__(self) -> AsyncIterator[Dict]:
+        return self
+    
+    async def __anext__(self) -> Dict:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _END_OF_STREAM:
+            self._closed = True
+            raise StopAsyncIteration
+        return item
+    
+    async def __aenter__(self) -> 'MetricStream':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """Termine l'itération (les échantillons déjà reçus restent lisibles)"""
+        self.manager._detach(self)
+        if not self._closed:
+            self._offer(_END_OF_STREAM)
+
+
+class AsyncNeurosityConnectionManager(NeurosityConnectionManager):
+    """Variante asyncio du gestionnaire de connexion
+    
+    Les appels bloquants du SDK (login, souscriptions, logout) s'exécutent dans
+    des threads; les callbacks du SDK sont remis à la boucle d'événements par
+    ``call_soon_threadsafe``. Utilisable directement dans un notebook (boucle
+    déjà active) ou depuis du code synchrone via ``asyncio.run`` :
+        
+        async with AsyncNeurosityConnectionManager(config) as manager:
+            await manager.subscribe_all()
+            async for sample in manager.stream('calm'):
+                print(sample['probability'])
+    """
+    
+    def __init__(self, config: Dict[str, str], max_attempts: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 15.0, stream_size: int = 256):
+        super().__init__(config)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stream_size = stream_size
+        self._streams: Dict[str, List[MetricStream]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def __aenter__(self) -> 'AsyncNeurosityConnectionManager':
+        if not await self.connect():
+            raise ConnectionError(f"Connexion impossible au casque {self.config['device_id']}")
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+    
+    async def connect(self, timeout: Optional[float] = None) -> bool:
+        """Tentatives avec backoff non bloquant; annulable (tâche ou ``timeout``)"""
+        self._loop = asyncio.get_running_loop()
+        self.connection_attempts = 0
+        try:
+            return await asyncio.wait_for(self._connect_with_retries(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Connexion abandonnée après {timeout}s")
+            return False
+    
+    async def _connect_with_retries(self) -> bool:
+        while True:
+            # Tentative protégée: une annulation n'interrompt pas le login en cours
+            # dans son thread, la session ouverte entre-temps est refermée à la fin
+            attempt = asyncio.ensure_future(asyncio.to_thread(self._open_session))
+            try:
+                if await asyncio.shield(attempt):
+                    return True
+            except asyncio.CancelledError:
+                attempt.add_done_callback(self._discard_attempt)
+                raise
+            
+            if self.connection_attempts >= self.max_attempts:
+                return False
+            delay = backoff_delay(self.connection_attempts, self.base_delay, self.max_delay)
+            logger.info(f"Nouvelle tentative dans {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    def _discard_attempt(self, attempt: asyncio.Future):
+        if attempt.cancelled() or attempt.exception() is not None:
+            return
+        logger.info("Connexion annulée: fermeture de la session ouverte")
+        # Les souscriptions sont déjà vides: seul le logout reste à faire
+        asyncio.get_running_loop().run_in_executor(None, super().disconnect)
+    
+    async def disconnect(self):
+        """Arrête les souscriptions et la session, termine les itérateurs"""
+        await asyncio.to_thread(super().disconnect)
+        for streams in list(self._streams.values()):
+            for stream in list(streams):
+                stream.close()
+    
+    async def subscribe(self, metric: str):
+        """Souscrit à une métrique; ses échantillons alimentent les itérateurs ``stream``"""
+        loop = self._loop or asyncio.get_running_loop()
+        
+        def deliver(data):
+            # Thread du SDK → boucle d'événements
+            try:
+                loop.call_soon_threadsafe(self._dispatch, metric, data)
+            except RuntimeError:
+                pass  # boucle fermée
+        
+        await asyncio.to_thread(self.subscribe_to_metric, metric, deliver)
+    
+    async def subscribe_all(self, metrics: Iterable[str] = ('calm', 'focus', 'brainwaves')) -> Dict[str, bool]:
+        """Souscriptions en parallèle; retourne le succès par métrique"""
+        metrics = list(metrics)
+        results = await asyncio.gather(*(self.subscribe(metric) for metric in metrics),
+                                       return_exceptions=True)
+        return {
+            metric: not isinstance(result, BaseException) and metric in self.subscriptions
+            for metric, result in zip(metrics, results)
+        }
+    
+    async def unsubscribe(self, metric: str):
+        await asyncio.to_thread(self.unsubscribe_from_metric, metric)
+    
+    def stream(self, metric: str, maxsize: Optional[int] = None) -> MetricStream:
+        """Nouvel itérateur asynchrone sur une métrique (à appeler dans la boucle)"""
+        self._loop = self._loop or asyncio.get_running_loop()
+        stream = MetricStream(self, metric, maxsize or self.stream_size)
+        self._streams.setdefault(metric, []).append(stream)
+        return stream
+    
+    def _dispatch(self, metric: str, data: Dict):
+        for stream in self._streams.get(metric, ()):
+            stream._offer(data)
+    
+    def _detach(self, stream: MetricStream):
+        streams = self._streams.get(stream.metric, [])
+        if stream in streams:
+            streams.remove(stream)
+    
+    def get_connection_status(self) -> Dict[str, Any]:
+        status = super().get_connection_status()
+        status['streams'] = {
+            metric: {'consumers': len(streams), 'dropped': sum(s.dropped for s in streams)}
+            for metric, streams in self._streams.items() if streams
         }
+        return status
 
 
 class DataValidator:
@@ -367,23 +602,304 @@ class DataValidator:
             return data
 
 
+WAVE_TYPES = ('delta', 'theta', 'alpha', 'beta', 'gamma')
+
+
+def window_label(seconds: float) -> str:
+    """Libellé d'une fenêtre: 1.0 → '1s', 0.5 → '0.5s'"""
+    return f"{seconds:g}s"
+
+
+class RollingWindow:
+    """Agrégats glissants sur une durée, mis à jour en temps constant amorti par échantillon
+    
+    Somme et somme des carrés courantes (moyenne, écart-type), deques monotones
+    pour le minimum et le maximum, EWMA de constante de temps égale à la fenêtre
+    (adaptée aux échantillons irréguliers).
+    """
+    
+    __slots__ = ('seconds', 'samples', 'total', 'total_sq', 'ewma', '_last_time', '_min', '_max')
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.samples = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.ewma = None
+        self._last_time = None
+        self._min = deque()
+        self._max = deque()
+    
+    def add(self, timestamp: float, value: float):
+        self.samples.append((timestamp, value))
+        self.total += value
+        self.total_sq += value * value
+        
+        # Deques monotones: le premier élément est toujours l'extremum de la fenêtre
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            elapsed = max(timestamp - self._last_time, 0.0)
+            self.ewma += (1 - math.exp(-elapsed / self.seconds)) * (value - self.ewma)
+        self._last_time = timestamp
+        
+        self._evict(timestamp - self.seconds)
+    
+    def _evict(self, limit: float):
+        samples = self.samples
+        while samples and samples[0][0] <= limit:
+            _, value = samples.popleft()
+            self.total -= value
+            self.total_sq -= value * value
+        if not samples:
+            # Repart de zéro: pas de dérive d'arrondi des sommes courantes
+            self.total = self.total_sq = 0.0
+        while self._min and self._min[0][0] <= limit:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= limit:
+            self._max.popleft()
+    
+    def stats(self) -> Dict[str, float]:
+        count = len(self.samples)
+        if not count:
+            return {'count': 0}
+        mean = self.total / count
+        variance = max(self.total_sq / count - mean * mean, 0.0)
+        return {
+            'count': count,
+            'mean': round(mean, 4),
+            'std': round(math.sqrt(variance), 4),
+            'min': round(self._min[0][1], 4),
+            'max': round(self._max[0][1], 4),
+            'ewma': round(self.ewma, 4)
+        }
+
+
+class TrendEstimator:
+    """Tendance d'une série sur une fenêtre glissante, mise à jour en temps constant amorti
+    
+    Deux estimateurs sans unité, indépendants de l'échelle de la série :
+    
+    - moindres carrés : pente de la régression valeur ~ temps, tenue à jour par
+      sommes courantes (Σt, Σv, Σt², Σtv, Σv²) ; confiance = R² de l'ajustement
+    - différence d'EWMA : EWMA rapide (constante de temps ``seconds / 4``) moins
+      EWMA lente (``seconds``), rapportée à l'écart-type exponentiel de la série ;
+      confiance = tanh(|différence| / écart-type)
+    
+    La direction ne change que si la pente est confirmée (R² ≥ ``enter``) et de
+    même signe que la différence d'EWMA ; elle est conservée tant que R² reste
+    au-dessus de ``exit`` (hystérésis : indicateur stable sur le tableau de bord),
+    et reste 'stable' tant que les échantillons couvrent moins d'une demi-fenêtre.
+    Les temps sont relatifs à une origine recalée périodiquement, ce qui borne
+    l'erreur d'arrondi des sommes courantes.
+    """
+    
+    __slots__ = ('seconds', 'enter', 'exit', 'min_samples', 'samples', 'direction', 'slope', 'confidence',
+                 'fast', 'slow', 'variance', '_origin', '_last_time', '_t', '_v', '_tt', '_tv', '_vv')
+    
+    def __init__(self, seconds: float, enter: float = 0.5, exit: float = 0.25, min_samples: int = 5):
+        self.seconds = seconds
+        self.enter = enter
+        self.exit = exit
+        self.min_samples = max(min_samples, 3)
+        self.samples = deque()
+        self.direction = 'stable'
+        self.slope = 0.0
+        self.confidence = 0.0
+        self.fast = self.slow = None
+        self.variance = 0.0
+        self._last_time = None
+        self._rebase(None)
+    
+    def _rebase(self, origin: Optional[float]):
+        # Sommes recalculées depuis les échantillons de la fenêtre: O(n) une fois toutes les 8 fenêtres
+        self._origin = origin
+        self._t = self._v = self._tt = self._tv = self._vv = 0.0
+        for timestamp, value in self.samples:
+            t = timestamp - origin
+            self._t += t
+            self._v += value
+            self._tt += t * t
+            self._tv += t * value
+            self._vv += value * value
+    
+    def add(self, timestamp: float, value: float):
+        if self._origin is None or timestamp - self._origin > 8 * self.seconds:
+            self._rebase(self.samples[0][0] if self.samples else timestamp)
+        t = timestamp - self._origin
+        self.samples.append((timestamp, value))
+        self._t += t
+        self._v += value
+        self._tt += t * t
+        self._tv += t * value
+        self._vv += value * value
+        
+        limit = timestamp - self.seconds
+        samples = self.samples
+        while samples and samples[0][0] <= limit:
+            old_time, old = samples.popleft()
+            t = old_time - self._origin
+            self._t -= t
+            self._v -= old
+            self._tt -= t * t
+            self._tv -= t * old
+            self._vv -= old * old
+        
+        # EWMA à pas irréguliers (même pondération que RollingWindow)
+        if self.slow is None:
+            self.fast = self.slow = value
+        else:
+            elapsed = max(timestamp - self._last_time, 0.0)
+            deviation = value - self.slow
+            slow_weight = 1 - math.exp(-elapsed / self.seconds)
+            self.fast += (1 - math.exp(-4 * elapsed / self.seconds)) * (value - self.fast)
+            self.slow += slow_weight * deviation
+            self.variance = (1 - slow_weight) * (self.variance + slow_weight * deviation * deviation)
+        self._last_time = timestamp
+        self._update_direction()
+    
+    def _update_direction(self):
+        count = len(self.samples)
+        # Au moins min_samples échantillons couvrant la moitié de la fenêtre
+        if count < self.min_samples or self.samples[-1][0] - self.samples[0][0] < self.seconds / 2:
+            self.slope = self.confidence = 0.0
+            self.direction = 'stable'
+            return
+        sxx = self._tt - self._t * self._t / count
+        sxy = self._tv - self._t * self._v / count
+        syy = self._vv - self._v * self._v / count
+        if sxx <= 0 or syy <= 0:
+            self.slope = self.confidence = 0.0
+            self.direction = 'stable'
+            return
+        self.slope = sxy / sxx
+        self.confidence = min(sxy * sxy / (sxx * syy), 1.0)
+        
+        rising = self.slope > 0
+        agrees = (self.fast - self.slow > 0) == rising
+        current = self.direction == ('ascending' if rising else 'descending')
+        if self.confidence >= self.enter and agrees:
+            self.direction = 'ascending' if rising else 'descending'
+        elif not (current and self.confidence >= self.exit):
+            self.direction = 'stable'
+    
+    def stats(self) -> Dict:
+        score = (self.fast - self.slow) / math.sqrt(self.variance) if self.variance > 0 else 0.0
+        return {
+            'direction': self.direction,
+            'slope': round(self.slope, 4),
+            'confidence': round(self.confidence, 3),
+            'ewma_diff': round(self.fast - self.slow, 4) if self.slow is not None else 0.0,
+            'ewma_confidence': round(math.tanh(abs(score)), 3),
+            'count': len(self.samples)
+        }
+
+
 class MetricsProcessor:
-    """Processeur de métriques avec calculs statistiques"""
+    """Processeur de métriques: fenêtres glissantes multiples (1 s, 10 s, 60 s...) et résumé de session"""
     
-    def __init__(self, window_size: int = 10):
+    def __init__(self, window_size: int = 10, windows: Iterable[float] = (1.0, 10.0, 60.0),
+                 trend_windows: Iterable[float] = (10.0, 60.0), publish_interval: float = 0.0):
         self.window_size = window_size
-        self.history = {
-            'calm': [],
-            'focus': [],
-            'attention': [],
-            'brainwaves': {
-                'delta': [],
-                'theta': [],
-                'alpha': [],
-                'beta': [],
-                'gamma': []
-            }
-        }
+        self.windows = tuple(sorted(windows))
+        self.trend_windows = tuple(sorted(trend_windows))
+        # Intervalle minimal (secondes) entre deux publications d'agrégats d'une même série
+        self.publish_interval = publish_interval
+        self.reset()
+    
+    def add(self, series: str, value: float, timestamp: Optional[float] = None):
+        """Ajoute une valeur (horodatage monotone en secondes) sans calculer les agrégats"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        windows = self.rolling.get(series)
+        if windows is None:
+            windows = {window_label(seconds): RollingWindow(seconds) for seconds in self.windows}
+            self.rolling[series] = windows
+            self.trend_estimators[series] = {window_label(seconds): TrendEstimator(seconds)
+                                             for seconds in self.trend_windows}
+        self._update_session(series, value)
+        for estimator in self.trend_estimators[series].values():
+            estimator.add(timestamp, value)
+        for window in windows.values():
+            window.add(timestamp, value)
+    
+    def update(self, series: str, value: float, timestamp: Optional[float] = None) -> Dict[str, Dict]:
+        """Ajoute une valeur; retourne les agrégats par fenêtre"""
+        self.add(series, value, timestamp)
+        return self.window_stats(series)
+    
+    def window_stats(self, series: str) -> Dict[str, Dict]:
+        return {label: window.stats() for label, window in self.rolling.get(series, {}).items()}
+    
+    def publish(self, series: str, value: float, timestamp: Optional[float] = None) -> Dict[str, Dict]:
+        """Ajoute une valeur; retourne {'windows', 'trends'} au plus une fois par publish_interval, {} sinon"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.add(series, value, timestamp)
+        if not self._publish_due(series, timestamp):
+            return {}
+        return {'windows': self.window_stats(series), 'trends': self.trends(series)}
+    
+    def publish_bands(self, data: Dict, timestamp: Optional[float] = None) -> Dict[str, Dict]:
+        """Équivalent de publish() pour les puissances par bande (moyenne des canaux)"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.add_bands(data, timestamp)
+        if not self._publish_due('brainwaves', timestamp):
+            return {}
+        return {'windows': {wave_type: self.window_stats(f'brainwaves.{wave_type}') for wave_type in WAVE_TYPES
+                            if f'brainwaves.{wave_type}' in self.rolling},
+                'trends': self.band_trends()}
+    
+    def _publish_due(self, series: str, timestamp: float) -> bool:
+        # Les agrégats évoluent lentement: inutile de les recalculer et de les sérialiser à chaque échantillon
+        last = self._published.get(series)
+        if last is not None and 0 <= timestamp - last < self.publish_interval:
+            return False
+        self._published[series] = timestamp
+        return True
+    
+    def trends(self, series: str) -> Dict[str, Dict]:
+        """Tendances par fenêtre de TREND_WINDOWS (direction, pente par seconde, confiances)"""
+        return {label: estimator.stats() for label, estimator in self.trend_estimators.get(series, {}).items()}
+    
+    def trend(self, series: str) -> str:
+        """Direction sur la plus courte fenêtre de tendance ('stable' sans données)"""
+        estimators = self.trend_estimators.get(series)
+        return next(iter(estimators.values())).direction if estimators else 'stable'
+    
+    def band_trends(self) -> Dict[str, Dict]:
+        return {wave_type: self.trends(f'brainwaves.{wave_type}') for wave_type in WAVE_TYPES
+                if f'brainwaves.{wave_type}' in self.trend_estimators}
+    
+    def add_bands(self, data: Dict, timestamp: Optional[float] = None):
+        """Puissances par bande (une valeur par canal): ajoute la moyenne des canaux"""
+        for wave_type in WAVE_TYPES:
+            values = data.get(wave_type)
+            if values:
+                self.add(f'brainwaves.{wave_type}', sum(values) / len(values), timestamp)
+    
+    def update_bands(self, data: Dict, timestamp: Optional[float] = None) -> Dict[str, Dict]:
+        """Puissances par bande (une valeur par canal): agrégats de la moyenne des canaux"""
+        self.add_bands(data, timestamp)
+        return {wave_type: self.window_stats(f'brainwaves.{wave_type}') for wave_type in WAVE_TYPES
+                if data.get(wave_type)}
+    
+    def _update_session(self, series: str, value: float):
+        # Welford: moyenne et variance de toute la session sans conserver les valeurs
+        session = self.session.get(series)
+        if session is None:
+            session = self.session[series] = {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': value, 'max': value}
+        session['count'] += 1
+        delta = value - session['mean']
+        session['mean'] += delta / session['count']
+        session['m2'] += delta * (value - session['mean'])
+        session['min'] = min(session['min'], value)
+        session['max'] = max(session['max'], value)
     
     def process_metric(self, metric: str, data: Dict) -> Dict:
         """Traite une métrique et calcule les statistiques"""
@@ -397,23 +913,25 @@ class MetricsProcessor:
             probability = data.get('probability', 0)
             percentage = probability * 100
             
-            # Ajouter à l'historique
+            # Ajouter à l'historique (deque bornée)
             self.history[metric].append(percentage)
-            if len(self.history[metric]) > self.window_size:
-                self.history[metric].pop(0)
+            windows = self.update(metric, percentage)
             
             # Calculer les statistiques
             processed.update({
                 'probability': probability,
                 'percentage': percentage,
                 'average': self._calculate_average(self.history[metric]),
-                'trend': self._calculate_trend(self.history[metric])
+                'trend': self.trend(metric),
+                'trends': self.trends(metric),
+                'windows': windows
             })
         
         elif metric == 'brainwaves':
             processed['waves'] = {}
+            windows = self.update_bands(data)
             
-            for wave_type in ['delta', 'theta', 'alpha', 'beta', 'gamma']:
+            for wave_type in WAVE_TYPES:
                 wave_data = data.get(wave_type, [])
                 if wave_data:
                     # Calculer les statistiques pour cette onde
@@ -422,24 +940,22 @@ class MetricsProcessor:
                         'average': sum(wave_data) / len(wave_data),
                         'max': max(wave_data),
                         'min': min(wave_data),
-                        'std': self._calculate_std(wave_data)
+                        'std': self._calculate_std(wave_data),
+                        'windows': windows[wave_type]
                     }
                     
                     # Ajouter à l'historique
                     self.history['brainwaves'][wave_type].append(wave_stats['average'])
-                    if len(self.history['brainwaves'][wave_type]) > self.window_size:
-                        self.history['brainwaves'][wave_type].pop(0)
                     
-                    # Tendance
-                    wave_stats['trend'] = self._calculate_trend(
-                        self.history['brainwaves'][wave_type]
-                    )
+                    # Tendance (estimateurs incrémentaux, mis à jour par update_bands)
+                    wave_stats['trend'] = self.trend(f'brainwaves.{wave_type}')
+                    wave_stats['trends'] = self.trends(f'brainwaves.{wave_type}')
                     
                     processed['waves'][wave_type] = wave_stats
         
         return processed
     
-    def _calculate_average(self, values: List[float]) -> float:
+    def _calculate_average(self, values: Iterable[float]) -> float:
         """Calcule la moyenne"""
         return sum(values) / len(values) if values else 0
     
@@ -452,28 +968,20 @@ class MetricsProcessor:
         variance = sum((x - mean) ** 2 for x in values) / len(values)
         return variance ** 0.5
     
-    def _calculate_trend(self, values: List[float]) -> str:
-        """Calcule la tendance (ascending, descending, stable)"""
-        if len(values) < 2:
-            return 'stable'
-        
-        recent = values[-3:] if len(values) >= 3 else values
-        
-        if len(recent) < 2:
-            return 'stable'
-        
-        # Calculer la pente
-        slope = (recent[-1] - recent[0]) / len(recent)
-        
-        if slope > 0.5:
-            return 'ascending'
-        elif slope < -0.5:
-            return 'descending'
-        else:
-            return 'stable'
+    def _session_stats(self, series: str) -> Optional[Dict]:
+        session = self.session.get(series)
+        if not session:
+            return None
+        return {
+            'average': session['mean'],
+            'max': session['max'],
+            'min': session['min'],
+            'std': math.sqrt(session['m2'] / session['count']),
+            'samples': session['count']
+        }
     
     def get_session_summary(self) -> Dict:
-        """Retourne un résumé de la session"""
+        """Retourne un résumé de la session (agrégats tenus à jour, sans recalcul)"""
         summary = {
             'timestamp': datetime.now().isoformat(),
             'metrics': {}
@@ -481,47 +989,34 @@ class MetricsProcessor:
         
         # Résumé des métriques principales
         for metric in ['calm', 'focus', 'attention']:
-            if self.history[metric]:
-                summary['metrics'][metric] = {
-                    'average': self._calculate_average(self.history[metric]),
-                    'max': max(self.history[metric]),
-                    'min': min(self.history[metric]),
-                    'std': self._calculate_std(self.history[metric]),
-                    'samples': len(self.history[metric])
-                }
+            stats = self._session_stats(metric)
+            if stats:
+                summary['metrics'][metric] = stats
         
         # Résumé des ondes cérébrales
         brainwave_summary = {}
-        for wave_type in ['delta', 'theta', 'alpha', 'beta', 'gamma']:
-            wave_history = self.history['brainwaves'][wave_type]
-            if wave_history:
-                brainwave_summary[wave_type] = {
-                    'average': self._calculate_average(wave_history),
-                    'max': max(wave_history),
-                    'min': min(wave_history),
-                    'std': self._calculate_std(wave_history),
-                    'samples': len(wave_history)
-                }
+        for wave_type in WAVE_TYPES:
+            stats = self._session_stats(f'brainwaves.{wave_type}')
+            if stats:
+                brainwave_summary[wave_type] = stats
         
         if brainwave_summary:
             summary['metrics']['brainwaves'] = brainwave_summary
         
         return summary
     
+    def reset_session(self):
+        """Nouveau résumé de session (les fenêtres glissantes continuent)"""
+        self.session = {}
+    
     def reset(self):
-        """Remet à zéro l'historique"""
-        self.history = {
-            'calm': [],
-            'focus': [],
-            'attention': [],
-            'brainwaves': {
-                'delta': [],
-                'theta': [],
-                'alpha': [],
-                'beta': [],
-                'gamma': []
-            }
-        }
+        """Remet à zéro l'historique, les fenêtres et le résumé de session"""
+        self.history = {metric: deque(maxlen=self.window_size) for metric in ('calm', 'focus', 'attention')}
+        self.history['brainwaves'] = {wave_type: deque(maxlen=self.window_size) for wave_type in WAVE_TYPES}
+        self.rolling: Dict[str, Dict[str, RollingWindow]] = {}
+        self.trend_estimators: Dict[str, Dict[str, TrendEstimator]] = {}
+        self.session: Dict[str, Dict] = {}
+        self._published: Dict[str, float] = {}
 
 
 # CORRECTION: Classe utilitaire pour la compatibilité API
@@ -0,0 +1,204 @@
+"""
+Simulateur local du SDK Neurosity - fonctionne sans compte, sans réseau et sans casque
+
+Expose la même surface que ``neurosity.NeurositySDK`` utilisée par l'application
+(``login``, ``logout``, ``calm``, ``focus``, ``brainwaves_raw``), chaque souscription
+retournant une fonction de désabonnement. Les données générées passent la
+validation de ``BiologicalDataValidator``.
+
+Sélection par variable d'environnement : ``NEUROSITY_SDK=simulator``
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# Canaux du Neurosity Crown (ordre du SDK)
+CROWN_CHANNELS = ['CP3', 'C3', 'F5', 'PO3', 'PO4', 'F6', 'C4', 'CP4']
+
+# Composantes sinusoïdales par bande: (fréquence Hz, amplitude μV)
+BAND_COMPONENTS = {
+    'delta': (2.0, 20.0),
+    'theta': (6.0, 10.0),
+    'alpha': (10.0, 15.0),
+    'beta': (20.0, 5.0),
+    'gamma': (40.0, 2.0)
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class _StreamEmitter:
+    """Thread cadencé qui appelle ``produce`` puis ``callback`` à fréquence fixe"""
+
+    def __init__(self, name: str, rate_hz: float, produce: Callable[[], Dict],
+                 callback: Callable, phase: float = 0.0):
+        self.name = name
+        self.period = 1.0 / max(rate_hz, 0.001)
+        self.phase = phase
+        self.produce = produce
+        self.callback = callback
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"sim-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _run(self):
+        # Ordonnancement par échéances absolues : pas de dérive cumulative,
+        # rattrapage en rafale si le thread a pris du retard
+        next_deadline = time.perf_counter() + self.period + self.phase
+        while not self._stop_event.is_set():
+            delay = next_deadline - time.perf_counter()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            try:
+                self.callback(self.produce())
+            except Exception:
+                # Le SDK réel isole les erreurs des callbacks utilisateur
+                pass
+
+            next_deadline += self.period
+            # Retard de plus d'une seconde : on repart de maintenant
+            if time.perf_counter() - next_deadline > 1.0:
+                next_deadline = time.perf_counter() + self.period
+
+
+class SimulatedNeurositySDK:
+    """Remplaçant local de NeurositySDK avec cadences configurables (jusqu'au kHz)"""
+
+    def __init__(self, options: Optional[Dict] = None):
+        options = options or {}
+        self.device_id = options.get('device_id') or 'simulated-crown'
+        self.metric_rate = float(options.get('metric_rate', _env_float('NEUROSITY_SIM_METRIC_HZ', 4.0)))
+        self.sampling_rate = float(options.get('sampling_rate', _env_float('NEUROSITY_SIM_SAMPLING_RATE', 256.0)))
+        self.epoch_size = int(options.get('epoch_size', _env_float('NEUROSITY_SIM_EPOCH_SIZE', 16)))
+        self.epoch_size = max(self.epoch_size, 1)
+
+        # Graine dérivée du device_id : chaque casque simulé a son propre signal
+        seed = options.get('seed')
+        if seed is None:
+            seed = sum(ord(c) for c in str(self.device_id))
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._emitters = []
+        self._logged_in = False
+
+        # État des processus d'Ornstein-Uhlenbeck pour calm/focus
+        self._metric_state = {'calm': 0.45, 'focus': 0.40}
+        self._last_metric_ts = {'calm': 0, 'focus': 0}
+
+        # État du générateur EEG brut
+        self._raw_sample_index = 0
+        self._channel_phases = self._rng.uniform(0, 2 * np.pi, (len(CROWN_CHANNELS), len(BAND_COMPONENTS)))
+
+    # ------------------------------------------------------------------
+    # Authentification
+    # ------------------------------------------------------------------
+
+    def login(self, credentials: Dict) -> Dict:
+        """Simule l'authentification (aucun appel réseau)"""
+        self._logged_in = True
+        return {'user': credentials.get('email', 'simulator'), 'device_id': self.device_id, 'simulated': True}
+
+    def logout(self):
+        """Arrête tous les flux et termine la session simulée"""
+        for emitter in list(self._emitters):
+            emitter.stop()
+        self._emitters = []
+        self._logged_in = False
+
+    # ------------------------------------------------------------------
+    # Souscriptions
+    # ------------------------------------------------------------------
+
+    def calm(self, callback: Callable) -> Callable:
+        # Décalage d'une demi-période : calm et focus ne partagent jamais un timestamp
+        return self._subscribe('calm', self.metric_rate, lambda: self._next_metric('calm'), callback, 0.0)
+
+    def focus(self, callback: Callable) -> Callable:
+        return self._subscribe('focus', self.metric_rate, lambda: self._next_metric('focus'), callback,
+                               0.5 / max(self.metric_rate, 0.001))
+
+    def brainwaves_raw(self, callback: Callable) -> Callable:
+        epoch_rate = self.sampling_rate / self.epoch_size
+        return self._subscribe('raw', epoch_rate, self._next_raw_epoch, callback, 0.0)
+
+    def _subscribe(self, name: str, rate_hz: float, produce: Callable, callback: Callable,
+                   phase: float) -> Callable:
+        if not self._logged_in:
+            raise RuntimeError("Simulateur Neurosity: login requis avant souscription")
+
+        emitter = _StreamEmitter(name, rate_hz, produce, callback, phase)
+        self._emitters.append(emitter)
+        emitter.start()
+
+        def unsubscribe():
+            emitter.stop()
+            if emitter in self._emitters:
+                self._emitters.remove(emitter)
+
+        return unsubscribe
+
+    # ------------------------------------------------------------------
+    # Générateurs de données
+    # ------------------------------------------------------------------
+
+    def _next_metric(self, label: str) -> Dict:
+        """Probabilité suivant un processus d'Ornstein-Uhlenbeck borné"""
+        with self._lock:
+            value = self._metric_state[label]
+            mean = 0.45 if label == 'calm' else 0.40
+            value += 0.15 * (mean - value) + float(self._rng.normal(0, 0.04))
+            value = min(max(value, 0.06), 0.94)
+            self._metric_state[label] = value
+
+            timestamp = max(int(time.time() * 1000), self._last_metric_ts[label] + 1)
+            self._last_metric_ts[label] = timestamp
+
+        return {
+            'probability': value,
+            'label': label,
+            'metric': 'awareness',
+            'timestamp': timestamp
+        }
+
+    def _next_raw_epoch(self) -> Dict:
+        """Époque EEG brute (μV) au format ``brainwaves_raw`` du SDK"""
+        with self._lock:
+            start = self._raw_sample_index
+            self._raw_sample_index += self.epoch_size
+            noise = self._rng.normal(0, 3.0, (len(CROWN_CHANNELS), self.epoch_size))
+
+        t = (start + np.arange(self.epoch_size)) / self.sampling_rate
+        signal = noise
+        for band_index, (frequency, amplitude) in enumerate(BAND_COMPONENTS.values()):
+            phases = self._channel_phases[:, band_index][:, None]
+            signal = signal + amplitude * np.sin(2 * np.pi * frequency * t[None, :] + phases)
+        # Bruit secteur résiduel (atténué par le notch du casque)
+        signal = signal + 0.5 * np.sin(2 * np.pi * 60.0 * t)[None, :]
+
+        return {
+            'label': 'raw',
+            'data': signal.tolist(),
+            'info': {
+                'channelNames': CROWN_CHANNELS,
+                'notchFrequency': '60Hz',
+                'samplingRate': self.sampling_rate,
+                'startTime': int(time.time() * 1000)
+            }
+        }
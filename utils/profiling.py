@@ -0,0 +1,273 @@
+"""
+Profilage à la demande d'un processus en production (sans redémarrage ni outil externe)
+
+- StackSampler : échantillonneur statistique de toutes les piles de threads,
+  sortie « collapsed stacks » prête pour flamegraph.pl / speedscope
+- ThreadProfiler : cProfile activé depuis le thread ciblé (boucle coopérative),
+  sortie pstats
+- MemoryProfiler : instantanés tracemalloc et différentiel avec le précédent;
+  le suivi (qui ralentit chaque allocation) s'arrête sur demande ou seul après
+  une fenêtre sans nouvel instantané
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def profile_path(directory: str, process_name: str, kind: str, extension: str) -> Path:
+    """Chemin horodaté d'un fichier de profil: <dir>/<date>_<processus>_<type>.<ext>"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return Path(directory) / f"{timestamp}_{process_name}_{kind}.{extension}"
+
+
+class StackSampler:
+    """Échantillonne périodiquement les piles de tous les threads du processus"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self, path: Optional[Path] = None) -> Optional[str]:
+        """Arrête l'échantillonnage et écrit les piles agrégées si un chemin est fourni"""
+        if not self._thread:
+            return None
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+
+        if path is None:
+            return None
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return str(path)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                self.stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})".replace(';', ','))
+            frame = frame.f_back
+        parts.append(thread_name)
+        # Format collapsed: racine à gauche, séparateur ';' (le compteur suit le dernier espace)
+        return ';'.join(reversed(parts))
+
+
+class ThreadProfiler:
+    """cProfile piloté à distance mais exécuté dans le thread ciblé via poll()"""
+
+    def __init__(self):
+        self._profile = None
+        self._requested = False
+        self._dump_path = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def request_start(self):
+        with self._lock:
+            self._requested = True
+            self._dump_path = None
+
+    def request_stop(self, path: Path, timeout: float = 5.0) -> Optional[str]:
+        """Demande l'arrêt; attend que le thread ciblé ait écrit le fichier pstats"""
+        with self._lock:
+            if not self._requested and self._profile is None:
+                return None
+            self._done.clear()
+            self._requested = False
+            self._dump_path = path
+        if self._done.wait(timeout):
+            return str(path)
+        return None
+
+    def poll(self):
+        """À appeler à chaque itération de la boucle du thread profilé"""
+        if self._requested and self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif not self._requested and self._profile is not None:
+            self._profile.disable()
+            try:
+                if self._dump_path:
+                    self._profile.dump_stats(str(self._dump_path))
+            finally:
+                self._profile = None
+                self._done.set()
+
+
+class MemoryProfiler:
+    """
+    Instantanés tracemalloc, différentiel par rapport au précédent
+
+    Le suivi démarré par snapshot() s'arrête avec stop() ou, si ``window`` > 0,
+    ``window`` secondes après le dernier instantané
+    """
+
+    def __init__(self, frames: int = 10, window: float = 300.0):
+        self.frames = frames
+        self.window = window
+        self._previous = None
+        self._timer = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self, path: Optional[Path] = None, limit: int = 15) -> Dict:
+        with self._lock:
+            started = False
+            if not tracemalloc.is_tracing():
+                # Premier appel: le suivi démarre, le différentiel sera disponible au suivant
+                tracemalloc.start(self.frames)
+                started = True
+
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+
+            result = {
+                'tracing_started': started,
+                'traced_current_mb': round(current / (1024 * 1024), 3),
+                'traced_peak_mb': round(peak / (1024 * 1024), 3),
+                'top': self._format_stats(snapshot.statistics('lineno')[:limit]),
+                'growth': [],
+                'auto_stop_in': self.window if self.window > 0 else None
+            }
+            if self._previous is not None:
+                result['growth'] = self._format_stats(snapshot.compare_to(self._previous, 'lineno')[:limit])
+            self._previous = snapshot
+            self._schedule_stop()
+
+        if path is not None:
+            snapshot.dump(str(path))
+            result['file'] = str(path)
+        return result
+
+    def stop(self) -> Dict:
+        """Arrête le suivi tracemalloc et oublie l'instantané de référence"""
+        with self._lock:
+            return self._stop()
+
+    def _stop(self) -> Dict:
+        self._generation += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._previous = None
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.stop()
+        return {'tracing_stopped': tracing}
+
+    def _schedule_stop(self):
+        # Chaque instantané repousse l'arrêt automatique d'une fenêtre complète
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._generation += 1
+        if self.window > 0:
+            self._timer = threading.Timer(self.window, self._auto_stop, args=(self._generation,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _auto_stop(self, generation: int):
+        with self._lock:
+            # Instantané ou arrêt intervenu entre-temps: ce minuteur est périmé
+            if generation == self._generation:
+                self._stop()
+
+    @staticmethod
+    def _format_stats(stats) -> List[Dict]:
+        formatted = []
+        for stat in stats:
+            frame = stat.traceback[0]
+            entry = {
+                'location': f"{frame.filename}:{frame.lineno}",
+                'size_kb': round(stat.size / 1024, 2),
+                'count': stat.count
+            }
+            if hasattr(stat, 'size_diff'):
+                entry['size_diff_kb'] = round(stat.size_diff / 1024, 2)
+            formatted.append(entry)
+        return formatted
+
+
+class ProcessProfiler:
+    """Regroupe échantillonneur et mémoire pour un processus donné"""
+
+    def __init__(self, process_name: str, directory: str, memory_window: float = 300.0):
+        self.process_name = process_name
+        self.directory = directory
+        self.sampler = None
+        self.memory = MemoryProfiler(window=memory_window)
+
+    def start(self, interval: float = 0.01) -> Dict:
+        if self.sampler and self.sampler.running:
+            return {'success': True, 'message': 'Profilage déjà actif', 'process': self.process_name}
+        self.sampler = StackSampler(interval)
+        self.sampler.start()
+        return {'success': True, 'process': self.process_name, 'interval': interval}
+
+    def stop(self) -> Dict:
+        if not self.sampler or not self.sampler.running:
+            return {'success': False, 'error': 'Aucun profilage actif', 'process': self.process_name}
+        path = profile_path(self.directory, self.process_name, 'cpu', 'folded')
+        duration = time.time() - self.sampler.started_at
+        samples = self.sampler.samples
+        self.sampler.stop(path)
+        return {
+            'success': True,
+            'process': self.process_name,
+            'files': [str(path)],
+            'samples': samples,
+            'duration': round(duration, 2)
+        }
+
+    def memory_snapshot(self, limit: int = 15) -> Dict:
+        path = profile_path(self.directory, self.process_name, 'memory', 'tracemalloc')
+        return {'success': True, 'process': self.process_name, **self.memory.snapshot(path, limit)}
+
+    def memory_stop(self) -> Dict:
+        return {'success': True, 'process': self.process_name, **self.memory.stop()}
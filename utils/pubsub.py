@@ -0,0 +1,274 @@
+"""
+Pub/sub local sur socket Unix (NDJSON : un message JSON par ligne)
+
+- Publisher : diffuse chaque message à tous les abonnés. Chaque abonné a son
+  propre tampon borné et son thread d'écriture : un abonné lent perd ses
+  messages les plus anciens sans ralentir la publication ni les autres abonnés.
+  Les lignes envoyées par les abonnés sont remises à ``on_message``.
+- Subscriber : client avec tampon borné (perte des plus anciens), reconnexion
+  automatique et interface proche d'une queue (``get``, ``get_nowait``, ``qsize``).
+
+Exemple de script d'analyse :
+
+    from utils.pubsub import Subscriber
+    for message in Subscriber('/tmp/neurosity-default.sock').start():
+        print(message['type'], message.get('data'))
+"""
+
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+def encode(message: Dict) -> bytes:
+    return (json.dumps(message, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+class _Connection:
+    """Abonné côté serveur: tampon borné + thread d'écriture + thread de lecture"""
+
+    def __init__(self, sock: socket.socket, buffer_size: int, on_message: Optional[Callable],
+                 on_close: Callable):
+        self.sock = sock
+        self.buffer = deque(maxlen=buffer_size)
+        self.sent = 0
+        self.dropped = 0
+        self.connected_at = time.time()
+        self._on_message = on_message
+        self._on_close = on_close
+        self._cond = threading.Condition()
+        self._closed = False
+        threading.Thread(target=self._write_loop, name='pubsub-writer', daemon=True).start()
+        threading.Thread(target=self._read_loop, name='pubsub-reader', daemon=True).start()
+
+    def offer(self, line: bytes):
+        with self._cond:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(line)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self._on_close(self)
+
+    def stats(self) -> Dict:
+        return {
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'buffered': len(self.buffer),
+            'connected_for': round(time.time() - self.connected_at, 1)
+        }
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self.buffer and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Envoi groupé de tout ce qui est en attente
+                batch = list(self.buffer)
+                self.buffer.clear()
+            try:
+                self.sock.sendall(b''.join(batch))
+                self.sent += len(batch)
+            except OSError:
+                self.close()
+                return
+
+    def _read_loop(self):
+        try:
+            for line in self.sock.makefile('rb'):
+                if self._on_message and line.strip():
+                    try:
+                        self._on_message(json.loads(line), self)
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        self.close()
+
+
+class Publisher:
+    """Serveur de diffusion sur socket Unix"""
+
+    def __init__(self, path: str, buffer_size: int = 1000, on_message: Optional[Callable] = None):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.on_message = on_message
+        self.published = 0
+        self._connections: List[_Connection] = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self) -> 'Publisher':
+        # Socket orphelin d'une exécution précédente
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        # Flux physiologique: socket réservé à l'utilisateur du démon
+        os.chmod(self.path, 0o600)
+        self._server.listen(16)
+        threading.Thread(target=self._accept_loop, name='pubsub-accept', daemon=True).start()
+        return self
+
+    def publish(self, message: Dict):
+        """Sérialise une seule fois puis dépose le message dans le tampon de chaque abonné"""
+        line = encode(message)
+        self.published += 1
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.offer(line)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            connections = list(self._connections)
+        return {
+            'published': self.published,
+            'subscribers': [connection.stats() for connection in connections]
+        }
+
+    def close(self):
+        if self._server:
+            self._server.close()
+            self._server = None
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept_loop(self):
+        while self._server:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            connection = _Connection(sock, self.buffer_size, self.on_message, self._remove)
+            with self._lock:
+                self._connections.append(connection)
+
+    def _remove(self, connection: _Connection):
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+
+class Subscriber:
+    """Client d'un Publisher: tampon borné, reconnexion automatique"""
+
+    def __init__(self, path: str, buffer_size: int = 1000, reconnect_delay: float = 1.0):
+        self.path = path
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.received = 0
+        self.reconnect_delay = reconnect_delay
+        self.on_connect: Optional[Callable] = None
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def start(self) -> 'Subscriber':
+        self._thread = threading.Thread(target=self._run, name='pubsub-subscriber', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._closed = True
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        with self._cond:
+            self._cond.notify_all()
+
+    def send(self, message: Dict):
+        """Envoie un message au Publisher (ex: commande)"""
+        sock = self._sock
+        if sock is None:
+            raise ConnectionError(f"Non connecté à {self.path}")
+        with self._send_lock:
+            sock.sendall(encode(message))
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict:
+        with self._cond:
+            if block and not self.buffer:
+                self._cond.wait_for(lambda: self.buffer or self._closed, timeout)
+            if not self.buffer:
+                raise queue.Empty
+            return self.buffer.popleft()
+
+    def get_nowait(self) -> Dict:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return len(self.buffer)
+
+    def __iter__(self):
+        while not self._closed:
+            try:
+                yield self.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _deliver(self, message: Dict):
+        with self._cond:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(message)
+            self._cond.notify()
+
+    def _run(self):
+        while not self._closed:
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.path)
+            except OSError:
+                time.sleep(self.reconnect_delay)
+                continue
+
+            self._sock = sock
+            if self.on_connect:
+                self.on_connect()
+            try:
+                for line in sock.makefile('rb'):
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.received += 1
+                    self._deliver(message)
+            except OSError:
+                pass
+            self._sock = None
+            if not self._closed:
+                time.sleep(self.reconnect_delay)
@@ -0,0 +1,317 @@
+"""
+Règles d'alerte déclaratives évaluées sur le flux temps réel
+
+Une règle porte sur un flux (calm, focus, brainwaves, ou une bande :
+alpha / brainwaves.alpha) et un type de condition :
+
+- ``above`` / ``below`` : valeur strictement au-dessus / au-dessous de
+  ``value`` sans interruption pendant ``for`` secondes
+- ``drop`` / ``rise`` : baisse / hausse d'au moins ``value`` points par
+  rapport au maximum / minimum des ``within`` dernières secondes
+- ``absent`` : aucun échantillon du flux depuis ``for`` secondes
+
+Exemple (config/rules.json)::
+
+    [{"id": "focus_high", "stream": "focus", "when": "above", "value": 70, "for": 30},
+     {"id": "calm_drop", "stream": "calm", "when": "drop", "value": 20, "within": 10},
+     {"id": "no_brainwaves", "stream": "brainwaves", "when": "absent", "for": 5}]
+
+Les règles d'un même flux qui partagent un type et une durée forment un
+groupe : une seule fenêtre glissante (minimum par file monotone, O(1) amorti
+par échantillon) et des seuils triés. Chaque échantillon met à jour la
+fenêtre puis une recherche dichotomique donne les règles satisfaites : le coût
+dépend du nombre de groupes, pas du nombre de règles. Une alerte est émise au
+passage de la condition de fausse à vraie, puis la règle est réarmée quand la
+condition redevient fausse.
+"""
+
+import bisect
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SUSTAINED = ('above', 'below')
+CHANGE = ('drop', 'rise')
+ABSENT = 'absent'
+SEVERITIES = ('info', 'warning', 'critical')
+
+
+def _stream_name(stream: str) -> str:
+    """Nom de série des bandes: 'alpha' → 'brainwaves.alpha'"""
+    if stream in ('delta', 'theta', 'alpha', 'beta', 'gamma'):
+        return f'brainwaves.{stream}'
+    return stream
+
+
+def _default_message(rule: Dict) -> str:
+    stream, when = rule['stream'], rule['when']
+    if when == ABSENT:
+        return f"{stream}: aucune donnée depuis {rule['for']:g} s"
+    if when in SUSTAINED:
+        sign = '>' if when == 'above' else '<'
+        return f"{stream} {sign} {rule['value']:g} pendant {rule['for']:g} s"
+    change = 'baisse' if when == 'drop' else 'hausse'
+    return f"{stream}: {change} de {rule['value']:g} en {rule['within']:g} s"
+
+
+def parse_rule(spec: Dict, index: int = 0) -> Dict:
+    """Valide une règle déclarative et complète ses valeurs par défaut (ValueError si invalide)"""
+    when = spec.get('when')
+    if when not in SUSTAINED + CHANGE + (ABSENT,):
+        raise ValueError(f"règle {index}: type 'when' inconnu: {when!r}")
+    if not spec.get('stream'):
+        raise ValueError(f"règle {index}: 'stream' manquant")
+
+    rule = {
+        'id': str(spec.get('id') or f"rule_{index}"),
+        'stream': _stream_name(spec['stream']),
+        'when': when,
+        'severity': spec.get('severity', 'warning' if when == ABSENT else 'info'),
+        'cooldown': float(spec.get('cooldown', 0)),
+    }
+    if rule['severity'] not in SEVERITIES:
+        raise ValueError(f"règle {rule['id']}: sévérité inconnue: {rule['severity']!r}")
+
+    try:
+        if when in SUSTAINED:
+            rule['value'] = float(spec['value'])
+            rule['for'] = float(spec.get('for', 0))
+        elif when in CHANGE:
+            rule['value'] = abs(float(spec['value']))
+            rule['within'] = float(spec['within'])
+        else:
+            rule['for'] = float(spec['for'])
+    except KeyError as e:
+        raise ValueError(f"règle {rule['id']}: champ {e} manquant")
+    except (TypeError, ValueError):
+        raise ValueError(f"règle {rule['id']}: valeur numérique invalide")
+
+    if rule.get('for', 0) < 0 or rule.get('within', 1) <= 0:
+        raise ValueError(f"règle {rule['id']}: durée invalide")
+    rule['message'] = spec.get('message') or _default_message(rule)
+    return rule
+
+
+def load_rules(path: Optional[str]) -> List[Dict]:
+    """Règles d'un fichier JSON (liste, ou objet {"rules": [...]}); aucune si le fichier n'existe pas"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+    if isinstance(specs, dict):
+        specs = specs.get('rules', [])
+    return [parse_rule(spec, index) for index, spec in enumerate(specs)]
+
+
+class _SlidingMin:
+    """Minimum des valeurs des ``seconds`` dernières secondes (file monotone)"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._items = deque()
+
+    def push(self, timestamp: float, value: float) -> float:
+        items = self._items
+        while items and items[-1][1] >= value:
+            items.pop()
+        items.append((timestamp, value))
+        limit = timestamp - self.seconds
+        while items[0][0] < limit:
+            items.popleft()
+        return items[0][1]
+
+    def clear(self):
+        self._items.clear()
+
+
+class _Group:
+    """Règles d'un flux partageant type et durée: une fenêtre, des seuils triés
+
+    Les valeurs sont transformées (x = v ou -v selon le type) pour que les
+    règles satisfaites soient toujours un préfixe de la liste triée.
+    """
+
+    def __init__(self, when: str, seconds: float):
+        self.when = when
+        self.seconds = seconds
+        self.sign = -1.0 if when in ('below', 'drop') else 1.0
+        self.window = _SlidingMin(seconds)
+        self.rules: List[Dict] = []
+        self.keys: List[float] = []
+        self.active = 0
+        self._since = None
+        self._last = None
+
+    def add(self, rule: Dict):
+        key = self.sign * rule['value'] if self.when in SUSTAINED else rule['value']
+        position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.rules.insert(position, rule)
+
+    def update(self, timestamp: float, value: float) -> Tuple[List[Dict], float]:
+        """Nouvel échantillon: règles devenues vraies et valeur observée (durée soutenue ou écart)"""
+        x = self.sign * value
+        if self._last is None or timestamp - self._last > max(self.seconds, 1.0):
+            # Premier échantillon ou trou dans le flux: la durée soutenue repart de zéro
+            self.window.clear()
+            self._since = timestamp
+        self._last = timestamp
+        low = self.window.push(timestamp, x)
+
+        if self.when in SUSTAINED:
+            covered = timestamp - self._since >= self.seconds
+            active = bisect.bisect_left(self.keys, low) if covered else 0
+            observed = value
+        else:
+            observed = x - low
+            active = bisect.bisect_right(self.keys, observed)
+        return self._transition(active), observed
+
+    def _transition(self, active: int) -> List[Dict]:
+        previous, self.active = self.active, active
+        return self.rules[previous:active] if active > previous else []
+
+    def reset(self):
+        self.window.clear()
+        self.active = 0
+        self._since = None
+        self._last = None
+
+
+class _AbsenceGroup:
+    """Règles 'absent' d'un flux, triées par durée, évaluées à chaque tour de pompe"""
+
+    def __init__(self):
+        self.rules: List[Dict] = []
+        self.keys: List[float] = []
+        self.active = 0
+        self.last_seen = None
+
+    def add(self, rule: Dict):
+        position = bisect.bisect_right(self.keys, rule['for'])
+        self.keys.insert(position, rule['for'])
+        self.rules.insert(position, rule)
+
+    def seen(self, timestamp: float):
+        self.last_seen = timestamp
+        self.active = 0
+
+    def tick(self, now: float) -> Tuple[List[Dict], float]:
+        if self.last_seen is None:
+            # Référence: début de l'évaluation (aucun échantillon encore reçu)
+            self.last_seen = now
+        silence = now - self.last_seen
+        active = bisect.bisect_right(self.keys, silence)
+        previous, self.active = self.active, active
+        return (self.rules[previous:active] if active > previous else []), silence
+
+    def reset(self):
+        self.active = 0
+        self.last_seen = None
+
+
+class RuleEngine:
+    """Évaluation incrémentale des règles, groupées par flux puis par (type, durée)"""
+
+    def __init__(self, rules: Iterable[Dict] = ()):
+        self.rules: List[Dict] = []
+        self.fired = 0
+        self._groups: Dict[str, List[_Group]] = {}
+        self._absence: Dict[str, _AbsenceGroup] = {}
+        self._last_fired: Dict[str, float] = {}
+        self._running = False
+        for rule in rules:
+            self.add(rule)
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> 'RuleEngine':
+        return cls(load_rules(path))
+
+    def add(self, rule: Dict):
+        if 'message' not in rule:
+            rule = parse_rule(rule, len(self.rules))
+        self.rules.append(rule)
+        if rule['when'] == ABSENT:
+            self._absence.setdefault(rule['stream'], _AbsenceGroup()).add(rule)
+            return
+        seconds = rule['for'] if rule['when'] in SUSTAINED else rule['within']
+        groups = self._groups.setdefault(rule['stream'], [])
+        group = next((g for g in groups if g.when == rule['when'] and g.seconds == seconds), None)
+        if group is None:
+            group = _Group(rule['when'], seconds)
+            groups.append(group)
+        group.add(rule)
+
+    def observe(self, stream: str, value: Optional[float], timestamp: float) -> List[Dict]:
+        """Échantillon d'un flux (value None: présence seule); retourne les alertes déclenchées"""
+        self._running = True
+        absence = self._absence.get(stream)
+        if absence is not None:
+            absence.seen(timestamp)
+        groups = self._groups.get(stream)
+        if not groups or value is None:
+            return []
+
+        alerts = []
+        for group in groups:
+            rules, observed = group.update(timestamp, value)
+            if rules:
+                alerts.extend(self._fire(rules, observed, timestamp))
+        return alerts
+
+    def observe_bands(self, data: Dict, timestamp: float, bands: Iterable[str] = ()) -> List[Dict]:
+        """Puissances par bande: présence du flux brainwaves, puis moyenne des canaux des bandes surveillées"""
+        alerts = self.observe('brainwaves', None, timestamp)
+        for band in bands:
+            name = f'brainwaves.{band}'
+            values = data.get(band)
+            if name in self._groups and values:
+                alerts.extend(self.observe(name, sum(values) / len(values), timestamp))
+        return alerts
+
+    def tick(self, now: float) -> List[Dict]:
+        """Règles 'absent': à appeler régulièrement pendant le monitoring"""
+        self._running = True
+        alerts = []
+        for absence in self._absence.values():
+            rules, silence = absence.tick(now)
+            if rules:
+                alerts.extend(self._fire(rules, silence, now))
+        return alerts
+
+    def reset(self):
+        """Fin du monitoring: fenêtres vidées, toutes les règles réarmées"""
+        if not self._running:
+            return
+        self._running = False
+        for groups in self._groups.values():
+            for group in groups:
+                group.reset()
+        for absence in self._absence.values():
+            absence.reset()
+
+    def _fire(self, rules: List[Dict], observed: float, timestamp: float) -> List[Dict]:
+        alerts = []
+        for rule in rules:
+            last = self._last_fired.get(rule['id'])
+            if last is not None and timestamp - last < rule['cooldown']:
+                continue
+            self._last_fired[rule['id']] = timestamp
+            self.fired += 1
+            alerts.append({
+                'rule': rule['id'],
+                'stream': rule['stream'],
+                'when': rule['when'],
+                'severity': rule['severity'],
+                'message': rule['message'],
+                'value': round(observed, 4)
+            })
+        return alerts
+
+    def summary(self) -> Dict:
+        return {
+            'rules': len(self.rules),
+            'groups': sum(len(groups) for groups in self._groups.values()) + len(self._absence),
+            'fired': self.fired
+        }
@@ -0,0 +1,154 @@
+"""
+Qualité du signal par canal, estimée en continu sur l'EEG brut
+
+Les époques s'accumulent sur des intervalles de ``interval`` secondes ; pour
+chaque canal :
+
+- variance : sommes des échantillons et de leurs carrés (écart-type en μV)
+- ligne plate : écart-type sous ``flat_uv`` (électrode sans contact, canal saturé)
+- secteur : puissance à 50 et 60 Hz par DFT à une fréquence (équivalent de
+  Goertzel, vectorisé sur l'époque avec une table de phaseurs précalculée),
+  rapportée à la variance du canal
+
+Chaque canal reçoit un état (good, fair, poor, flat) et le casque un état
+global (excellent, good, poor, no_contact). Le vecteur n'est publié qu'à la
+première évaluation puis quand les états changent, changement confirmé sur
+``confirm`` intervalles consécutifs : quelques messages par session plutôt
+qu'une copie du statut à chaque échantillon.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+LINE_FREQUENCIES = (50.0, 60.0)
+STATES = ('good', 'fair', 'poor', 'flat')
+
+
+def overall_signal(states: List[str]) -> str:
+    """État global du casque: excellent, good (≤ 1/4 des canaux mauvais), poor, no_contact"""
+    if not states:
+        return 'unknown'
+    if all(state == 'flat' for state in states):
+        return 'no_contact'
+    bad = sum(state in ('poor', 'flat') for state in states)
+    if not bad and 'fair' not in states:
+        return 'excellent'
+    return 'good' if bad * 4 <= len(states) else 'poor'
+
+
+class SignalQualityEstimator:
+    """Variance, ligne plate et bruit secteur par canal; vecteur de qualité publié aux changements"""
+
+    def __init__(self, sampling_rate: float = 256.0, interval: float = 1.0, flat_uv: float = 0.5,
+                 fair_uv: float = 50.0, noisy_uv: float = 100.0, line_fair: float = 0.2,
+                 line_poor: float = 0.5, confirm: int = 2):
+        self.sampling_rate = float(sampling_rate)
+        self.interval = interval
+        self.interval_samples = max(int(interval * self.sampling_rate), 1)
+        self.flat_uv = flat_uv
+        self.fair_uv = fair_uv
+        self.noisy_uv = noisy_uv
+        self.line_fair = line_fair
+        self.line_poor = line_poor
+        self.confirm = max(int(confirm), 1)
+
+        self.channels: List[str] = []
+        self.published: Optional[Dict] = None
+        self.latest: Optional[Dict] = None
+        self.evaluations = 0
+        self.publications = 0
+        self._candidate = None
+        self._streak = 0
+        self._phasors = np.empty((0, len(LINE_FREQUENCIES)), dtype=complex)
+        self._clear(0)
+
+    def _clear(self, channels: int):
+        self._count = 0
+        self._sum = np.zeros(channels)
+        self._sumsq = np.zeros(channels)
+        self._dft = np.zeros((channels, len(LINE_FREQUENCIES)), dtype=complex)
+        self._basis = np.zeros(len(LINE_FREQUENCIES), dtype=complex)
+
+    def _table(self, stop: int) -> np.ndarray:
+        """Phaseurs e^(-iωn) des fréquences secteur pour n < stop (indice dans l'intervalle)"""
+        if stop > len(self._phasors):
+            size = max(stop, 2 * self.interval_samples)
+            omega = 2 * np.pi * np.asarray(LINE_FREQUENCIES) / self.sampling_rate
+            self._phasors = np.exp(-1j * np.outer(np.arange(size), omega))
+        return self._phasors
+
+    def push(self, epoch: np.ndarray, names: Optional[List[str]] = None) -> Optional[Dict]:
+        """Époque (canaux × échantillons); retourne le vecteur de qualité quand il change"""
+        channels, count = epoch.shape
+        if len(self.channels) != channels:
+            self.reset()
+            self.channels = list(names) if names and len(names) == channels else [f'CH{i + 1}' for i in range(channels)]
+            self._clear(channels)
+
+        phasors = self._table(self._count + count)[self._count:self._count + count]
+        self._dft += epoch @ phasors
+        self._basis += phasors.sum(axis=0)
+        self._sum += epoch.sum(axis=1)
+        self._sumsq += np.einsum('ij,ij->i', epoch, epoch)
+        self._count += count
+        if self._count < self.interval_samples:
+            return None
+        return self._evaluate()
+
+    def _evaluate(self) -> Optional[Dict]:
+        count = self._count
+        mean = self._sum / count
+        variance = np.maximum(self._sumsq / count - mean * mean, 0.0)
+        # DFT sans la composante continue; puissance d'une sinusoïde d'amplitude A: A²/2 = 2|S|²/N²
+        dft = self._dft - mean[:, None] * self._basis[None, :]
+        line_power = 2.0 * (np.abs(dft) ** 2).max(axis=1) / (count * count)
+        line_ratio = np.minimum(line_power / np.maximum(variance, 1e-12), 1.0)
+        std = np.sqrt(variance)
+        self._clear(len(self.channels))
+
+        states = tuple(
+            'flat' if s < self.flat_uv else
+            'poor' if s > self.noisy_uv or r > self.line_poor else
+            'fair' if s > self.fair_uv or r > self.line_fair else
+            'good'
+            for s, r in zip(std.tolist(), line_ratio.tolist())
+        )
+        self.evaluations += 1
+        self.latest = {
+            'channels': self.channels,
+            'states': list(states),
+            'signal': overall_signal(states),
+            'std_uv': np.round(std, 1).tolist(),
+            'line_ratio': np.round(line_ratio, 2).tolist()
+        }
+
+        if states == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate, self._streak = states, 1
+        if self.published is not None and (self._streak < self.confirm or list(states) == self.published['states']):
+            return None
+        self.published = self.latest
+        self.publications += 1
+        return self.published
+
+    @property
+    def signal(self) -> str:
+        return self.published['signal'] if self.published else 'unknown'
+
+    def reset(self):
+        """Nouvelle acquisition: accumulateurs vidés, prochain vecteur publié immédiatement"""
+        self._clear(len(self.channels))
+        self.published = None
+        self._candidate = None
+        self._streak = 0
+
+    def stats(self) -> Dict:
+        return {
+            'interval': self.interval,
+            'signal': self.signal,
+            'evaluations': self.evaluations,
+            'publications': self.publications,
+            'latest': self.latest
+        }